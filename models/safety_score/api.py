@@ -3,34 +3,309 @@ Simple API for Tourist Safety Score Prediction
 This script provides a simple Flask API to serve the tourist safety prediction model.
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, make_response
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
-from model_utils import load_model, train_and_save_model
+from model_utils import load_model, train_and_save_model, get_model_version, ModelRegistry, REGISTRY_PATH, DEFAULT_MODEL_NAME, MODEL_CACHE_SIZE
+from train import RAW_FEATURE_COLUMNS, RISK_BANDS, risk_band_labels
+from feature_store import FeatureStore
+from scenarios import run_scenario
+from explain import ContributionExplainer
+from geo import PincodeIndex, check_coordinates
+from heatmap import SafetySurface
+from routes import score_route, DEFAULT_SPACING_KM, DEFAULT_MAX_SNAP_KM
+from geofence import build_risk_zones, DEFAULT_THRESHOLD, DEFAULT_LINK_KM
+from forecast import build_forecast_table, load_forecast_table
+from shadow import ShadowScorer, SHADOW_FRACTION
+from shared_model import attach_shared
+from input_validation import InputSchema, InvalidInputError
+from drift import DriftMonitor
+from structured_logging import configure_logging, get_logger
+from collections import OrderedDict
+import metrics
+from metrics import pipeline_timer
+import base64
+import functools
+import gzip
+import hashlib
+import time
+import threading
 import os
 
+# msgpack is optional; without it only JSON and raw packed arrays are accepted
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# zstandard is optional; without it responses are only gzip-compressed
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes and origins
 
+# JSON logs written by a background thread; nothing in a request blocks on log output
+configure_logging()
+logger = get_logger('safety_api')
+
 # Global variable to store the loaded model
 model = None
+model_version = 'unknown'
+
+# Pincode-keyed features from the training data, loaded on first use
+feature_store = None
+DATA_PATH = './data.csv'
+
+# Per-feature type and range checks compiled from the training data, built on first use
+input_schema = None
+
+# Streaming sketches of validated request inputs, compared with the training data (see drift.py)
+drift_monitor = None
+
+# When set, workers attach to a memory-mapped copy of the model at this path prefix (see shared_model.py)
+SHARED_MODEL_PATH = os.environ.get('SHARED_MODEL_PATH')
+
+# Candidate model scored in the background on a sampled fraction of requests (see shadow.py)
+shadow_scorer = None
+SHADOW_MODEL_PATH = os.environ.get('SHADOW_MODEL_PATH')
+SHADOW_SAMPLE_FRACTION = float(os.environ.get('SHADOW_FRACTION', SHADOW_FRACTION))
+
+# 'float32' serves through the float32 pipeline once it matches float64 on DATA_PATH
+INFERENCE_PRECISION = os.environ.get('INFERENCE_PRECISION', 'float64')
+
+# Regional models routed by state/area_type (see ModelRegistry); the loaded model is its default.
+# Rebuilt when the default model or the manifest file changes
+model_registry = None
+model_registry_mtime = None
+
+# Per-prediction contribution explainer for the loaded model, and explanations cached per pincode
+explainer = None
+# Explainers for regional models, keyed by id(predictor)
+regional_explainers = {}
+CONTRIBUTION_CACHE_SIZE = 10000
+contribution_cache = OrderedDict()
+contribution_cache_lock = threading.Lock()
+
+# Global feature importance, computed once per loaded model
+feature_importance_cache = None
+
+# Latest-year score of every stored pincode, computed once per loaded model
+score_table_cache = None
+
+# Responses smaller than this are sent as is; PNG tiles and packed arrays are never recompressed
+COMPRESSION_MIN_BYTES = 1024
+GZIP_LEVEL = 5
+ZSTD_LEVEL = 3
+UNCOMPRESSED_MIMETYPES = ('image/png', 'application/octet-stream')
+
+# Spatial index of model-scored pincode coordinates and the heatmap surface built on it
+pincode_index = None
+heatmap_surface = None
+HEATMAP_CACHE_DIR = './heatmap_cache'
+# Zoom levels whose tiles are rendered at startup instead of on first request
+HEATMAP_PRECOMPUTE_ZOOMS = (5, 10)
+
+# Geofence risk zones per (threshold, link_km) in LRU order, rebuilt when the pincode index changes
+RISK_ZONES_CACHE_SIZE = 16
+risk_zones_cache = OrderedDict()
+risk_zones_lock = threading.Lock()
+GEOFENCE_DIR = './geofence_zones'
+# Only these parameter sets are written to GEOFENCE_DIR; other client values stay in memory
+SAVED_ZONE_PARAMS = {(DEFAULT_THRESHOLD, DEFAULT_LINK_KM)}
+
+# Precomputed next-year forecasts keyed by pincode, built by forecast.py (or at startup) and
+# reloaded when the file changes
+forecasts = None
+forecasts_lock = threading.Lock()
+FORECAST_PATH = './forecasts.csv'
 
 def load_or_train_model():
     """Load existing model or train a new one if not found"""
-    global model
+    global model, model_version
     
     model_path = 'tourist_safety_model.pkl'
     
-    if os.path.exists(model_path):
-        print("Loading existing model...")
+    if os.path.exists(model_path) and SHARED_MODEL_PATH:
+        logger.info("Attaching to shared model", extra={'model_path': model_path, 'shared_path': SHARED_MODEL_PATH})
+        model = attach_shared(model_path, SHARED_MODEL_PATH)
+    elif os.path.exists(model_path):
+        logger.info("Loading existing model", extra={'model_path': model_path})
         model = load_model(model_path)
     else:
-        print("No existing model found. Training new model...")
+        logger.warning("No existing model found, training a new one", extra={'model_path': model_path})
         model = train_and_save_model(model_path=model_path)
     
     if model is None:
         raise Exception("Failed to load or train model!")
+    
+    if INFERENCE_PRECISION == 'float32':
+        try:
+            model.enable_float32(DATA_PATH)
+        except ValueError as e:
+            logger.warning("Staying on float64 inference", extra={'reason': str(e)})
+    
+    model_version = get_model_version(model_path)
+    metrics.MODEL_INFO.clear()
+    # Shared models keep the name of the estimator their flat trees came from
+    model_type = getattr(model.model, 'model_type', type(model.model).__name__)
+    metrics.MODEL_INFO.set(1, model_version=model_version, model_type=model_type)
+    
+    if SHADOW_MODEL_PATH:
+        load_shadow_model(SHADOW_MODEL_PATH, SHADOW_SAMPLE_FRACTION)
+
+def load_shadow_model(candidate_path, fraction=SHADOW_SAMPLE_FRACTION):
+    """Start shadow-scoring a candidate model artifact next to the loaded model"""
+    global shadow_scorer
+    
+    candidate = load_model(candidate_path)
+    if candidate is None:
+        raise Exception(f"Failed to load shadow model from {candidate_path}!")
+    
+    if shadow_scorer is not None:
+        shadow_scorer.shutdown()
+    shadow_scorer = ShadowScorer(candidate, version=get_model_version(candidate_path), fraction=fraction)
+
+def shadow_score(input_data, scores, seconds=None):
+    """Hand a sampled share of default-model predictions to the shadow candidate, off the request path"""
+    if shadow_scorer is not None and shadow_scorer.sample():
+        shadow_scorer.submit(input_data, scores, seconds)
+
+@app.before_request
+def start_request_timer():
+    """Remember when the request started and how many rows it scores"""
+    g.request_start = time.perf_counter()
+    g.rows_scored = 0
+
+@app.after_request
+def record_request_metrics(response):
+    """Record latency, status and rows scored for every request"""
+    start = g.get('request_start')
+    if start is None:
+        return response
+    
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    status = str(response.status_code)
+    metrics.REQUEST_LATENCY.observe(time.perf_counter() - start, endpoint=endpoint, method=request.method)
+    metrics.REQUESTS.inc(endpoint=endpoint, method=request.method, status=status)
+    if response.status_code >= 400:
+        metrics.ERRORS.inc(endpoint=endpoint, status=status)
+    
+    rows = g.get('rows_scored', 0)
+    if rows:
+        metrics.BATCH_SIZE.observe(rows, endpoint=endpoint)
+        metrics.ROWS_SCORED.inc(rows, endpoint=endpoint, model_version=model_version)
+    return response
+
+@app.after_request
+def compress_response(response):
+    """zstd- or gzip-compress large responses for clients that accept it"""
+    if (response.direct_passthrough or response.status_code in (204, 304) or 'Content-Encoding' in response.headers
+            or response.mimetype in UNCOMPRESSED_MIMETYPES):
+        return response
+    
+    accepted = request.accept_encodings
+    if not (accepted['gzip'] or (zstandard is not None and accepted['zstd'])):
+        return response
+    body = response.get_data()
+    if len(body) < COMPRESSION_MIN_BYTES:
+        return response
+    
+    if zstandard is not None and accepted['zstd']:
+        response.set_data(zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body))
+        response.headers['Content-Encoding'] = 'zstd'
+    else:
+        response.set_data(gzip.compress(body, compresslevel=GZIP_LEVEL))
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+def default_model_version():
+    return model_version
+
+def data_file_version():
+    """Modification time of the training data behind the feature store"""
+    return os.path.getmtime(DATA_PATH)
+
+def registry_version():
+    """Version of every registered model plus the routes, so routed responses change when any of them does"""
+    registry = get_model_registry()
+    versions = []
+    for name in sorted(registry.models):
+        try:
+            versions.append((name, registry.version(name)))
+        except OSError:
+            versions.append((name, None))
+    return repr((versions, sorted((column, sorted(routes.items())) for column, routes in registry.routes.items())))
+
+def heatmap_version():
+    return get_heatmap_surface().version
+
+def pincode_index_version():
+    return get_pincode_index().version
+
+def etag_cached(*versions):
+    """Decorator answering a GET with 304 when If-None-Match holds the ETag for this URL and data.
+
+    versions are callables returning the version of each piece of data the view reads
+    (model, registry, forecast table, ...). A match skips the handler entirely.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                parts = [request.full_path] + [str(version()) for version in versions]
+            except Exception:
+                # Data that cannot be versioned (e.g. no model yet) is served untagged; the view reports the error
+                return view(*args, **kwargs)
+            etag = hashlib.sha256('|'.join(parts).encode()).hexdigest()[:20]
+            if request.if_none_match.contains_weak(etag):
+                response = app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            # Weak, because the same representation may be sent gzip- or zstd-encoded
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
+
+def wants_columnar():
+    """Check whether the caller asked for parallel arrays instead of one object per row (?format=columnar)"""
+    return request.args.get('format', '').lower() == 'columnar'
+
+def to_columns(records):
+    """Rows of dicts as parallel arrays keyed by field, null where a row lacks the field"""
+    fields = list(dict.fromkeys(field for record in records for field in record))
+    return {field: [record.get(field) for record in records] for field in fields}
+
+def rows_response(key, records):
+    """JSON body with records under key, as a list of objects or (?format=columnar) parallel arrays"""
+    if wants_columnar():
+        return jsonify({
+            'format': 'columnar',
+            key: to_columns(records)
+        })
+    return jsonify({
+        key: records
+    })
+
+def count_rows(n):
+    """Add to the number of rows scored by the current request"""
+    g.rows_scored = g.get('rows_scored', 0) + n
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus text-format metrics"""
+    # Drift gauges are recomputed here when due, never on the prediction path
+    if drift_monitor is not None:
+        drift_monitor.refresh()
+    return app.response_class(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -40,6 +315,149 @@ def health_check():
         'model_loaded': model is not None
     })
 
+@app.route('/drift', methods=['GET'])
+def drift_status():
+    """Per-feature drift of recent inputs against the training data; ?refresh=1 recomputes now"""
+    try:
+        return jsonify(get_drift_monitor().refresh(force=request.args.get('refresh') == '1'))
+    
+    except Exception as e:
+        logger.exception("Request failed", extra={'endpoint': request.path})
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+@app.route('/shadow', methods=['GET', 'POST'])
+def shadow_status():
+    """Candidate-vs-primary comparison; POST {"fraction": 0.2} changes the sampled share of requests"""
+    try:
+        if shadow_scorer is None:
+            return jsonify({
+                'error': 'No shadow model loaded (set SHADOW_MODEL_PATH)'
+            }), 404
+        
+        if request.method == 'POST':
+            input_data = request.get_json(silent=True)
+            fraction = input_data.get('fraction') if isinstance(input_data, dict) else None
+            # bool is an int subclass, so true/false would otherwise pass as 1 and 0
+            if isinstance(fraction, bool) or not isinstance(fraction, (int, float)) or not 0 <= fraction <= 1:
+                return jsonify({
+                    'error': 'Expected format: {"fraction": <number between 0 and 1>}'
+                }), 400
+            shadow_scorer.fraction = float(fraction)
+        
+        return jsonify(shadow_scorer.summary())
+    
+    except Exception as e:
+        logger.exception("Request failed", extra={'endpoint': request.path})
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+@app.route('/models', methods=['GET'])
+def list_models():
+    """Registered models, their versions and the state/area_type routes to them"""
+    try:
+        if model is None:
+            return jsonify({
+                'error': 'Model not loaded'
+            }), 500
+        
+        return jsonify(get_model_registry().describe())
+    
+    except Exception as e:
+        logger.exception("Request failed", extra={'endpoint': request.path})
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+# Binary wire formats: rows of RAW_FEATURE_COLUMNS in that fixed order
+BINARY_CONTENT_TYPE = 'application/octet-stream'
+MSGPACK_CONTENT_TYPES = ('application/msgpack', 'application/x-msgpack')
+BINARY_DTYPES = {'float32': np.dtype('<f4'), 'float64': np.dtype('<f8')}
+
+def is_binary_request():
+    """Check whether the request body uses one of the binary wire formats"""
+    return request.mimetype == BINARY_CONTENT_TYPE or request.mimetype in MSGPACK_CONTENT_TYPES
+
+def decode_binary_request():
+    """Decode a binary request body into a (rows, features) matrix and its dtype"""
+    dtype_name = request.headers.get('X-Feature-Dtype', 'float32')
+    if dtype_name not in BINARY_DTYPES:
+        raise ValueError(f"Unsupported X-Feature-Dtype '{dtype_name}', expected one of {list(BINARY_DTYPES)}")
+    dtype = BINARY_DTYPES[dtype_name]
+    n_features = len(RAW_FEATURE_COLUMNS)
+    
+    if request.mimetype == BINARY_CONTENT_TYPE:
+        # Packed little-endian array, row-major
+        body = request.get_data(cache=False)
+        row_bytes = n_features * dtype.itemsize
+        if not body or len(body) % row_bytes:
+            raise ValueError(f"Body length must be a non-zero multiple of {row_bytes} bytes "
+                             f"({n_features} {dtype_name} values per row)")
+        rows = np.frombuffer(body, dtype=dtype).reshape(-1, n_features)
+    else:
+        if msgpack is None:
+            raise ValueError('msgpack is not installed on the server')
+        payload = msgpack.unpackb(request.get_data(cache=False))
+        # Either {"rows": [[...], ...]} or {"data": <packed bytes>}
+        if isinstance(payload, dict) and 'data' in payload:
+            rows = np.frombuffer(payload['data'], dtype=dtype).reshape(-1, n_features)
+        else:
+            rows = np.asarray(payload['rows'] if isinstance(payload, dict) else payload, dtype=dtype)
+            rows = rows.reshape(-1, n_features)
+    
+    return rows, dtype_name
+
+def binary_response(scores, dtype_name):
+    """Encode scores in the same wire format the request used"""
+    scores = np.asarray(scores, dtype=BINARY_DTYPES[dtype_name])
+    if request.mimetype == BINARY_CONTENT_TYPE:
+        response = app.response_class(scores.tobytes(), mimetype=BINARY_CONTENT_TYPE)
+    else:
+        body = msgpack.packb({
+            'data': scores.tobytes(),
+            'interpretation': [get_risk_interpretation(score) for score in scores.tolist()]
+        })
+        response = app.response_class(body, mimetype=request.mimetype)
+    response.headers['X-Feature-Dtype'] = dtype_name
+    return response
+
+def predict_binary():
+    """Score every row of a binary request in one vectorized call"""
+    try:
+        rows, dtype_name = decode_binary_request()
+    except (ValueError, KeyError, TypeError) as e:
+        return jsonify({
+            'error': f'Invalid binary payload: {e}'
+        }), 400
+    
+    valid, errors = get_input_schema().validate_matrix(rows)
+    if not valid.all():
+        return invalid_input_response(errors)
+    get_drift_monitor().observe(rows)
+    
+    input_df = pd.DataFrame(rows.astype(np.float64), columns=RAW_FEATURE_COLUMNS)
+    prediction = model.predict_safety_score(input_df, timer=pipeline_timer)
+    count_rows(len(input_df))
+    
+    if prediction is None:
+        return jsonify({
+            'error': 'Prediction failed'
+        }), 500
+    
+    return binary_response(np.clip(prediction, 0, 100), dtype_name)
+
+@app.route('/schema', methods=['GET'])
+def get_schema():
+    """Describe the fixed feature order used by the binary formats"""
+    return jsonify({
+        'input_features': RAW_FEATURE_COLUMNS,
+        'ranges': get_input_schema().describe(),
+        'dtypes': list(BINARY_DTYPES),
+        'content_types': [BINARY_CONTENT_TYPE] + (list(MSGPACK_CONTENT_TYPES) if msgpack is not None else [])
+    })
+
 @app.route('/predict', methods=['POST'])
 def predict():
     """Predict safety score for given input"""
@@ -49,6 +467,9 @@ def predict():
                 'error': 'Model not loaded'
             }), 500
         
+        if is_binary_request():
+            return predict_binary()
+        
         # Get input data from request
         input_data = request.get_json()
         
@@ -57,8 +478,23 @@ def predict():
                 'error': 'No input data provided'
             }), 400
         
-        # Make prediction
-        prediction = model.predict_safety_score(input_data)
+        _, values, valid, errors = get_input_schema().validate([input_data])
+        if not valid[0]:
+            return invalid_input_response(errors)
+        get_drift_monitor().observe(values)
+        
+        # Make prediction with the model routed to this input's state/area_type
+        registry = get_model_registry()
+        model_name = registry.route([input_data.get('state')], [input_data.get('area_type')])[0]
+        predictor = registry.get(model_name)
+        if predictor is None:
+            return jsonify({
+                'error': f"Model '{model_name}' could not be loaded"
+            }), 500
+        start = time.perf_counter()
+        prediction = predictor.predict_safety_score(input_data, timer=pipeline_timer)
+        seconds = time.perf_counter() - start
+        count_rows(1)
         
         if prediction is None:
             return jsonify({
@@ -67,13 +503,24 @@ def predict():
         
         # Ensure prediction is within valid range
         score = max(0, min(100, float(prediction[0])))
+        if predictor is model:
+            shadow_score(dict(input_data), [score], seconds)
         
-        return jsonify({
+        response = {
             'predicted_safety_score': score,
-            'interpretation': get_risk_interpretation(score)
-        })
+            'interpretation': get_risk_interpretation(score),
+            'model': model_name
+        }
+        
+        if wants_explanation():
+            current_explainer = get_explainer(predictor)
+            base_values, contributions = current_explainer.explain(input_data)
+            response['explanation'] = current_explainer.format(base_values[0], contributions[0])
+        
+        return jsonify(response)
     
     except Exception as e:
+        logger.exception("Request failed", extra={'endpoint': request.path})
         return jsonify({
             'error': str(e)
         }), 500
@@ -87,72 +534,886 @@ def batch_predict():
                 'error': 'Model not loaded'
             }), 500
         
+        if is_binary_request():
+            return predict_binary()
+        
         # Get input data from request
         input_data = request.get_json()
         
-        if not input_data or 'inputs' not in input_data:
+        if not isinstance(input_data, dict) or 'inputs' not in input_data:
             return jsonify({
                 'error': 'No input data provided. Expected format: {"inputs": [...]}'
             }), 400
         
         inputs = input_data['inputs']
-        predictions = []
+        if not isinstance(inputs, list):
+            return jsonify({
+                'error': 'inputs must be a list. Expected format: {"inputs": [...]}'
+            }), 400
         
-        for i, single_input in enumerate(inputs):
-            try:
-                prediction = model.predict_safety_score(single_input)
-                if prediction is not None:
-                    score = max(0, min(100, float(prediction[0])))
-                    predictions.append({
-                        'index': i,
-                        'predicted_safety_score': score,
-                        'interpretation': get_risk_interpretation(score)
-                    })
-                else:
-                    predictions.append({
-                        'index': i,
-                        'error': 'Prediction failed'
-                    })
-            except Exception as e:
+        predictions = score_input_batch(inputs)
+        
+        if wants_explanation():
+            attach_explanations(inputs, predictions)
+        
+        return rows_response('predictions', predictions)
+    
+    except Exception as e:
+        logger.exception("Request failed", extra={'endpoint': request.path})
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+def score_input_batch(inputs):
+    """Score a list of input dicts, rejecting invalid rows and making one vectorized call per routed model"""
+    registry = get_model_registry()
+    frame, values, valid, errors = get_input_schema().validate(inputs)
+    get_drift_monitor().observe(values[valid])
+    predictions = [None] * len(inputs)
+    for i, row_errors in errors.items():
+        predictions[i] = {
+            'index': i,
+            'error': 'Invalid input',
+            'errors': row_errors
+        }
+    
+    rows = np.flatnonzero(valid)
+    if not len(rows):
+        return predictions
+    
+    try:
+        valid_frame = frame if len(rows) == len(frame) else frame.iloc[rows].reset_index(drop=True)
+        start = time.perf_counter()
+        scores, names = registry.predict(valid_frame, timer=pipeline_timer)
+        seconds = time.perf_counter() - start
+        scores = np.clip(scores, 0, 100)
+        shadow_routed_rows(valid_frame, scores, names, seconds)
+        for i, score, name in zip(rows.tolist(), scores.tolist(), names.tolist()):
+            predictions[i] = {
+                'index': i,
+                'predicted_safety_score': score,
+                'interpretation': get_risk_interpretation(score),
+                'model': name
+            }
+        count_rows(len(rows))
+        return predictions
+    except Exception:
+        logger.exception("Vectorized batch scoring failed, scoring row by row",
+                         extra={'endpoint': request.path, 'rows': int(len(rows))})
+    
+    # Fall back to row by row so one failing row only fails itself
+    for i in rows.tolist():
+        single_input = inputs[i]
+        try:
+            model_name = registry.route([single_input.get('state')], [single_input.get('area_type')])[0]
+            predictor = registry.get(model_name)
+            prediction = predictor.predict_safety_score(single_input, timer=pipeline_timer) if predictor is not None else None
+            if prediction is not None:
+                count_rows(1)
+                score = max(0, min(100, float(prediction[0])))
+                predictions[i] = {
+                    'index': i,
+                    'predicted_safety_score': score,
+                    'interpretation': get_risk_interpretation(score),
+                    'model': model_name
+                }
+            else:
+                predictions[i] = {
+                    'index': i,
+                    'error': 'Prediction failed'
+                }
+        except Exception as e:
+            predictions[i] = {
+                'index': i,
+                'error': str(e)
+            }
+    
+    return predictions
+
+def attach_explanations(inputs, predictions):
+    """Add contribution breakdowns to every successful prediction, vectorized per model where possible"""
+    registry = get_model_registry()
+    groups = {}
+    for p in predictions:
+        if 'error' not in p:
+            groups.setdefault(p['model'], []).append(p['index'])
+    
+    for model_name, scored in groups.items():
+        current_explainer = get_explainer(registry.get(model_name))
+        try:
+            base_values, contributions = current_explainer.explain(pd.DataFrame([inputs[i] for i in scored]))
+            for row, i in enumerate(scored):
+                predictions[i]['explanation'] = current_explainer.format(base_values[row], contributions[row])
+        except Exception:
+            for i in scored:
+                base_values, contributions = current_explainer.explain(inputs[i])
+                predictions[i]['explanation'] = current_explainer.format(base_values[0], contributions[0])
+
+def wants_explanation():
+    """Check whether the caller asked for per-feature contributions (?explain=true)"""
+    return request.args.get('explain', '').lower() in ('1', 'true', 'yes')
+
+def get_explainer(predictor=None):
+    """Return the contribution explainer for a model (the loaded one by default), rebuilding it if the model changed"""
+    global explainer
+    
+    if predictor is not None and predictor is not model:
+        cached = regional_explainers.get(id(predictor))
+        if cached is None or cached.predictor is not predictor:
+            # Evicted regional models leave stale entries behind; keep at most one per cacheable model
+            if len(regional_explainers) >= MODEL_CACHE_SIZE:
+                regional_explainers.clear()
+            cached = regional_explainers[id(predictor)] = ContributionExplainer(predictor)
+        return cached
+    
+    if explainer is None or explainer.predictor is not model:
+        explainer = ContributionExplainer(model)
+        with contribution_cache_lock:
+            contribution_cache.clear()
+    return explainer
+
+def get_model_registry():
+    """Load the model registry on first use, rebuilding it if the default model or the manifest changed"""
+    global model_registry, model_registry_mtime
+    
+    try:
+        mtime = os.path.getmtime(REGISTRY_PATH)
+    except OSError:
+        mtime = None
+    if model_registry is None or model_registry.get(DEFAULT_MODEL_NAME) is not model or mtime != model_registry_mtime:
+        if model_registry is not None:
+            logger.info("Reloading model registry", extra={'registry_path': REGISTRY_PATH})
+        model_registry = ModelRegistry(REGISTRY_PATH, default_model=model, default_version=model_version)
+        model_registry_mtime = mtime
+        # Cached explanations may come from a model that has been replaced or re-routed
+        with contribution_cache_lock:
+            contribution_cache.clear()
+    return model_registry
+
+def explain_pincode_requests(pincode_requests, found, names):
+    """Explanations for pincode requests, served from the per-pincode cache when there are no overrides"""
+    # Clears the cache if the loaded model changed
+    get_explainer()
+    registry = get_model_registry()
+    store = get_feature_store()
+    explanations = [None] * len(pincode_requests)
+    misses = {}
+    
+    for i, single_input in enumerate(pincode_requests):
+        if not found[i]:
+            continue
+        key = None
+        if not single_input.get('overrides'):
+            key = (names[i], store.lookup(single_input['pincode'], single_input.get('year')), single_input.get('year'))
+            with contribution_cache_lock:
+                cached = contribution_cache.get(key)
+                if cached is not None:
+                    contribution_cache.move_to_end(key)
+                    explanations[i] = cached
+                    continue
+        misses.setdefault(names[i], []).append((i, key))
+    
+    for model_name, group in misses.items():
+        current_explainer = get_explainer(registry.get(model_name))
+        matrix, _ = store.get_batch(
+            [pincode_requests[i].get('pincode') for i, _ in group],
+            [pincode_requests[i].get('year') for i, _ in group],
+            [pincode_requests[i].get('overrides') for i, _ in group]
+        )
+        base_values, contributions = current_explainer.explain(store.to_frame(matrix))
+        with contribution_cache_lock:
+            for row, (i, key) in enumerate(group):
+                explanations[i] = current_explainer.format(base_values[row], contributions[row])
+                if key is not None:
+                    contribution_cache[key] = explanations[i]
+            while len(contribution_cache) > CONTRIBUTION_CACHE_SIZE:
+                contribution_cache.popitem(last=False)
+    
+    return explanations
+
+def get_input_schema():
+    """Compile the input checks from the training data on first use"""
+    global input_schema
+    
+    if input_schema is None:
+        input_schema = InputSchema(RAW_FEATURE_COLUMNS, get_feature_store().matrix)
+    return input_schema
+
+def get_drift_monitor():
+    """Build the input drift sketches against the training data on first use"""
+    global drift_monitor
+    
+    if drift_monitor is None:
+        drift_monitor = DriftMonitor(RAW_FEATURE_COLUMNS, get_feature_store().matrix)
+    return drift_monitor
+
+def invalid_input_response(errors, key='index'):
+    """400 response listing the problems of every rejected row, identified by key (row index or pincode)"""
+    return jsonify({
+        'error': 'Invalid input',
+        'rows': [{key: i, 'errors': row_errors} for i, row_errors in sorted(errors.items())]
+    }), 400
+
+def get_feature_store():
+    """Load the pincode feature store on first use"""
+    global feature_store
+    
+    if feature_store is None:
+        feature_store = FeatureStore(DATA_PATH)
+    return feature_store
+
+def get_pincode_index():
+    """Spatial index of pincode coordinates scored by their routed models, rebuilt if the registry changed"""
+    global pincode_index
+    
+    registry = get_model_registry()
+    if pincode_index is None or pincode_index[0] is not registry:
+        pincode_index = (registry, PincodeIndex.from_model(model, get_feature_store(), registry=registry))
+    return pincode_index[1]
+
+def get_heatmap_surface():
+    """Interpolated safety surface over the current pincode index"""
+    global heatmap_surface
+    
+    index = get_pincode_index()
+    if heatmap_surface is None or heatmap_surface.index is not index:
+        heatmap_surface = SafetySurface(index, cache_dir=HEATMAP_CACHE_DIR)
+    return heatmap_surface
+
+def get_risk_zones(threshold=DEFAULT_THRESHOLD, link_km=DEFAULT_LINK_KM):
+    """Risk zones for the current pincode index, built once per parameter set; ValueError for bad parameters"""
+    key = (float(threshold), float(link_km))
+    if not 0 <= key[0] <= 100:
+        raise ValueError('threshold must be a score between 0 and 100')
+    if not (np.isfinite(key[1]) and key[1] > 0):
+        raise ValueError('link_km must be a positive number of kilometres')
+    
+    index = get_pincode_index()
+    with risk_zones_lock:
+        cached = risk_zones_cache.get(key)
+        if cached is None or cached[0] is not index:
+            if cached is not None:
+                risk_zones_cache.clear()
+            zones = build_risk_zones(index, threshold=key[0], link_km=key[1])
+            if key in SAVED_ZONE_PARAMS:
+                zones.save(GEOFENCE_DIR)
+            cached = risk_zones_cache[key] = (index, zones)
+        risk_zones_cache.move_to_end(key)
+        while len(risk_zones_cache) > RISK_ZONES_CACHE_SIZE:
+            risk_zones_cache.popitem(last=False)
+    return cached[1]
+
+def forecast_file_version():
+    """Modification time of the forecast table, or None if it has not been built"""
+    try:
+        return os.path.getmtime(FORECAST_PATH)
+    except OSError:
+        return None
+
+def get_forecasts():
+    """Forecast lookup table, reloaded when forecasts.csv changes; None if it has not been built"""
+    global forecasts
+    
+    mtime = forecast_file_version()
+    if mtime is None:
+        return None
+    with forecasts_lock:
+        if forecasts is None or forecasts[0] != mtime:
+            forecasts = (mtime, load_forecast_table(FORECAST_PATH))
+    return forecasts[1]
+
+def build_missing_forecasts():
+    """Build forecasts.csv at startup if forecast.py has not been run; never called on a request"""
+    if os.path.exists(FORECAST_PATH):
+        return
+    logger.info("No forecast table found, building forecasts", extra={'forecast_path': FORECAST_PATH})
+    table, validation = build_forecast_table(DATA_PATH, FORECAST_PATH)
+    logger.info("Forecast table built", extra={'forecast_path': FORECAST_PATH, 'pincodes': len(table), **validation})
+
+def precompute_heatmap():
+    """Render the current surface's tiles and grids into the disk cache; run at startup, off the request path"""
+    surface = get_heatmap_surface()
+    start = time.perf_counter()
+    tiles = surface.precompute(*HEATMAP_PRECOMPUTE_ZOOMS)
+    logger.info("Heatmap tiles precomputed", extra={'surface_version': surface.version, 'tiles': tiles,
+                                                    'seconds': round(time.perf_counter() - start, 3)})
+
+def forecasts_missing_response():
+    """503 while the forecast table has not been built"""
+    return jsonify({
+        'error': 'Forecast table not built. Run python forecast.py'
+    }), 503
+
+def parse_points(points):
+    """Turn [lat, lon] pairs or {"lat", "lon"} objects into an (n, 2) array"""
+    points = np.asarray([
+        (p['lat'], p['lon']) if isinstance(p, dict) else p for p in points
+    ], dtype=np.float64)
+    if points.ndim != 2 or points.shape[1] != 2:
+        raise ValueError("Every point needs exactly a latitude and a longitude")
+    return points
+
+def score_pincode_requests(pincode_requests):
+    """Score a list of {pincode, year, overrides} requests, one vectorized call per routed model.
+
+    Returns the scores, a found mask, the model name used for each request and
+    {request index: errors} for requests that are malformed or whose year or
+    overrides fail the InputSchema (those are not scored).
+    """
+    store = get_feature_store()
+    errors = {}
+    for i, r in enumerate(pincode_requests):
+        if not isinstance(r, dict):
+            errors[i] = [{'field': None, 'error': 'input must be a JSON object'}]
+        elif row_errors := store.request_errors(r.get('pincode'), r.get('year'), r.get('overrides')):
+            errors[i] = row_errors
+    # Malformed requests are looked up as unknown pincodes, so they are never scored
+    pincode_requests = [{} if i in errors else r for i, r in enumerate(pincode_requests)]
+    
+    pincodes = [r.get('pincode') for r in pincode_requests]
+    years = [r.get('year') for r in pincode_requests]
+    matrix, found = store.get_batch(pincodes, years, [r.get('overrides') for r in pincode_requests])
+    
+    # Requested years and overrides go through the same checks as raw inputs
+    found_rows = np.flatnonzero(found)
+    valid, row_errors = get_input_schema().validate_matrix(matrix[found_rows])
+    errors.update({int(found_rows[k]): row_error for k, row_error in row_errors.items()})
+    scored = found.copy()
+    scored[found_rows[~valid]] = False
+    
+    # Route by the stored state and area type of each pincode
+    registry = get_model_registry()
+    names = registry.route(*store.regions(pincodes, years))
+    
+    scores = np.full(len(pincode_requests), np.nan)
+    if scored.any():
+        frame = store.to_frame(matrix[scored])
+        start = time.perf_counter()
+        scored_scores, _ = registry.predict(frame, names=names[scored], timer=pipeline_timer)
+        seconds = time.perf_counter() - start
+        scores[scored] = np.clip(scored_scores, 0, 100)
+        count_rows(int(scored.sum()))
+        shadow_routed_rows(frame, scores[scored], names[scored], seconds)
+    return scores, found, names, errors
+
+def shadow_routed_rows(frame, scores, names, seconds):
+    """Shadow the rows of a routed batch that the default model scored"""
+    if shadow_scorer is None:
+        return
+    default_rows = names == DEFAULT_MODEL_NAME
+    if default_rows.all():
+        shadow_score(frame, scores, seconds)
+    elif default_rows.any():
+        # The batch time includes regional models, so it is not comparable
+        shadow_score(frame[default_rows].reset_index(drop=True), scores[default_rows])
+
+@app.route('/predict/pincode', methods=['POST'])
+def predict_pincode():
+    """Predict safety score for a pincode using its stored features"""
+    try:
+        if model is None:
+            return jsonify({
+                'error': 'Model not loaded'
+            }), 500
+        
+        input_data = request.get_json()
+        
+        if not isinstance(input_data, dict) or 'pincode' not in input_data:
+            return jsonify({
+                'error': 'No pincode provided. Expected format: {"pincode": ..., "year": ..., "overrides": {...}}'
+            }), 400
+        
+        scores, found, names, errors = score_pincode_requests([input_data])
+        
+        if errors:
+            return invalid_input_response(errors)
+        if not found[0]:
+            return jsonify({
+                'error': f"Unknown pincode: {input_data['pincode']}"
+            }), 404
+        
+        score = float(scores[0])
+        response = {
+            'pincode': input_data['pincode'],
+            'predicted_safety_score': score,
+            'interpretation': get_risk_interpretation(score),
+            'model': names[0]
+        }
+        
+        if wants_explanation():
+            response['explanation'] = explain_pincode_requests([input_data], found, names)[0]
+        
+        return jsonify(response)
+    
+    except KeyError as e:
+        return jsonify({
+            'error': e.args[0]
+        }), 400
+    except ValueError as e:
+        return jsonify({
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        logger.exception("Request failed", extra={'endpoint': request.path})
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+@app.route('/batch_predict/pincode', methods=['POST'])
+def batch_predict_pincode():
+    """Predict safety scores for many pincodes using their stored features"""
+    try:
+        if model is None:
+            return jsonify({
+                'error': 'Model not loaded'
+            }), 500
+        
+        input_data = request.get_json()
+        
+        if not isinstance(input_data, dict) or not isinstance(input_data.get('inputs'), list):
+            return jsonify({
+                'error': 'No input data provided. Expected format: {"inputs": [{"pincode": ...}, ...]}'
+            }), 400
+        
+        scores, found, names, errors = score_pincode_requests(input_data['inputs'])
+        
+        predictions = []
+        for i, (single_input, score, ok, model_name) in enumerate(zip(input_data['inputs'], scores.tolist(),
+                                                                       found.tolist(), names.tolist())):
+            if i in errors:
+                predictions.append({
+                    'index': i,
+                    'pincode': single_input.get('pincode') if isinstance(single_input, dict) else None,
+                    'error': 'Invalid input',
+                    'errors': errors[i]
+                })
+            elif not ok:
                 predictions.append({
                     'index': i,
-                    'error': str(e)
+                    'pincode': single_input.get('pincode'),
+                    'error': 'Unknown pincode'
                 })
+            else:
+                predictions.append({
+                    'index': i,
+                    'pincode': single_input.get('pincode'),
+                    'predicted_safety_score': score,
+                    'interpretation': get_risk_interpretation(score),
+                    'model': model_name
+                })
+        
+        if wants_explanation():
+            scored = found.copy()
+            scored[list(errors)] = False
+            explanations = explain_pincode_requests(input_data['inputs'], scored, names)
+            for prediction, explanation in zip(predictions, explanations):
+                if explanation is not None:
+                    prediction['explanation'] = explanation
+        
+        return rows_response('predictions', predictions)
+    
+    except KeyError as e:
+        return jsonify({
+            'error': e.args[0]
+        }), 400
+    except ValueError as e:
+        return jsonify({
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        logger.exception("Request failed", extra={'endpoint': request.path})
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+@app.route('/scenario', methods=['POST'])
+def scenario():
+    """Re-score a region under hypothetical feature multipliers and deltas"""
+    try:
+        if model is None:
+            return jsonify({
+                'error': 'Model not loaded'
+            }), 500
         
+        input_data = request.get_json()
+        
+        if not isinstance(input_data, dict) or not (input_data.get('multipliers') or input_data.get('deltas')):
+            return jsonify({
+                'error': 'No changes provided. Expected format: {"state": ..., "area_type": ..., "pincodes": [...], '
+                         '"multipliers": {...}, "deltas": {...}}'
+            }), 400
+        
+        result = run_scenario(
+            model,
+            get_feature_store(),
+            registry=get_model_registry(),
+            schema=get_input_schema(),
+            state=input_data.get('state'),
+            area_type=input_data.get('area_type'),
+            pincodes=input_data.get('pincodes'),
+            multipliers=input_data.get('multipliers'),
+            deltas=input_data.get('deltas'),
+            year=input_data.get('year')
+        )
+        
+        if result is None:
+            return jsonify({
+                'error': 'No pincodes match the region filter'
+            }), 404
+        
+        # Baseline and scenario rows are both scored
+        count_rows(2 * result['summary']['pincodes'])
+        return jsonify(result)
+    
+    except InvalidInputError as e:
+        return invalid_input_response(e.errors, key='pincode')
+    except KeyError as e:
+        return jsonify({
+            'error': e.args[0]
+        }), 400
+    except ValueError as e:
         return jsonify({
-            'predictions': predictions
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        logger.exception("Request failed", extra={'endpoint': request.path})
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+@app.route('/features/<pincode>', methods=['GET'])
+@etag_cached(data_file_version)
+def get_pincode_features(pincode):
+    """Get the stored raw features for a pincode"""
+    store = get_feature_store()
+    year = request.args.get('year', type=int)
+    row = store.lookup(pincode, year)
+    
+    if row is None:
+        return jsonify({
+            'error': f'Unknown pincode: {pincode}'
+        }), 404
+    
+    return jsonify({
+        **store.metadata(row),
+        'features': store.get_features(pincode, year)
+    })
+
+@app.route('/heatmap/tiles/<int:z>/<int:x>/<int:y>.png', methods=['GET'])
+@etag_cached(heatmap_version)
+def get_heatmap_tile(z, x, y):
+    """Serve one slippy-map tile of the interpolated safety surface"""
+    try:
+        if model is None:
+            return jsonify({
+                'error': 'Model not loaded'
+            }), 500
+        
+        surface = get_heatmap_surface()
+        response = app.response_class(surface.render_tile(z, x, y), mimetype='image/png')
+        response.headers['X-Surface-Version'] = surface.version
+        return response
+    
+    except ValueError as e:
+        return jsonify({
+            'error': str(e)
+        }), 404
+    except Exception as e:
+        logger.exception("Request failed", extra={'endpoint': request.path})
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+@app.route('/heatmap/grid', methods=['GET'])
+@etag_cached(heatmap_version)
+def get_heatmap_grid():
+    """Serve the interpolated safety surface as a base64-encoded uint8 grid"""
+    try:
+        if model is None:
+            return jsonify({
+                'error': 'Model not loaded'
+            }), 500
+        
+        surface = get_heatmap_surface()
+        grid = surface.grid(request.args.get('zoom', 6, type=int))
+        values = grid.pop('values')
+        
+        return jsonify({
+            **grid,
+            'version': surface.version,
+            'encoding': 'uint8, row-major, north row first, base64',
+            'data': base64.b64encode(values.tobytes()).decode('ascii')
         })
     
+    except ValueError as e:
+        return jsonify({
+            'error': str(e)
+        }), 400
     except Exception as e:
+        logger.exception("Request failed", extra={'endpoint': request.path})
         return jsonify({
             'error': str(e)
         }), 500
 
-@app.route('/feature_importance', methods=['GET'])
-def get_feature_importance():
-    """Get feature importance from the model"""
+@app.route('/score/route', methods=['POST'])
+def route_score():
+    """Score a polyline of GPS points against the nearest pincodes"""
     try:
         if model is None:
             return jsonify({
                 'error': 'Model not loaded'
             }), 500
         
-        feature_imp = model.get_feature_importance()
+        input_data = request.get_json()
+        
+        if not input_data or not input_data.get('points'):
+            return jsonify({
+                'error': 'No route provided. Expected format: {"points": [[lat, lon], ...], "spacing_km": 0.5}'
+            }), 400
         
-        if feature_imp is None:
+        try:
+            points = parse_points(input_data['points'])
+        except (KeyError, TypeError, ValueError):
             return jsonify({
-                'error': 'Feature importance not available'
+                'error': 'Points must be [lat, lon] pairs or {"lat": ..., "lon": ...} objects'
+            }), 400
+        
+        result = score_route(
+            get_pincode_index(),
+            points[:, 0],
+            points[:, 1],
+            spacing_km=float(input_data.get('spacing_km', DEFAULT_SPACING_KM)),
+            max_snap_km=float(input_data.get('max_snap_km', DEFAULT_MAX_SNAP_KM))
+        )
+        return jsonify(result)
+    
+    except ValueError as e:
+        return jsonify({
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        logger.exception("Request failed", extra={'endpoint': request.path})
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+@app.route('/geofence/zones', methods=['GET'])
+@etag_cached(pincode_index_version)
+def get_geofence_zones():
+    """Versioned risk-zone polygons built from low-scoring pincodes"""
+    try:
+        if model is None:
+            return jsonify({
+                'error': 'Model not loaded'
             }), 500
         
-        # Convert to dictionary format
-        importance_data = {
-            'features': feature_imp['feature'].tolist(),
-            'importance_values': feature_imp['importance'].tolist()
-        }
+        zones = get_risk_zones(
+            threshold=request.args.get('threshold', DEFAULT_THRESHOLD, type=float),
+            link_km=request.args.get('link_km', DEFAULT_LINK_KM, type=float)
+        )
+        return jsonify(zones.to_dict())
+    
+    except ValueError as e:
+        return jsonify({
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        logger.exception("Request failed", extra={'endpoint': request.path})
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+@app.route('/geofence/check', methods=['POST'])
+def check_geofence():
+    """Find the risk zone, if any, of every point in a batch of location pings"""
+    try:
+        if model is None:
+            return jsonify({
+                'error': 'Model not loaded'
+            }), 500
+        
+        input_data = request.get_json()
+        
+        if not input_data or 'points' not in input_data:
+            return jsonify({
+                'error': 'No points provided. Expected format: {"points": [[lat, lon], ...]}'
+            }), 400
+        
+        try:
+            points = parse_points(input_data['points'])
+        except (KeyError, TypeError, ValueError):
+            return jsonify({
+                'error': 'Points must be [lat, lon] pairs or {"lat": ..., "lon": ...} objects'
+            }), 400
+        
+        zones = get_risk_zones(
+            threshold=input_data.get('threshold', DEFAULT_THRESHOLD),
+            link_km=input_data.get('link_km', DEFAULT_LINK_KM)
+        )
+        check_coordinates(points[:, 0], points[:, 1])
+        zone_ids = zones.locate(points[:, 0], points[:, 1])
+        hit_ids = np.unique(zone_ids[zone_ids >= 0]).tolist()
+        
+        return jsonify({
+            'version': zones.version,
+            'stale': input_data.get('version') not in (None, zones.version),
+            'zone_ids': [None if zone_id < 0 else zone_id for zone_id in zone_ids.tolist()],
+            'hits': int((zone_ids >= 0).sum()),
+            'zones': {
+                zone_id: {key: zones.zones[zone_id][key] for key in ('name', 'risk_level', 'min_score')}
+                for zone_id in hit_ids
+            }
+        })
+    
+    except ValueError as e:
+        return jsonify({
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        logger.exception("Request failed", extra={'endpoint': request.path})
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+@app.route('/forecast/<int:pincode>', methods=['GET'])
+@etag_cached(forecast_file_version)
+def get_pincode_forecast(pincode):
+    """Get the precomputed next-year safety score forecast for a pincode"""
+    try:
+        table = get_forecasts()
+        if table is None:
+            return forecasts_missing_response()
+        
+        record = table.get(pincode)
+        
+        if record is None:
+            return jsonify({
+                'error': f'No forecast for pincode: {pincode}'
+            }), 404
+        
+        return jsonify(record)
+    
+    except Exception as e:
+        logger.exception("Request failed", extra={'endpoint': request.path})
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+@app.route('/forecast', methods=['GET'])
+@etag_cached(forecast_file_version)
+def get_region_forecasts():
+    """Get precomputed forecasts, optionally filtered by state and area type"""
+    try:
+        table = get_forecasts()
+        if table is None:
+            return forecasts_missing_response()
         
-        return jsonify(importance_data)
+        state = request.args.get('state')
+        area_type = request.args.get('area_type')
+        
+        records = [
+            record for record in table.values()
+            if (state is None or record['state'] == state) and (area_type is None or record['area_type'] == area_type)
+        ]
+        
+        return jsonify({
+            'count': len(records),
+            'forecasts': records
+        })
     
     except Exception as e:
+        logger.exception("Request failed", extra={'endpoint': request.path})
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+def get_score_table():
+    """Score every stored pincode's latest row once per model registry, routed like pincode requests"""
+    global score_table_cache
+    
+    registry = get_model_registry()
+    if score_table_cache is None or score_table_cache[0] is not registry:
+        store = get_feature_store()
+        rows = store.latest_rows
+        names = registry.route(store.states[rows], store.area_types[rows])
+        scores, _ = registry.predict(store.to_frame(store.matrix[rows]), names=names)
+        scores = np.clip(scores, 0, 100)
+        score_table_cache = (registry, {
+            'pincode': store.pincodes[rows].tolist(),
+            'state': store.states[rows].tolist(),
+            'area_type': store.area_types[rows].tolist(),
+            'year': store.years[rows].tolist(),
+            'predicted_safety_score': scores.tolist(),
+            'interpretation': risk_band_labels(scores).tolist(),
+            'model': names.tolist()
+        })
+    return score_table_cache[1]
+
+@app.route('/scores', methods=['GET'])
+@etag_cached(registry_version, data_file_version)
+def export_scores():
+    """Latest-year score of every stored pincode, optionally filtered by state and area_type"""
+    try:
+        if model is None:
+            return jsonify({
+                'error': 'Model not loaded'
+            }), 500
+        
+        table = get_score_table()
+        selected = np.ones(len(table['pincode']), dtype=bool)
+        for column in ('state', 'area_type'):
+            value = request.args.get(column)
+            if value is not None:
+                selected &= np.array(table[column], dtype=object) == value
+        
+        rows = np.flatnonzero(selected).tolist()
+        columns = {name: [values[i] for i in rows] for name, values in table.items()}
+        if wants_columnar():
+            return jsonify({
+                'format': 'columnar',
+                'scores': columns
+            })
+        return jsonify({
+            'scores': [dict(zip(columns, values)) for values in zip(*columns.values())]
+        })
+    
+    except Exception as e:
+        logger.exception("Request failed", extra={'endpoint': request.path})
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+@app.route('/feature_importance', methods=['GET'])
+@etag_cached(default_model_version)
+def get_feature_importance():
+    """Get feature importance from the model"""
+    try:
+        if model is None:
+            return jsonify({
+                'error': 'Model not loaded'
+            }), 500
+        
+        global feature_importance_cache
+        
+        if feature_importance_cache is None or feature_importance_cache[0] is not model:
+            feature_imp = model.get_feature_importance()
+            
+            if feature_imp is None:
+                return jsonify({
+                    'error': 'Feature importance not available'
+                }), 500
+            
+            # Convert to dictionary format
+            importance_data = {
+                'features': feature_imp['feature'].tolist(),
+                'importance_values': feature_imp['importance'].tolist()
+            }
+            feature_importance_cache = (model, importance_data)
+        
+        return jsonify(feature_importance_cache[1])
+    
+    except Exception as e:
+        logger.exception("Request failed", extra={'endpoint': request.path})
         return jsonify({
             'error': str(e)
         }), 500
@@ -162,16 +1423,10 @@ def get_risk_interpretation(score):
     # Ensure score is within 0-100 range
     score = max(0, min(100, score))
     
-    if score >= 80:
-        return "Very Safe"
-    elif score >= 65:
-        return "Safe"
-    elif score >= 50:
-        return "Moderate Risk"
-    elif score >= 35:
-        return "High Risk"
-    else:
-        return "Very High Risk"
+    for lower, label in RISK_BANDS:
+        if score >= lower:
+            return label
+    return RISK_BANDS[-1][1]
 
 @app.route('/example', methods=['GET'])
 def get_example():
@@ -226,7 +1481,22 @@ def get_example():
         'example_input': example_input,
         'usage': {
             'predict_single': 'POST /predict with the above JSON',
-            'predict_batch': 'POST /batch_predict with {"inputs": [input1, input2, ...]}'
+            'predict_batch': 'POST /batch_predict with {"inputs": [input1, input2, ...]}',
+            'predict_binary': 'POST /predict or /batch_predict with Content-Type application/octet-stream '
+                              '(or application/msgpack) and rows ordered as GET /schema',
+            'predict_pincode': 'POST /predict/pincode with {"pincode": 790003, "year": 2024, "overrides": {...}}',
+            'predict_pincode_batch': 'POST /batch_predict/pincode with {"inputs": [{"pincode": ...}, ...]}',
+            'scenario': 'POST /scenario with {"state": "Meghalaya", "multipliers": {"police_stations_per_100k": 2}}',
+            'heatmap_tiles': 'GET /heatmap/tiles/{z}/{x}/{y}.png',
+            'heatmap_grid': 'GET /heatmap/grid?zoom=6',
+            'route': 'POST /score/route with {"points": [[25.41, 91.35], [25.45, 91.39]], "spacing_km": 0.5}',
+            'geofence_zones': 'GET /geofence/zones?threshold=50',
+            'geofence_check': 'POST /geofence/check with {"points": [[25.42, 91.36], ...], "version": "..."}',
+            'forecast': 'GET /forecast/790003 or GET /forecast?state=Meghalaya',
+            'models': 'GET /models (inputs with "state" or "area_type" are routed to regional models)',
+            'shadow': 'GET /shadow, or POST /shadow with {"fraction": 0.2} (needs SHADOW_MODEL_PATH)',
+            'drift': 'GET /drift?refresh=1 (PSI, KS and mean shift of recent inputs per feature)',
+            'scores': 'GET /scores?state=Sikkim&format=columnar (latest score of every pincode)'
         }
     })
 
@@ -234,13 +1504,16 @@ if __name__ == '__main__':
     # Load or train model on startup
     try:
         load_or_train_model()
-        print("Model loaded successfully!")
+        logger.info("Model loaded", extra={'model_version': model_version})
+        build_missing_forecasts()
+        # Already-cached tiles make this quick; a new surface renders while requests are served
+        threading.Thread(target=precompute_heatmap, name='heatmap-precompute', daemon=True).start()
         
-        # Start the API server
+        # Start the API server; the debugger and reloader are for local development only
         app.run(
             host='0.0.0.0',
             port=3000,
-            debug=True
+            debug=os.environ.get('FLASK_DEBUG') == '1'
         )
-    except Exception as e:
-        print(f"Failed to start API: {e}")
+    except Exception:
+        logger.exception("Failed to start API")
@@ -0,0 +1,392 @@
+"""
+Performance benchmarks for the Tourist Safety Score model and API.
+
+Runs a reproducible suite over synthetic data scaled from data.csv (see synth.py), writes the
+results as JSON and compares them with a stored baseline:
+
+    python benchmark.py --output bench_results.json --baseline bench_baseline.json
+    python benchmark.py --save-baseline bench_baseline.json
+
+Exits with status 1 if any benchmark is slower than the baseline by more than
+the threshold (default 25%) and by more than an absolute floor (default 5 ms), so
+sub-millisecond timer noise is not reported as a regression.
+"""
+
+import argparse
+import contextlib
+import functools
+import io
+import json
+import os
+import pickle
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import cross_val_score
+from sklearn.feature_selection import SelectKBest, f_regression
+from train import TouristSafetyPredictor, RAW_FEATURE_COLUMNS
+from validation import ValidationPlan
+from synth import SyntheticDataGenerator, make_synthetic_data
+from flat_trees import compile_model
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+BATCH_SIZES = (1, 100, 10000, 100000)
+QUICK_BATCH_SIZES = (1, 100, 10000)
+
+# Slowdowns smaller than this are timer noise, whatever the ratio
+MIN_REGRESSION_SECONDS = 0.005
+
+# A fresh API process: load the model, then answer one /batch_predict request read from stdin
+COLD_START_SCRIPT = """
+import sys, api
+api.load_or_train_model()
+response = api.app.test_client().post('/batch_predict', data=sys.stdin.read(), content_type='application/json')
+assert response.status_code == 200 and 'error' not in response.get_json()['predictions'][0], response.data
+"""
+
+@functools.lru_cache(maxsize=None)
+def synthetic_generator(data_path='./data.csv'):
+    """SyntheticDataGenerator fitted to data_path, fitted once per path"""
+    return SyntheticDataGenerator().fit(pd.read_csv(data_path))
+
+def synthetic_rows(data_path='./data.csv', n_rows=1000, seed=42):
+    """Raw feature rows for benchmarking, streamed from the synthetic generator (see synth.py)"""
+    chunks = synthetic_generator(data_path).iter_chunks(n_rows, seed=seed)
+    return pd.concat(chunks, ignore_index=True)[RAW_FEATURE_COLUMNS]
+
+def measure(fn, repeat=5, warmup=1):
+    """Time fn() and summarize wall-clock seconds"""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    times = np.array(times)
+    return {
+        'median_s': float(np.median(times)),
+        'min_s': float(times.min()),
+        'p99_s': float(np.percentile(times, 99)),
+        'repeat': repeat
+    }
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the training code's progress output"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+def bench_training(df, repeat, validation='group'):
+    """Benchmark data preparation, feature engineering and each candidate model"""
+    results = {}
+    predictor = TouristSafetyPredictor()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'data.csv')
+        df.to_csv(csv_path, index=False)
+        with quiet():
+            results['load_and_prepare_data'] = measure(
+                lambda: predictor.load_and_prepare_data(data_path=csv_path), repeat=repeat)
+
+    results['feature_engineering'] = measure(predictor.feature_engineering, repeat=repeat)
+
+    # Prepare the same split, folds and matrices train_model builds, then time each candidate separately
+    engineered = predictor.feature_engineering()
+    features = predictor.select_features(engineered)
+    X = engineered[features]
+    y = np.clip(engineered[predictor.target_column], 0, 100)
+    plan = ValidationPlan(groups=engineered['pincode'], years=engineered['year'], n_rows=len(engineered),
+                          strategy=validation)
+    X_train, _, y_train, _ = plan.split(X, y)
+    X_train_scaled = predictor.scaler.fit_transform(X_train)
+    X_train_selected = SelectKBest(score_func=f_regression, k=min(15, len(features))).fit_transform(X_train_scaled, y_train)
+
+    for name in predictor.get_candidate_models():
+        def fit_candidate(name=name):
+            candidate = predictor.get_candidate_models()[name]
+            cross_val_score(candidate, X_train_selected, y_train, cv=plan.folds, scoring='r2')
+            candidate.fit(X_train_selected, y_train)
+        results[f'train_model[{name}]'] = measure(fit_candidate, repeat=max(1, repeat // 2), warmup=0)
+
+    return results
+
+def bench_inference(model, batch_sizes, repeat, seed=42):
+    """Benchmark single-row prediction and /batch_predict at several batch sizes, on synthetic rows"""
+    import api
+    api.model = model
+    client = api.app.test_client()
+    results = {}
+
+    single = synthetic_rows(n_rows=1, seed=seed).to_dict(orient='records')[0]
+    results['predict_safety_score[1]'] = measure(lambda: model.predict_safety_score(single), repeat=repeat * 20)
+
+    for n_rows in batch_sizes:
+        body = json.dumps({'inputs': synthetic_rows(n_rows=n_rows, seed=seed).to_dict(orient='records')})
+        runs = repeat if n_rows < 10000 else max(1, repeat // 2)
+        results[f'batch_predict[{n_rows}]'] = measure(
+            lambda: client.post('/batch_predict', data=body, content_type='application/json'), repeat=runs)
+
+    return results
+
+def bench_persistence(model, repeat):
+    """Benchmark pickling the predictor to disk and loading it back"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'model.pkl')
+
+        def save():
+            with open(path, 'wb') as f:
+                pickle.dump(model, f)
+
+        def load():
+            with open(path, 'rb') as f:
+                pickle.load(f)
+
+        results = {'model_save': measure(save, repeat=repeat)}
+        results['model_load'] = measure(load, repeat=repeat)
+        results['model_load']['artifact_bytes'] = os.path.getsize(path)
+    return results
+
+def bench_cold_start(model, repeat, data_path='./data.csv', seed=42):
+    """Benchmark a fresh process importing the API, loading the model and answering its first request.
+
+    The first request pays for the lazily built feature store, input schema, drift
+    sketches and model registry, so it is part of the cold start.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    body = json.dumps({'inputs': synthetic_rows(data_path, n_rows=1, seed=seed).to_dict(orient='records')}).encode()
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, 'tourist_safety_model.pkl'), 'wb') as f:
+            pickle.dump(model, f)
+        # The API reads ./data.csv for its feature store and input schema
+        shutil.copy(data_path, os.path.join(tmp, 'data.csv'))
+        env = dict(os.environ, PYTHONPATH=here + os.pathsep + os.environ.get('PYTHONPATH', ''))
+
+        def start():
+            subprocess.run([sys.executable, '-c', COLD_START_SCRIPT], input=body,
+                           cwd=tmp, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        return {'api_cold_start': measure(start, repeat=max(1, repeat // 2), warmup=0)}
+
+def _time_requests(send, repeat):
+    """Run send() repeat times, returning (bytes on the wire per call, CPU seconds per call)"""
+    send()  # warm-up
+    start = time.process_time()
+    for _ in range(repeat):
+        sent, received = send()
+    cpu = (time.process_time() - start) / repeat
+    return sent + received, cpu
+
+def bench_wire_format(model, rows, repeat=20):
+    """Compare bytes on the wire and client+server CPU time for each /batch_predict format"""
+    import api
+    api.model = model
+    client = api.app.test_client()
+    records = rows.to_dict(orient='records')
+    results = {}
+
+    def send_json():
+        body = json.dumps({'inputs': records})
+        response = client.post('/batch_predict', data=body, content_type='application/json')
+        [p['predicted_safety_score'] for p in json.loads(response.data)['predictions']]
+        return len(body), len(response.data)
+
+    results['json'] = _time_requests(send_json, repeat)
+
+    for dtype_name in ('float32', 'float64'):
+        def send_packed(dtype_name=dtype_name):
+            body = rows.to_numpy(dtype=api.BINARY_DTYPES[dtype_name]).tobytes()
+            response = client.post('/batch_predict', data=body, content_type=api.BINARY_CONTENT_TYPE,
+                                   headers={'X-Feature-Dtype': dtype_name})
+            np.frombuffer(response.data, dtype=api.BINARY_DTYPES[dtype_name])
+            return len(body), len(response.data)
+
+        results[f'packed_{dtype_name}'] = _time_requests(send_packed, repeat)
+
+    if msgpack is not None:
+        def send_msgpack():
+            body = msgpack.packb({'data': rows.to_numpy(dtype=np.float32).tobytes()})
+            response = client.post('/batch_predict', data=body, content_type='application/msgpack')
+            np.frombuffer(msgpack.unpackb(response.data)['data'], dtype=np.float32)
+            return len(body), len(response.data)
+
+        results['msgpack_float32'] = _time_requests(send_msgpack, repeat)
+
+    return {name: {'bytes': size, 'cpu_ms': cpu * 1000} for name, (size, cpu) in results.items()}
+
+def run_suite(train_rows=5000, batch_sizes=BATCH_SIZES, repeat=5, seed=42):
+    """Run every benchmark and return a JSON-serializable report"""
+    df = make_synthetic_data(train_rows, seed=seed)
+
+    print(f"Training benchmarks on {train_rows:,} synthetic rows...")
+    results = bench_training(df, repeat)
+
+    print("Training the model used for inference benchmarks...")
+    model = TouristSafetyPredictor()
+    with quiet():
+        model.load_and_prepare_data(df=df)
+        model.train_model()
+
+    print("Inference benchmarks...")
+    # A different seed from the training rows, so the API scores rows the model has not seen
+    results.update(bench_inference(model, batch_sizes, repeat, seed=seed + 1))
+    results.update(bench_persistence(model, repeat))
+    results.update(bench_cold_start(model, repeat, seed=seed + 1))
+
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'train_rows': train_rows,
+            'batch_sizes': list(batch_sizes),
+            'repeat': repeat,
+            'seed': seed,
+            'model_type': type(model.model).__name__
+        },
+        'results': results
+    }
+
+def bench_ensemble(data_path='./data.csv', batch_sizes=(1, 1000), repeat=200):
+    """Test R² against p99 predict latency for each candidate and the stacking ensemble"""
+    predictor = TouristSafetyPredictor()
+    with quiet():
+        predictor.load_and_prepare_data(data_path=data_path)
+        results = predictor.train_model(ensemble=True, keep_candidates='memory')
+
+    stack = results.model('Stacking Ensemble')
+    serial = pickle.loads(pickle.dumps(stack))
+    serial.n_threads = 1
+    models = {name: results.model(name) for name in stack.members}
+    models['Stacking Ensemble (threads)'] = stack
+    models['Stacking Ensemble (serial)'] = serial
+    models['Stacking Ensemble (compiled)'] = compile_model(stack)
+
+    # Members see the same scaled and selected matrix the predictor builds
+    X = predictor.transform_features(predictor.build_feature_matrix(synthetic_rows(data_path, max(batch_sizes))))
+    rows = {}
+    for name, model in models.items():
+        r2 = results['Stacking Ensemble' if name.startswith('Stacking') else name]['test_r2']
+        rows[name] = {'test_r2': float(r2)}
+        for n_rows in batch_sizes:
+            runs = repeat if n_rows < 1000 else max(20, repeat // 10)
+            rows[name][f'p99_ms[{n_rows}]'] = measure(lambda: model.predict(X[:n_rows]), repeat=runs)['p99_s'] * 1000
+    return rows
+
+def compare_with_baseline(report, baseline, threshold=0.25, min_delta=MIN_REGRESSION_SECONDS):
+    """Return (name, baseline seconds, current seconds, ratio, regressed) for every shared benchmark.
+
+    A benchmark regressed if its median is more than threshold slower relative to the
+    baseline and more than min_delta seconds slower in absolute terms.
+    """
+    rows = []
+    for name, result in report['results'].items():
+        if name not in baseline.get('results', {}):
+            continue
+        before = baseline['results'][name]['median_s']
+        after = result['median_s']
+        ratio = after / before if before > 0 else float('inf')
+        rows.append((name, before, after, ratio, ratio > 1 + threshold and after - before > min_delta))
+    return rows
+
+def print_report(report, comparison=None):
+    """Print benchmark results, with baseline ratios when available"""
+    print("\n" + "=" * 90)
+    print("PERFORMANCE BENCHMARKS")
+    print("=" * 90)
+    if comparison is None:
+        print(f"{'Benchmark':<40} {'Median':>12} {'Min':>12} {'p99':>12}")
+        print("-" * 90)
+        for name, result in report['results'].items():
+            print(f"{name:<40} {result['median_s'] * 1000:>10.2f}ms {result['min_s'] * 1000:>10.2f}ms "
+                  f"{result['p99_s'] * 1000:>10.2f}ms")
+    else:
+        print(f"{'Benchmark':<40} {'Baseline':>12} {'Current':>12} {'Ratio':>8}")
+        print("-" * 90)
+        for name, before, after, ratio, regressed in comparison:
+            flag = '  REGRESSION' if regressed else ''
+            print(f"{name:<40} {before * 1000:>10.2f}ms {after * 1000:>10.2f}ms {ratio:>7.2f}x{flag}")
+    print("=" * 90)
+
+def main():
+    parser = argparse.ArgumentParser(description='Tourist Safety Score performance benchmarks')
+    parser.add_argument('--output', default='bench_results.json', help='Where to write the results JSON')
+    parser.add_argument('--baseline', help='Baseline results JSON to compare against')
+    parser.add_argument('--save-baseline', help='Also write the results to this baseline file')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed slowdown before flagging (0.25 = 25%%)')
+    parser.add_argument('--min-delta-ms', type=float, default=MIN_REGRESSION_SECONDS * 1000,
+                        help='Ignore slowdowns smaller than this many milliseconds')
+    parser.add_argument('--train-rows', type=int, default=5000, help='Synthetic rows for training benchmarks')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per benchmark')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--quick', action='store_true', help='Skip the 100k-row batch')
+    parser.add_argument('--wire', action='store_true', help='Only run the JSON vs binary wire format comparison')
+    parser.add_argument('--ensemble', action='store_true', help='Only compare candidate and ensemble accuracy vs p99 latency')
+    args = parser.parse_args()
+
+    if args.ensemble:
+        rows = bench_ensemble(repeat=args.repeat * 40)
+        print("Accuracy vs latency (model.predict on the preprocessed matrix)")
+        print("=" * 90)
+        print(f"{'Model':<32} {'Test R²':>10} " + ' '.join(f'{key:>14}' for key in next(iter(rows.values())) if key != 'test_r2'))
+        for name, row in rows.items():
+            print(f"{name:<32} {row['test_r2']:>10.4f} " + ' '.join(f'{value:>12.3f}ms' for key, value in row.items()
+                                                                  if key != 'test_r2'))
+        return 0
+
+    if args.wire:
+        from model_utils import get_cached_model, train_and_save_model
+
+        model = get_cached_model() or train_and_save_model()
+        print("Wire format benchmark (/batch_predict)")
+        print("=" * 60)
+        for n_rows in (1, 100, 1000):
+            results = bench_wire_format(model, synthetic_rows(n_rows=n_rows), repeat=5 if n_rows >= 1000 else 20)
+            print(f"\n{n_rows} row(s):")
+            print(f"{'Format':<20} {'Bytes':>12} {'CPU ms':>12}")
+            for name, result in results.items():
+                print(f"{name:<20} {result['bytes']:>12,} {result['cpu_ms']:>12.2f}")
+        return 0
+
+    report = run_suite(
+        train_rows=args.train_rows,
+        batch_sizes=QUICK_BATCH_SIZES if args.quick else BATCH_SIZES,
+        repeat=args.repeat,
+        seed=args.seed
+    )
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.save_baseline}")
+
+    comparison = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            comparison = compare_with_baseline(report, json.load(f), args.threshold, args.min_delta_ms / 1000)
+
+    print_report(report, comparison)
+
+    if comparison and any(regressed for *_, regressed in comparison):
+        print(f"Performance regression: at least one benchmark is more than {args.threshold:.0%} "
+              f"and {args.min_delta_ms:g} ms slower than baseline")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""
+Input drift monitoring for the Tourist Safety Score API.
+
+Every validated request row is added to constant-memory sketches of each raw
+feature: counts over bins cut at the training deciles, plus a running count,
+mean and variance. Request threads write to one of a few shards picked by thread
+id, so concurrent requests rarely wait on the same lock. At most every
+DRIFT_REFRESH_SECONDS the shards are folded into a decaying aggregate and
+compared with the training data: population stability index (PSI), a
+Kolmogorov-Smirnov statistic over the same bins, and the mean shift in training
+standard deviations. The scores are published as metrics gauges.
+"""
+
+import threading
+import time
+import numpy as np
+import metrics
+
+DRIFT_BINS = 10
+DRIFT_SHARDS = 8
+DRIFT_REFRESH_SECONDS = 15.0
+# Live rows lose half their weight after this long, so the sketches follow recent traffic
+DRIFT_HALF_LIFE_SECONDS = 6 * 3600.0
+# Below this many (decayed) live rows no drift is reported
+DRIFT_MIN_ROWS = 200
+# Usual PSI reading: under 0.1 stable, 0.1-0.25 moderate shift, above 0.25 significant shift
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+# Keeps PSI finite when a bin is empty on one side
+PSI_EPSILON = 1e-4
+
+class FeatureSketch:
+    """Bin counts, row count, mean and sum of squared deviations of every feature"""
+
+    def __init__(self, n_features, n_bins):
+        self.counts = np.zeros((n_features, n_bins))
+        self.n = 0.0
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+        self.lock = threading.Lock()
+
+    def add(self, counts, n, mean, m2):
+        """Merge the statistics of a batch (Chan et al. parallel variance update)"""
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * (n / total)
+        self.m2 += m2 + delta ** 2 * (self.n * n / total)
+        self.counts += counts
+        self.n = total
+
+    def merge(self, other):
+        if other.n:
+            self.add(other.counts, other.n, other.mean, other.m2)
+
+    def scale(self, weight):
+        """Down-weight every row seen so far; the mean is unchanged"""
+        self.counts *= weight
+        self.n *= weight
+        self.m2 *= weight
+
+    def reset(self):
+        self.counts[:] = 0
+        self.n = 0.0
+        self.mean[:] = 0
+        self.m2[:] = 0
+
+class DriftMonitor:
+    def __init__(self, columns, training_matrix, bins=DRIFT_BINS, shards=DRIFT_SHARDS,
+                 refresh_seconds=DRIFT_REFRESH_SECONDS, half_life_seconds=DRIFT_HALF_LIFE_SECONDS,
+                 min_rows=DRIFT_MIN_ROWS):
+        training = np.asarray(training_matrix, dtype=np.float64)
+        self.columns = list(columns)
+        self.bins = bins
+        self.refresh_seconds = refresh_seconds
+        self.half_life_seconds = half_life_seconds
+        self.min_rows = min_rows
+
+        # (bins - 1, features) interior edges. Discrete features repeat edges, which leaves
+        # the bins between them empty in training and live data alike
+        self.edges = np.nanquantile(training, np.arange(1, bins) / bins, axis=0)
+        present = ~np.isnan(training)
+        counts = self._histogram(np.where(present, training, 0), weights=present)
+        self.reference = counts / np.maximum(counts.sum(axis=1, keepdims=True), 1)
+        self.training_mean = np.nanmean(training, axis=0)
+        self.training_std = np.nanstd(training, axis=0)
+
+        self._shards = [FeatureSketch(len(self.columns), bins) for _ in range(shards)]
+        self._aggregate = FeatureSketch(len(self.columns), bins)
+        self._lock = threading.Lock()
+        self._refreshed = time.monotonic()
+        self._report = None
+
+    def _histogram(self, values, weights=None):
+        """(features, bins) counts of a (rows, features) matrix"""
+        bin_index = np.zeros(values.shape, dtype=np.intp)
+        for edge in self.edges:
+            bin_index += values >= edge
+        bin_index += np.arange(values.shape[1]) * self.bins
+        counts = np.bincount(bin_index.ravel(), weights=None if weights is None else weights.ravel(),
+                             minlength=values.shape[1] * self.bins)
+        return counts.reshape(values.shape[1], self.bins)
+
+    def observe(self, values):
+        """Add validated (rows, features) inputs to this thread's shard"""
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return
+        counts = self._histogram(values)
+        mean = values.mean(axis=0)
+        m2 = ((values - mean) ** 2).sum(axis=0)
+        shard = self._shards[threading.get_ident() % len(self._shards)]
+        with shard.lock:
+            shard.add(counts, len(values), mean, m2)
+
+    def refresh(self, force=False):
+        """Fold the shards into the aggregate and recompute drift, at most every refresh_seconds"""
+        now = time.monotonic()
+        with self._lock:
+            if self._report is not None and not force and now - self._refreshed < self.refresh_seconds:
+                return self._report
+            self._aggregate.scale(0.5 ** ((now - self._refreshed) / self.half_life_seconds))
+            for shard in self._shards:
+                with shard.lock:
+                    self._aggregate.merge(shard)
+                    shard.reset()
+            self._refreshed = now
+            self._report = self._compare()
+        self._publish(self._report)
+        return self._report
+
+    def _compare(self):
+        live = self._aggregate
+        report = {
+            'rows': float(live.n),
+            'min_rows': self.min_rows,
+            'half_life_seconds': self.half_life_seconds,
+            'features': {}
+        }
+        if live.n < self.min_rows:
+            return report
+
+        live_share = live.counts / live.n
+        expected = np.maximum(self.reference, PSI_EPSILON)
+        actual = np.maximum(live_share, PSI_EPSILON)
+        psi = ((actual - expected) * np.log(actual / expected)).sum(axis=1)
+        ks = np.abs(np.cumsum(live_share - self.reference, axis=1)).max(axis=1)
+        live_std = np.sqrt(live.m2 / live.n)
+        mean_shift = (live.mean - self.training_mean) / np.where(self.training_std > 0, self.training_std, 1)
+
+        for j, name in enumerate(self.columns):
+            report['features'][name] = {
+                'psi': float(psi[j]),
+                'ks': float(ks[j]),
+                'mean_shift': float(mean_shift[j]),
+                'live': {'mean': float(live.mean[j]), 'std': float(live_std[j])},
+                'training': {'mean': float(self.training_mean[j]), 'std': float(self.training_std[j])},
+                'status': 'significant' if psi[j] > PSI_SIGNIFICANT else 'moderate' if psi[j] > PSI_MODERATE else 'stable'
+            }
+        report['drifted'] = [name for j, name in enumerate(self.columns) if psi[j] > PSI_SIGNIFICANT]
+        return report
+
+    def _publish(self, report):
+        metrics.DRIFT_ROWS.set(report['rows'])
+        for metric in (metrics.DRIFT_PSI, metrics.DRIFT_KS, metrics.DRIFT_MEAN_SHIFT):
+            metric.clear()
+        for name, feature in report['features'].items():
+            metrics.DRIFT_PSI.set(feature['psi'], feature=name)
+            metrics.DRIFT_KS.set(feature['ks'], feature=name)
+            metrics.DRIFT_MEAN_SHIFT.set(feature['mean_shift'], feature=name)
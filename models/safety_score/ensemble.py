@@ -0,0 +1,108 @@
+"""
+Stacking ensemble for TouristSafetyPredictor.
+
+Each candidate model's out-of-fold predictions (from the shared ValidationPlan
+folds) train a small meta-learner that blends the candidates. At serve time the
+members score the same scaled and selected batch in parallel threads, and the
+meta-learner combines their outputs.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import r2_score
+
+def _fit_and_predict(model, X, y, train, val):
+    return clone(model).fit(X[train], y[train]).predict(X[val])
+
+def out_of_fold_predictions(model, X, y, folds, n_jobs=None):
+    """Fit a fresh copy of model per fold and predict its validation rows.
+
+    Returns the out-of-fold predictions (NaN for rows no fold validates, e.g. the
+    first year of time splits) and each fold's R², as cross_val_score would.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    fold_predictions = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_and_predict)(model, X, y, train, val) for train, val in folds
+    )
+
+    predictions = np.full(len(y), np.nan)
+    scores = []
+    for (_, val), predicted in zip(folds, fold_predictions):
+        predictions[val] = predicted
+        scores.append(r2_score(y[val], predicted))
+    return predictions, np.array(scores)
+
+class StackingEnsemble:
+    def __init__(self, members, meta=None, n_threads=None):
+        # Fitted candidate models, in the column order the meta-learner sees
+        self.members = dict(members)
+        # Non-negative blend weights keep the ensemble an interpretable weighted average
+        self.meta = meta if meta is not None else LinearRegression(positive=True)
+        self.n_threads = n_threads or len(self.members)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Thread pools and locks are per process
+        state['_executor'] = None
+        state.pop('_executor_lock', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._executor_lock = threading.Lock()
+
+    def fit_meta(self, oof_predictions, y):
+        """Train the meta-learner on a (rows, members) matrix of out-of-fold predictions"""
+        oof_predictions = np.asarray(oof_predictions, dtype=np.float64)
+        usable = np.isfinite(oof_predictions).all(axis=1)
+        self.meta.fit(oof_predictions[usable], np.asarray(y, dtype=np.float64)[usable])
+        return self
+
+    def cross_validate_meta(self, oof_predictions, y, folds):
+        """R² per fold of a meta-learner fitted on the other folds' out-of-fold rows"""
+        y = np.asarray(y, dtype=np.float64)
+        usable = np.isfinite(oof_predictions).all(axis=1)
+        scores = []
+        for k, (_, val) in enumerate(folds):
+            others = np.concatenate([v for j, (_, v) in enumerate(folds) if j != k])
+            others = others[usable[others]]
+            meta = clone(self.meta).fit(oof_predictions[others], y[others])
+            scores.append(r2_score(y[val], meta.predict(oof_predictions[val])))
+        return np.array(scores)
+
+    @property
+    def weights(self):
+        """Blend weight of each member"""
+        return dict(zip(self.members, np.ravel(self.meta.coef_).tolist()))
+
+    @property
+    def feature_importances_(self):
+        """Members' normalized importances (|coef| for linear models), combined by blend weight"""
+        combined = 0.0
+        for weight, model in zip(np.ravel(self.meta.coef_), self.members.values()):
+            importance = getattr(model, 'feature_importances_', None)
+            if importance is None:
+                importance = np.abs(np.ravel(model.coef_))
+            combined = combined + weight * importance / max(importance.sum(), 1e-12)
+        return combined / max(np.sum(combined), 1e-12)
+
+    def member_predictions(self, X):
+        """(rows, members) predictions, with the members running in parallel threads"""
+        models = list(self.members.values())
+        if self.n_threads > 1 and len(models) > 1:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.n_threads, thread_name_prefix='stacking')
+            columns = list(self._executor.map(lambda model: model.predict(X), models))
+        else:
+            columns = [model.predict(X) for model in models]
+        return np.column_stack(columns)
+
+    def predict(self, X):
+        return self.meta.predict(self.member_predictions(X))
@@ -0,0 +1,141 @@
+"""
+Per-prediction feature contributions for the Tourist Safety Score model.
+
+- Linear models: exact coefficient x scaled-value terms.
+- Random Forest / Gradient Boosting: tree-path (Saabas) attribution. Every leaf's
+  contribution vector is precomputed once, so explaining a batch is a leaf lookup
+  (`model.apply`) followed by one sparse matrix product.
+- Stacking ensembles: the members' contributions combined by the linear meta-learner's weights.
+
+For every row, base_value + sum(contributions) equals the unclipped model output.
+"""
+
+import numpy as np
+from scipy import sparse
+
+class ContributionExplainer:
+    def __init__(self, predictor, model=None):
+        self.predictor = predictor
+        self.feature_names = predictor.get_selected_feature_names()
+        self.n_features = len(self.feature_names)
+
+        self.model = model = model if model is not None else predictor.model
+        if hasattr(model, 'members'):
+            self.kind = 'stacking'
+            self.weights = np.ravel(model.meta.coef_)
+            self.intercept = float(model.meta.intercept_)
+            self.member_explainers = [ContributionExplainer(predictor, member) for member in model.members.values()]
+        elif hasattr(model, 'coef_'):
+            self.kind = 'linear'
+            self.coef = np.ravel(model.coef_)
+            self.intercept = float(model.intercept_)
+        elif hasattr(model, 'estimators_') or hasattr(model, 'flat'):
+            self.kind = 'tree'
+            self._build_leaf_table(model)
+        else:
+            raise ValueError(f"Contributions are not supported for {type(model).__name__}")
+
+    def _tree_ensemble(self, model):
+        """Return (left, right, feature, value) arrays per tree, the weight of each tree and the constant base value"""
+        if hasattr(model, 'flat'):
+            # Flat node arrays (shared models): leaves point back to themselves
+            flat = model.flat
+            ends = np.append(flat.roots[1:], len(flat.feature))
+            trees = []
+            for start, end in zip(flat.roots.astype(np.int64), ends):
+                nodes = np.arange(end - start)
+                left = flat.left[start:end] - start
+                right = flat.right[start:end] - start
+                leaf = left == nodes
+                trees.append((np.where(leaf, -1, left), np.where(leaf, -1, right),
+                              flat.feature[start:end].astype(np.int64), flat.value[start:end].astype(np.float64)))
+            return trees, flat.scale, flat.base
+
+        trees = [(tree.tree_.children_left, tree.tree_.children_right, tree.tree_.feature,
+                  tree.tree_.value.reshape(tree.tree_.node_count, -1)[:, 0]) for tree in np.ravel(model.estimators_)]
+        if hasattr(model, 'learning_rate'):
+            # Gradient boosting: init prediction + learning_rate * sum of trees
+            base = float(np.ravel(model.init_.predict(np.zeros((1, self.n_features))))[0])
+            return trees, model.learning_rate, base
+        # Forest: average of trees
+        return trees, 1.0 / len(trees), 0.0
+
+    def _build_leaf_table(self, model):
+        """Precompute the weighted contribution vector and base value of every leaf"""
+        trees, weight, base = self._tree_ensemble(model)
+
+        offsets = np.zeros(len(trees) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(left) for left, _, _, _ in trees])
+        self.node_offsets = offsets[:-1]
+
+        leaf_rows = np.full(offsets[-1], -1, dtype=np.int64)
+        tables = []
+        n_leaves = 0
+
+        for t, (left, right, feature, value) in enumerate(trees):
+            node_count = len(left)
+
+            # Walk the tree level by level: a child's vector is its parent's plus the value change
+            contrib = np.zeros((node_count, self.n_features))
+            frontier = np.array([0])
+            while len(frontier):
+                frontier = frontier[left[frontier] != -1]
+                for children in (left[frontier], right[frontier]):
+                    contrib[children] = contrib[frontier]
+                    contrib[children, feature[frontier]] += value[children] - value[frontier]
+                frontier = np.concatenate([left[frontier], right[frontier]])
+
+            leaves = np.flatnonzero(left == -1)
+            leaf_rows[offsets[t] + leaves] = np.arange(n_leaves, n_leaves + len(leaves))
+            n_leaves += len(leaves)
+            tables.append(contrib[leaves] * weight)
+            base += weight * value[0]
+
+        self.leaf_rows = leaf_rows
+        self.leaf_table = np.vstack(tables)
+        self.base_value = base
+
+    def explain_selected(self, X_selected):
+        """Return (base values, contributions) for an already scaled and selected batch"""
+        X_selected = np.asarray(X_selected, dtype=np.float64)
+        n = X_selected.shape[0]
+
+        if self.kind == 'linear':
+            return np.full(n, self.intercept), X_selected * self.coef
+
+        if self.kind == 'stacking':
+            base = np.full(n, self.intercept)
+            contributions = np.zeros((n, self.n_features))
+            for weight, member in zip(self.weights, self.member_explainers):
+                member_base, member_contributions = member.explain_selected(X_selected)
+                base += weight * member_base
+                contributions += weight * member_contributions
+            return base, contributions
+
+        # Gradient boosting returns leaf ids as floats
+        leaves = self.model.apply(X_selected).reshape(n, -1).astype(np.int64)
+        rows = self.leaf_rows[leaves + self.node_offsets]
+        n_trees = rows.shape[1]
+        indicator = sparse.csr_matrix(
+            (np.ones(rows.size), rows.ravel(), np.arange(0, rows.size + 1, n_trees)),
+            shape=(n, self.leaf_table.shape[0])
+        )
+        return np.full(n, self.base_value), indicator @ self.leaf_table
+
+    def explain(self, input_data):
+        """Return (base values, contributions) for raw input (dict or DataFrame)"""
+        X = self.predictor.build_feature_matrix(input_data)
+        return self.explain_selected(self.predictor.transform_features(X))
+
+    def format(self, base_value, contributions, top=None):
+        """Turn one row of contributions into a JSON-friendly breakdown, largest effect first"""
+        order = np.argsort(-np.abs(contributions))
+        if top is not None:
+            order = order[:top]
+        return {
+            'base_value': float(base_value),
+            'contributions': [
+                {'feature': self.feature_names[i], 'contribution': float(contributions[i])}
+                for i in order
+            ]
+        }
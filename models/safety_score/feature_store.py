@@ -0,0 +1,163 @@
+"""
+Pincode-keyed feature store for the Tourist Safety Score model.
+Holds the raw features from data.csv in a single in-memory array indexed by
+(pincode, year), so callers can score an area by sending only its pincode.
+"""
+
+import numpy as np
+import pandas as pd
+from train import RAW_FEATURE_COLUMNS
+
+class FeatureStore:
+    def __init__(self, data_path='./data.csv', df=None):
+        if df is None:
+            df = pd.read_csv(data_path)
+
+        df = df.sort_values(['pincode', 'year']).reset_index(drop=True)
+
+        # Fill missing values the same way training does
+        features = df[RAW_FEATURE_COLUMNS]
+        features = features.fillna(features.median())
+
+        self.feature_names = list(RAW_FEATURE_COLUMNS)
+        self.column_index = {name: i for i, name in enumerate(self.feature_names)}
+        self.matrix = np.ascontiguousarray(features.to_numpy(dtype=np.float64))
+        self.pincodes = df['pincode'].to_numpy(dtype=np.int64)
+        self.years = df['year'].to_numpy(dtype=np.int64)
+        self.states = df['state'].to_numpy(dtype=object)
+        self.area_types = df['area_type'].to_numpy(dtype=object)
+        self.localities = df['locality_name'].to_numpy(dtype=object)
+
+        self._row_index = {(p, y): i for i, (p, y) in enumerate(zip(self.pincodes.tolist(), self.years.tolist()))}
+
+        # Rows are sorted by year within each pincode, so the last one wins
+        self._latest_index = {p: i for i, p in enumerate(self.pincodes.tolist())}
+        self.latest_rows = np.fromiter(self._latest_index.values(), dtype=np.int64)
+
+    def __len__(self):
+        return len(self._latest_index)
+
+    def __contains__(self, pincode):
+        return self._normalize_pincode(pincode) in self._latest_index
+
+    @staticmethod
+    def _normalize_pincode(pincode):
+        try:
+            return int(pincode)
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _normalize_year(year):
+        if isinstance(year, bool):
+            raise ValueError(f"Invalid year: {year!r}")
+        try:
+            return int(year)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid year: {year!r}") from None
+
+    @staticmethod
+    def _override_value(name, value):
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            raise ValueError(f"Override for {name} must be a number, got {value!r}")
+        try:
+            return float(value)
+        except ValueError:
+            raise ValueError(f"Override for {name} must be a number, got {value!r}") from None
+
+    def request_errors(self, pincode, year=None, overrides=None):
+        """Problems with one pincode request, as InputSchema-style [{'field', 'error', ...}] (empty if none)"""
+        errors = []
+        if isinstance(pincode, bool) or self._normalize_pincode(pincode) is None:
+            errors.append({'field': 'pincode', 'error': 'not an integer', 'value': repr(pincode)})
+        if year is not None:
+            try:
+                self._normalize_year(year)
+            except ValueError:
+                errors.append({'field': 'year', 'error': 'not an integer', 'value': repr(year)})
+        if overrides is not None and not isinstance(overrides, dict):
+            errors.append({'field': 'overrides', 'error': 'not a JSON object', 'value': repr(overrides)})
+        elif overrides:
+            for name, value in overrides.items():
+                if name not in self.column_index:
+                    errors.append({'field': name, 'error': 'unknown feature'})
+                    continue
+                try:
+                    self._override_value(name, value)
+                except ValueError:
+                    errors.append({'field': name, 'error': 'not a number', 'value': repr(value)})
+        return errors
+
+    def lookup(self, pincode, year=None):
+        """Return the row index for a pincode, preferring the exact year and falling back to the latest"""
+        pincode = self._normalize_pincode(pincode)
+        if year is not None:
+            row = self._row_index.get((pincode, self._normalize_year(year)))
+            if row is not None:
+                return row
+        return self._latest_index.get(pincode)
+
+    def get_features(self, pincode, year=None, overrides=None):
+        """Return the raw feature dict for a pincode, or None if it is unknown"""
+        matrix, found = self.get_batch([pincode], [year], [overrides])
+        if not found[0]:
+            return None
+        return dict(zip(self.feature_names, matrix[0].tolist()))
+
+    def get_batch(self, pincodes, years=None, overrides=None):
+        """Gather a (rows, features) matrix for many pincodes in one pass.
+
+        When a requested year has no stored row, the latest row is used with its
+        `year` feature set to the requested year. Returns the matrix and a boolean
+        mask of which pincodes were found (rows for unknown pincodes are NaN).
+        Raises KeyError for an unknown override name and ValueError for a year or
+        override value that is not a number.
+        """
+        n = len(pincodes)
+        years = years if years is not None else [None] * n
+
+        rows = np.fromiter((-1 if (row := self.lookup(p, y)) is None else row
+                            for p, y in zip(pincodes, years)), dtype=np.int64, count=n)
+        found = rows >= 0
+
+        matrix = np.full((n, len(self.feature_names)), np.nan)
+        matrix[found] = self.matrix[rows[found]]
+
+        year_col = self.column_index['year']
+        for i, year in enumerate(years):
+            if year is not None and found[i]:
+                matrix[i, year_col] = float(self._normalize_year(year))
+
+        if overrides is not None:
+            for i, row_overrides in enumerate(overrides):
+                if not row_overrides or not found[i]:
+                    continue
+                for name, value in row_overrides.items():
+                    if name not in self.column_index:
+                        raise KeyError(f"Unknown feature in overrides: {name}")
+                    matrix[i, self.column_index[name]] = self._override_value(name, value)
+
+        return matrix, found
+
+    def regions(self, pincodes, years=None):
+        """State and area type of each pincode's stored row (None for unknown pincodes)"""
+        n = len(pincodes)
+        years = years if years is not None else [None] * n
+        rows = [self.lookup(p, y) for p, y in zip(pincodes, years)]
+        states = np.array([None if row is None else self.states[row] for row in rows], dtype=object)
+        area_types = np.array([None if row is None else self.area_types[row] for row in rows], dtype=object)
+        return states, area_types
+
+    def to_frame(self, matrix):
+        """Wrap a feature matrix in a DataFrame the predictor accepts"""
+        return pd.DataFrame(matrix, columns=self.feature_names)
+
+    def metadata(self, row):
+        """Return the descriptive columns for a stored row"""
+        return {
+            'pincode': int(self.pincodes[row]),
+            'year': int(self.years[row]),
+            'state': self.states[row],
+            'area_type': self.area_types[row],
+            'locality_name': self.localities[row]
+        }
@@ -0,0 +1,142 @@
+"""
+Tree ensembles compiled to flat node arrays for fast batch inference.
+
+Every tree of a fitted RandomForestRegressor or GradientBoostingRegressor is
+copied into one set of contiguous arrays (feature, threshold, left, right,
+value). Prediction walks all trees for the whole batch at once, one tree level
+per NumPy step, so there is no per-tree Python loop and no sklearn call overhead.
+
+compile_model wraps a fitted model so small batches take the flat path.
+"""
+
+import copy
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+
+# Leaves loop back to themselves and always go "left", so extra levels are no-ops
+LEAF_THRESHOLD = np.inf
+
+# Gathers cost more per row than sklearn's compiled traversal, so the flat path wins on
+# small batches (no per-call overhead) and sklearn takes over on large ones
+COMPILED_MAX_ROWS = 256
+
+def is_tree_ensemble(model):
+    return isinstance(model, (RandomForestRegressor, GradientBoostingRegressor))
+
+class FlatTreeEnsemble:
+    def __init__(self, model):
+        if not is_tree_ensemble(model):
+            raise ValueError(f"Cannot compile {type(model).__name__}; expected a random forest or gradient boosting model")
+
+        trees = [estimator.tree_ for estimator in np.ravel(model.estimators_)]
+        counts = np.array([tree.node_count for tree in trees])
+        offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+        self.n_features = model.n_features_in_
+        self.roots = offsets.astype(np.int32)
+        self.max_depth = max(tree.max_depth for tree in trees)
+
+        features, thresholds, lefts, rights, values = [], [], [], [], []
+        for tree, offset in zip(trees, offsets):
+            nodes = np.arange(tree.node_count) + offset
+            leaf = tree.children_left == -1
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(np.where(leaf, LEAF_THRESHOLD, tree.threshold))
+            lefts.append(np.where(leaf, nodes, tree.children_left + offset))
+            rights.append(np.where(leaf, nodes, tree.children_right + offset))
+            values.append(tree.value.reshape(tree.node_count, -1)[:, 0])
+
+        self.feature = np.concatenate(features).astype(np.int32)
+        self.threshold = np.concatenate(thresholds)
+        # Children interleaved as [left, right] per node, so one gather picks the branch taken
+        self.children = np.column_stack([np.concatenate(lefts), np.concatenate(rights)]).astype(np.int32).ravel()
+        self.value = np.concatenate(values)
+
+        if isinstance(model, GradientBoostingRegressor):
+            # init prediction + learning_rate * sum of trees
+            self.base = float(np.ravel(model.init_.predict(np.zeros((1, self.n_features))))[0])
+            self.scale = float(model.learning_rate)
+        else:
+            # Forest: mean of trees
+            self.base = 0.0
+            self.scale = 1.0 / len(trees)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def left(self):
+        return self.children[0::2]
+
+    @property
+    def right(self):
+        return self.children[1::2]
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.roots, self.feature, self.threshold, self.children, self.value))
+
+    def apply(self, X):
+        """Global leaf index reached in every tree, as an (n_rows, n_trees) array"""
+        # sklearn compares float32 inputs against float64 thresholds; doing the same keeps splits identical
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n, n_features = X.shape
+        flat_X = X.ravel()
+        row_offsets = (np.arange(n, dtype=np.int64) * n_features)[:, None]
+
+        # One step per tree level, for every row and every tree at once
+        nodes = np.broadcast_to(self.roots, (n, self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            go_right = flat_X[row_offsets + self.feature[nodes]] > self.threshold[nodes]
+            nodes = self.children[2 * nodes + go_right]
+        return nodes
+
+    def predict(self, X):
+        return self.base + self.scale * self.value[self.apply(X)].sum(axis=1)
+
+    def validate(self, model, X, rtol=1e-9, atol=1e-9):
+        """Check leaves and predictions against the sklearn model; raise ValueError on any mismatch"""
+        leaves = self.apply(X)
+        expected_leaves = np.asarray(model.apply(X)).reshape(len(leaves), -1).astype(np.int64) + self.roots
+        if not np.array_equal(leaves, expected_leaves):
+            raise ValueError("Compiled trees reach different leaves than the sklearn model")
+
+        predicted, expected = self.predict(X), model.predict(X)
+        difference = np.abs(predicted - expected)
+        if not np.allclose(predicted, expected, rtol=rtol, atol=atol):
+            raise ValueError(f"Compiled trees differ from the sklearn model by up to {difference.max():.3g}")
+        return float(difference.max())
+
+class CompiledTreeModel:
+    def __init__(self, model, max_rows=COMPILED_MAX_ROWS):
+        self.model = model
+        self.flat = FlatTreeEnsemble(model)
+        self.max_rows = max_rows
+
+    def predict(self, X):
+        if len(X) <= self.max_rows:
+            return self.flat.predict(X)
+        return self.model.predict(X)
+
+def compile_model(model, X_check=None):
+    """Serving version of a fitted model with flat tree arrays, or None if it has no trees.
+
+    Stacking ensembles get their tree members compiled. With X_check, every compiled
+    tree ensemble is validated against sklearn on that matrix first.
+    """
+    if is_tree_ensemble(model):
+        compiled = CompiledTreeModel(model)
+        if X_check is not None:
+            compiled.flat.validate(model, X_check)
+        return compiled
+
+    if hasattr(model, 'members'):
+        members = {name: compile_model(member, X_check) for name, member in model.members.items()}
+        if all(member is None for member in members.values()):
+            return None
+        compiled = copy.copy(model)
+        compiled.members = {name: members[name] or member for name, member in model.members.items()}
+        return compiled
+
+    return None
@@ -0,0 +1,152 @@
+"""
+Next-year safety score forecasting for the Tourist Safety Score service.
+
+Builds per-pincode lag and trend features with vectorized groupby-shift
+operations, trains a model on "this year's features -> next year's score", and
+writes one forecast per pincode into a lookup table (forecasts.csv) that the
+API serves without any online computation.
+"""
+
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.metrics import r2_score, mean_absolute_error
+from train import RAW_FEATURE_COLUMNS, risk_band_labels
+
+TARGET_COLUMN = 'composite_safety_score'
+FORECAST_PATH = './forecasts.csv'
+
+# Columns whose history is carried as lags; deltas are taken for every raw feature
+LAG_COLUMNS = [TARGET_COLUMN, 'crime_rate_per_100k', 'total_crimes', 'crimes_against_tourists',
+               'road_accidents', 'emergency_response_time_minutes']
+LAGS = (1, 2)
+
+def build_temporal_features(df):
+    """Lag, delta and trend features per pincode, plus the next-year target.
+
+    Returns the frame sorted by pincode and year, the feature frame, and the target
+    (NaN on each pincode's latest year).
+    """
+    df = df.sort_values(['pincode', 'year']).reset_index(drop=True)
+    numeric = [c for c in RAW_FEATURE_COLUMNS if c != 'year'] + [TARGET_COLUMN]
+    df[numeric] = df[numeric].fillna(df[numeric].median())
+
+    groups = df.groupby('pincode', sort=False)
+    parts = [df[RAW_FEATURE_COLUMNS + [TARGET_COLUMN]]]
+
+    # One shift per lag for all lagged columns at once
+    for lag in LAGS:
+        parts.append(groups[LAG_COLUMNS].shift(lag).add_suffix(f'_lag{lag}'))
+
+    raw = [c for c in RAW_FEATURE_COLUMNS if c != 'year']
+    parts.append((df[raw] - groups[raw].shift(1)).add_suffix('_delta1'))
+
+    # Least-squares slope of the score over the last three years (x = -1, 0, 1)
+    score_lag2 = groups[TARGET_COLUMN].shift(2)
+    trend = ((df[TARGET_COLUMN] - score_lag2) / 2).rename('score_trend3')
+    history = groups.cumcount().rename('years_of_history')
+    parts.extend([trend, history])
+
+    features = pd.concat(parts, axis=1)
+    target = groups[TARGET_COLUMN].shift(-1)
+    return df, features, target
+
+class ScoreForecaster:
+    def __init__(self, model=None):
+        # Lags before a pincode's first year are NaN, which histogram boosting handles natively
+        self.model = model or HistGradientBoostingRegressor(random_state=42)
+        self.feature_names = None
+        self.validation = None
+
+    def validate(self, df, holdout_years=1):
+        """Forward-chaining check: train on earlier years, score the last target years.
+
+        Compared against the naive forecast that next year's score equals this year's.
+        """
+        _, features, target = build_temporal_features(df)
+        has_target = target.notna()
+        last_year = features.loc[has_target, 'year'].max()
+        train = has_target & (features['year'] <= last_year - holdout_years)
+        test = has_target & (features['year'] > last_year - holdout_years)
+
+        self.model.fit(features[train], target[train])
+        predicted = self.model.predict(features[test])
+        persistence = features.loc[test, TARGET_COLUMN]
+
+        self.validation = {
+            'train_rows': int(train.sum()),
+            'test_rows': int(test.sum()),
+            'test_r2': float(r2_score(target[test], predicted)),
+            'test_mae': float(mean_absolute_error(target[test], predicted)),
+            'persistence_r2': float(r2_score(target[test], persistence)),
+            'persistence_mae': float(mean_absolute_error(target[test], persistence))
+        }
+        return self.validation
+
+    def fit(self, df):
+        """Train on every pincode-year that has a following year"""
+        _, features, target = build_temporal_features(df)
+        has_target = target.notna()
+        self.feature_names = list(features.columns)
+        self.model.fit(features[has_target], target[has_target])
+        return self
+
+    def forecast(self, df):
+        """Forecast the year after each pincode's latest row, for all pincodes in one batch"""
+        frame, features, _ = build_temporal_features(df)
+        latest = frame.groupby('pincode', sort=False).tail(1).index
+        predicted = np.clip(self.model.predict(features.loc[latest, self.feature_names]), 0, 100)
+
+        current = frame.loc[latest, TARGET_COLUMN].to_numpy()
+        table = pd.DataFrame({
+            'pincode': frame.loc[latest, 'pincode'].to_numpy(),
+            'state': frame.loc[latest, 'state'].to_numpy(),
+            'area_type': frame.loc[latest, 'area_type'].to_numpy(),
+            'base_year': frame.loc[latest, 'year'].to_numpy(),
+            'forecast_year': frame.loc[latest, 'year'].to_numpy() + 1,
+            'current_score': current,
+            'forecast_score': predicted,
+            'change': predicted - current,
+            'current_risk_level': risk_band_labels(current),
+            'forecast_risk_level': risk_band_labels(predicted)
+        })
+        return table
+
+def build_forecast_table(data_path='./data.csv', output_path=FORECAST_PATH):
+    """Validate, fit and write the next-year forecast lookup table; returns the table and holdout metrics.
+
+    The table is written under a temporary name and renamed into place, so readers
+    never see a partial file.
+    """
+    df = pd.read_csv(data_path)
+    forecaster = ScoreForecaster()
+
+    validation = forecaster.validate(df)
+    table = forecaster.fit(df).forecast(df)
+
+    temporary_path = f'{output_path}.{os.getpid()}.tmp'
+    table.to_csv(temporary_path, index=False)
+    os.replace(temporary_path, output_path)
+    return table, validation
+
+def load_forecast_table(path=FORECAST_PATH):
+    """Forecast records keyed by pincode, or None if the table has not been built"""
+    if not os.path.exists(path):
+        return None
+    table = pd.read_csv(path)
+    return dict(zip(table['pincode'].tolist(), table.to_dict('records')))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Forecast next-year safety scores per pincode')
+    parser.add_argument('--data', default='./data.csv', help='Training data with several years per pincode')
+    parser.add_argument('--output', default=FORECAST_PATH, help='Where to write the forecast lookup table')
+    args = parser.parse_args()
+
+    table, validation = build_forecast_table(args.data, args.output)
+    print(f"📈 Forecast holdout ({validation['test_rows']} pincodes): "
+          f"R² {validation['test_r2']:.4f}, MAE {validation['test_mae']:.3f}")
+    print(f"   Persistence baseline: R² {validation['persistence_r2']:.4f}, "
+          f"MAE {validation['persistence_mae']:.3f}")
+    print(f"📁 {len(table)} forecasts for {table['forecast_year'].iloc[0]} saved to: {args.output}")
@@ -0,0 +1,104 @@
+"""
+Spatial index over pincode coordinates for the Tourist Safety Score service.
+Pincode centroids come from the frontend's coordinates file and are paired with
+model scores, so nearest-pincode lookups are a single KD-tree query.
+"""
+
+import hashlib
+import os
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+COORDINATES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'frontend', 'public',
+                                'pincode_coordinates_with_safety_scores.csv')
+
+EARTH_RADIUS_KM = 6371.0088
+
+def check_coordinates(latitudes, longitudes):
+    """Raise ValueError unless every latitude is in [-90, 90] and every longitude in [-180, 180]"""
+    for name, values, limit in (('latitude', latitudes, 90.0), ('longitude', longitudes, 180.0)):
+        values = np.asarray(values, dtype=np.float64)
+        # NaN fails the comparison too, so this catches missing, infinite and out-of-range values
+        bad = np.flatnonzero(~(np.abs(values) <= limit))
+        if len(bad):
+            raise ValueError(f"Point {int(bad[0])} has {name} {values[bad[0]]}; "
+                             f"expected a finite number between -{limit:g} and {limit:g}")
+
+def to_unit_vectors(latitudes, longitudes):
+    """Convert degrees to 3-D unit vectors, so Euclidean KD-tree distances follow the sphere"""
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
+
+def chord_to_km(chord):
+    """Great-circle distance in km for a chord length on the unit sphere"""
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord) / 2, 0, 1))
+
+def km_to_chord(km):
+    """Chord length on the unit sphere for a great-circle distance in km"""
+    return 2 * np.sin(np.asarray(km) / (2 * EARTH_RADIUS_KM))
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Vectorized great-circle distance in km"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+def load_pincode_coordinates(path=COORDINATES_PATH):
+    """Load pincode centroids (pincode, latitude, longitude, safety_score)"""
+    coords = pd.read_csv(path)
+    coords['pincode'] = coords['pincode'].astype(np.int64)
+    return coords.drop_duplicates('pincode').reset_index(drop=True)
+
+class PincodeIndex:
+    def __init__(self, pincodes, latitudes, longitudes, scores):
+        self.pincodes = np.asarray(pincodes, dtype=np.int64)
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        self.scores = np.asarray(scores, dtype=np.float64)
+        self.tree = cKDTree(to_unit_vectors(self.latitudes, self.longitudes))
+        self.bounds = (self.longitudes.min(), self.latitudes.min(), self.longitudes.max(), self.latitudes.max())
+
+        # Content hash of everything served from the index, for cache keys and ETags
+        digest = hashlib.sha256()
+        for array in (self.pincodes, self.latitudes, self.longitudes, self.scores):
+            digest.update(array.tobytes())
+        self.version = digest.hexdigest()[:12]
+
+    @classmethod
+    def from_model(cls, predictor, store, path=COORDINATES_PATH, registry=None):
+        """Pair each pincode's coordinates with the model's score for its latest stored row.
+
+        With a ModelRegistry, each pincode is scored by the model its state/area_type routes to.
+        Pincodes missing from the feature store keep the score in the coordinates file.
+        """
+        coords = load_pincode_coordinates(path)
+        scores = coords['safety_score'].to_numpy(dtype=np.float64).copy()
+
+        pincodes = coords['pincode'].tolist()
+        matrix, found = store.get_batch(pincodes)
+        if found.any():
+            frame = store.to_frame(matrix[found])
+            if registry is None:
+                found_scores = predictor.predict_safety_score(frame)
+            else:
+                names = registry.route(*store.regions([p for p, ok in zip(pincodes, found) if ok]))
+                found_scores, _ = registry.predict(frame, names=names)
+            scores[found] = np.clip(found_scores, 0, 100)
+
+        return cls(coords['pincode'], coords['latitude'], coords['longitude'], scores)
+
+    def __len__(self):
+        return len(self.pincodes)
+
+    def nearest(self, latitudes, longitudes, k=1, max_distance_km=None):
+        """Distances (km) and positions of the k nearest pincodes for every point.
+
+        With max_distance_km, neighbours further away come back as inf with position len(self).
+        """
+        upper_bound = np.inf if max_distance_km is None else km_to_chord(max_distance_km)
+        chords, positions = self.tree.query(to_unit_vectors(latitudes, longitudes), k=k,
+                                            distance_upper_bound=upper_bound)
+        return np.where(np.isinf(chords), np.inf, chord_to_km(chords)), positions
@@ -0,0 +1,168 @@
+"""
+Model-derived geofence risk zones for the Tourist Safety Score service.
+
+Low-scoring pincodes within linking distance of each other are grouped into
+clusters, and each cluster becomes a convex polygon around its pincodes. Zones
+are versioned by content hash and come with a grid index, so bulk
+point-in-zone checks are mostly a single array lookup.
+"""
+
+import hashlib
+import json
+import os
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import ConvexHull, cKDTree
+from geo import km_to_chord, EARTH_RADIUS_KM
+from train import risk_band_labels
+
+DEFAULT_THRESHOLD = 50.0
+DEFAULT_LINK_KM = 5.0
+DEFAULT_BUFFER_KM = 1.0
+
+# Grid cells are either outside every zone, inside exactly one, or need the exact test
+CELL_OUTSIDE = -1
+CELL_AMBIGUOUS = -2
+DEFAULT_CELL_DEGREES = 0.01
+
+# Points drawn around each pincode so single pincodes and straight lines still give polygons
+BUFFER_VERTICES = 8
+
+def cluster_points(index, positions, link_km):
+    """Connected components of pincodes linked by chains of neighbours within link_km"""
+    points = index.tree.data[positions]
+    if len(points) == 0:
+        return np.empty(0, dtype=np.int64)
+    pairs = cKDTree(points).query_pairs(km_to_chord(link_km), output_type='ndarray')
+    graph = coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(len(points), len(points)))
+    _, labels = connected_components(graph, directed=False)
+    return labels
+
+def buffered_hull(latitudes, longitudes, buffer_km):
+    """Convex hull, as [[lat, lon], ...] counter-clockwise, of the points each widened by buffer_km"""
+    angles = np.linspace(0, 2 * np.pi, BUFFER_VERTICES, endpoint=False)
+    dlat = np.degrees(buffer_km / EARTH_RADIUS_KM) * np.sin(angles)
+    dlon = np.degrees(buffer_km / EARTH_RADIUS_KM) * np.cos(angles) / np.cos(np.radians(latitudes))[:, None]
+    xy = np.column_stack([(longitudes[:, None] + dlon).ravel(), (latitudes[:, None] + dlat).ravel()])
+    # 2-D hull vertices come back counter-clockwise in (lon, lat)
+    hull = xy[ConvexHull(xy).vertices]
+    return hull[:, ::-1]
+
+def build_risk_zones(index, threshold=DEFAULT_THRESHOLD, link_km=DEFAULT_LINK_KM, buffer_km=DEFAULT_BUFFER_KM):
+    """Cluster pincodes scoring below threshold into convex risk zones"""
+    risky = np.flatnonzero(index.scores < threshold)
+    labels = cluster_points(index, risky, link_km)
+
+    clusters = []
+    for label in np.unique(labels):
+        members = risky[labels == label]
+        scores = index.scores[members]
+        clusters.append((scores.min(), sorted(int(p) for p in index.pincodes[members]), members, scores))
+
+    # Worst zones first, so ids are stable for the same scores
+    clusters.sort(key=lambda cluster: (cluster[0], cluster[1][0]))
+
+    zones = []
+    for zone_id, (min_score, pincodes, members, scores) in enumerate(clusters):
+        polygon = buffered_hull(index.latitudes[members], index.longitudes[members], buffer_km)
+        zones.append({
+            'id': zone_id,
+            'name': f'Risk zone {zone_id + 1}',
+            'type': 'danger_zone',
+            'description': f'{len(members)} pincodes scoring below {threshold:g}',
+            'coordinates': np.round(polygon, 6).tolist(),
+            'pincodes': pincodes,
+            'min_score': float(min_score),
+            'mean_score': float(scores.mean()),
+            'risk_level': str(risk_band_labels([scores.mean()])[0])
+        })
+
+    return RiskZones(zones, {'threshold': threshold, 'link_km': link_km, 'buffer_km': buffer_km})
+
+class RiskZones:
+    def __init__(self, zones, params, cell_degrees=DEFAULT_CELL_DEGREES):
+        self.zones = zones
+        self.params = dict(params)
+        self.version = hashlib.sha256(json.dumps({'zones': zones, 'params': self.params},
+                                                 sort_keys=True).encode()).hexdigest()[:12]
+
+        # Edges as (start, direction) in (lon, lat) for the half-plane test
+        self._polygons = [np.asarray(zone['coordinates'], dtype=np.float64)[:, ::-1] for zone in zones]
+        self._edges = [(polygon, np.roll(polygon, -1, axis=0) - polygon) for polygon in self._polygons]
+        self._boxes = np.array([np.concatenate([p.min(axis=0), p.max(axis=0)]) for p in self._polygons]).reshape(-1, 4)
+
+        self.cell_degrees = cell_degrees
+        self._build_grid()
+
+    def __len__(self):
+        return len(self.zones)
+
+    def _inside(self, zone_id, lons, lats):
+        """Exact test: a point is inside a counter-clockwise convex polygon if it is left of every edge"""
+        starts, directions = self._edges[zone_id]
+        dx = lons[:, None] - starts[:, 0]
+        dy = lats[:, None] - starts[:, 1]
+        return np.all(directions[:, 0] * dy - directions[:, 1] * dx >= 0, axis=1)
+
+    def _build_grid(self):
+        """Mark grid cells that lie fully inside exactly one zone, or touch none"""
+        if not self.zones:
+            self._origin = np.zeros(2)
+            self._grid = np.full((1, 1), CELL_OUTSIDE, dtype=np.int32)
+            return
+
+        cell = self.cell_degrees
+        self._origin = self._boxes[:, :2].min(axis=0)
+        shape = np.ceil((self._boxes[:, 2:].max(axis=0) - self._origin) / cell).astype(int) + 1
+        self._grid = np.full(shape, CELL_OUTSIDE, dtype=np.int32)
+
+        for zone_id, box in enumerate(self._boxes):
+            lo = np.floor((box[:2] - self._origin) / cell).astype(int)
+            hi = np.floor((box[2:] - self._origin) / cell).astype(int) + 1
+            cx, cy = np.meshgrid(np.arange(lo[0], hi[0]), np.arange(lo[1], hi[1]), indexing='ij')
+            cells = np.column_stack([cx.ravel(), cy.ravel()])
+
+            # A cell is inside a convex polygon when all four corners are
+            corners = self._origin + (cells[:, None, :] + np.array([[0, 0], [1, 0], [0, 1], [1, 1]])) * cell
+            full = self._inside(zone_id, corners[..., 0].ravel(), corners[..., 1].ravel()).reshape(-1, 4).all(axis=1)
+
+            current = self._grid[cells[:, 0], cells[:, 1]]
+            self._grid[cells[:, 0], cells[:, 1]] = np.where(full & (current == CELL_OUTSIDE), zone_id, CELL_AMBIGUOUS)
+
+    def locate(self, latitudes, longitudes):
+        """Zone id for every point, or -1 outside all zones"""
+        lats = np.asarray(latitudes, dtype=np.float64)
+        lons = np.asarray(longitudes, dtype=np.float64)
+        cells = np.floor((np.column_stack([lons, lats]) - self._origin) / self.cell_degrees).astype(int)
+        on_grid = np.all((cells >= 0) & (cells < self._grid.shape), axis=1)
+
+        result = np.full(len(lats), CELL_OUTSIDE, dtype=np.int32)
+        result[on_grid] = self._grid[cells[on_grid, 0], cells[on_grid, 1]]
+
+        # Only points near a zone edge (or in overlapping zones) need the exact polygon test
+        ambiguous = np.flatnonzero(result == CELL_AMBIGUOUS)
+        result[ambiguous] = CELL_OUTSIDE
+        for zone_id, box in enumerate(self._boxes):
+            pending = ambiguous[result[ambiguous] == CELL_OUTSIDE]
+            if len(pending) == 0:
+                break
+            in_box = pending[(lons[pending] >= box[0]) & (lats[pending] >= box[1]) &
+                             (lons[pending] <= box[2]) & (lats[pending] <= box[3])]
+            if len(in_box):
+                result[in_box[self._inside(zone_id, lons[in_box], lats[in_box])]] = zone_id
+
+        return result
+
+    def to_dict(self):
+        """Versioned zones, each in the backend Geofence shape plus its pincodes and scores"""
+        return {'version': self.version, 'params': self.params, 'zones': self.zones}
+
+    def save(self, directory):
+        """Write the zones to <directory>/<version>.json; earlier versions are kept"""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{self.version}.json')
+        if not os.path.exists(path):
+            with open(path, 'w') as f:
+                json.dump(self.to_dict(), f)
+        return path
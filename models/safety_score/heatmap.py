@@ -0,0 +1,184 @@
+"""
+Continuous safety surface for the police heatmap.
+
+Interpolates pincode scores with inverse distance weighting (IDW) over the k nearest
+pincodes from the KD-tree in geo.py, fully vectorized per tile or grid. Serves the
+surface as slippy-map PNG tiles (z/x/y, Web Mercator) or compact uint8 grids,
+cached on disk per surface version.
+"""
+
+import hashlib
+import io
+import os
+import numpy as np
+from matplotlib import colormaps
+from matplotlib.image import imsave
+
+TILE_SIZE = 256
+CACHE_DIR = './heatmap_cache'
+
+# Grids get large quickly; tiles go deeper because they are rendered on demand
+MAX_GRID_ZOOM = 8
+MAX_TILE_ZOOM = 16
+
+# uint8 grid encoding: scores are rounded to whole points, 255 means no data
+GRID_NODATA = 255
+
+# Colour scale: red (least safe) to green (safest)
+COLORMAP = 'RdYlGn'
+SCORE_MIN = 30.0
+SCORE_MAX = 95.0
+ALPHA = 180
+
+def tile_pixel_centers(z, x, y, size=TILE_SIZE):
+    """Latitude/longitude of every pixel centre of a Web Mercator tile, as (size, size) arrays"""
+    n = 2 ** z
+    offsets = (np.arange(size) + 0.5) / size
+    lon = (x + offsets) / n * 360.0 - 180.0
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + offsets) / n))))
+    return np.meshgrid(lat, lon, indexing='ij')
+
+def tile_bounds(z, x, y):
+    """(west, south, east, north) of a tile in degrees"""
+    n = 2 ** z
+    west, east = x / n * 360.0 - 180.0, (x + 1) / n * 360.0 - 180.0
+    north = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * y / n))))
+    south = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + 1) / n))))
+    return west, south, east, north
+
+def lonlat_to_tile(lon, lat, z):
+    """Tile coordinates containing a point"""
+    n = 2 ** z
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1 - np.arcsinh(np.tan(np.radians(lat))) / np.pi) / 2 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+class SafetySurface:
+    def __init__(self, index, k=8, power=2.0, max_distance_km=25.0, cache_dir=CACHE_DIR):
+        self.index = index
+        self.k = min(k, len(index))
+        self.power = power
+        self.max_distance_km = max_distance_km
+
+        # Cache entries are keyed by everything that changes the rendered surface
+        digest = hashlib.sha256()
+        for array in (index.pincodes, index.latitudes, index.longitudes, index.scores):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        digest.update(repr((self.k, power, max_distance_km)).encode())
+        self.version = digest.hexdigest()[:12]
+        self.cache_dir = os.path.join(cache_dir, self.version)
+
+        # Pad the data bounds so tiles just outside still fade out correctly
+        pad = max_distance_km / 111.0
+        west, south, east, north = index.bounds
+        self.bounds = (west - pad, south - pad, east + pad, north + pad)
+
+        self._empty_tile = None
+
+    def interpolate(self, latitudes, longitudes):
+        """IDW score at each point; NaN where the nearest pincode is beyond max_distance_km"""
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        shape = latitudes.shape
+        # The distance bound lets the KD-tree give up early on pixels far from any pincode
+        distances, positions = self.index.nearest(latitudes.ravel(), np.ravel(longitudes), k=self.k,
+                                                  max_distance_km=self.max_distance_km)
+        distances = distances.reshape(len(distances), -1)
+        positions = positions.reshape(len(positions), -1)
+
+        # Missing neighbours (inf distance) get zero weight; their position is out of range
+        weights = 1.0 / np.maximum(distances, 1e-6) ** self.power
+        neighbour_scores = np.append(self.index.scores, np.nan)[positions]
+        with np.errstate(invalid='ignore'):
+            scores = (weights * np.nan_to_num(neighbour_scores)).sum(axis=1) / weights.sum(axis=1)
+        scores[np.isinf(distances[:, 0])] = np.nan
+        return scores.reshape(shape)
+
+    def _intersects(self, west, south, east, north):
+        b_west, b_south, b_east, b_north = self.bounds
+        return west <= b_east and east >= b_west and south <= b_north and north >= b_south
+
+    def _encode_png(self, scores):
+        """Colour a score array and encode it as an RGBA PNG"""
+        normalized = np.clip((np.nan_to_num(scores, nan=SCORE_MIN) - SCORE_MIN) / (SCORE_MAX - SCORE_MIN), 0, 1)
+        rgba = colormaps[COLORMAP](normalized, bytes=True)
+        rgba[..., 3] = np.where(np.isnan(scores), 0, ALPHA)
+        buffer = io.BytesIO()
+        imsave(buffer, rgba, format='png')
+        return buffer.getvalue()
+
+    def empty_tile(self):
+        """A fully transparent tile, shared by every tile outside the data bounds"""
+        if self._empty_tile is None:
+            self._empty_tile = self._encode_png(np.full((TILE_SIZE, TILE_SIZE), np.nan))
+        return self._empty_tile
+
+    def render_tile(self, z, x, y):
+        """PNG bytes of one slippy-map tile, from the disk cache when available"""
+        if not (0 <= z <= MAX_TILE_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+            raise ValueError(f"Invalid tile {z}/{x}/{y}")
+
+        if not self._intersects(*tile_bounds(z, x, y)):
+            return self.empty_tile()
+
+        path = os.path.join(self.cache_dir, 'tiles', str(z), str(x), f'{y}.png')
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                return f.read()
+
+        latitudes, longitudes = tile_pixel_centers(z, x, y)
+        png = self._encode_png(self.interpolate(latitudes, longitudes))
+        self._write_cache(path, png)
+        return png
+
+    def grid(self, zoom):
+        """Surface over the data bounds as a uint8 grid (north row first), cached on disk"""
+        if not 0 <= zoom <= MAX_GRID_ZOOM:
+            raise ValueError(f"Grid zoom must be between 0 and {MAX_GRID_ZOOM}")
+
+        cell = 360.0 / (TILE_SIZE * 2 ** zoom)
+        west, south, east, north = self.bounds
+        path = os.path.join(self.cache_dir, 'grids', f'{zoom}.npy')
+
+        if os.path.exists(path):
+            values = np.load(path)
+        else:
+            longitudes = west + (np.arange(max(1, int(np.ceil((east - west) / cell)))) + 0.5) * cell
+            latitudes = north - (np.arange(max(1, int(np.ceil((north - south) / cell)))) + 0.5) * cell
+            lat_grid, lon_grid = np.meshgrid(latitudes, longitudes, indexing='ij')
+            scores = self.interpolate(lat_grid, lon_grid)
+            values = np.where(np.isnan(scores), GRID_NODATA, np.clip(np.round(scores), 0, 100)).astype(np.uint8)
+            buffer = io.BytesIO()
+            np.save(buffer, values)
+            self._write_cache(path, buffer.getvalue())
+
+        return {
+            'zoom': zoom,
+            'bounds': [west, south, east, north],
+            'cell_degrees': cell,
+            'shape': list(values.shape),
+            'nodata': GRID_NODATA,
+            'values': values
+        }
+
+    def precompute(self, min_zoom=5, max_zoom=10):
+        """Render and cache every tile covering the data, and the grids up to MAX_GRID_ZOOM"""
+        west, south, east, north = self.bounds
+        rendered = 0
+        for z in range(min_zoom, max_zoom + 1):
+            x_min, y_min = lonlat_to_tile(west, north, z)
+            x_max, y_max = lonlat_to_tile(east, south, z)
+            for x in range(x_min, x_max + 1):
+                for y in range(y_min, y_max + 1):
+                    self.render_tile(z, x, y)
+                    rendered += 1
+            if z <= MAX_GRID_ZOOM:
+                self.grid(z)
+        return rendered
+
+    def _write_cache(self, path, data):
+        """Write a cache file atomically so concurrent workers never read a partial file"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as f:
+            f.write(data)
+        os.replace(temporary, path)
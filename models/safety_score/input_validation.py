@@ -0,0 +1,143 @@
+"""
+Vectorized request validation for the Tourist Safety Score API.
+
+An InputSchema is compiled once from the raw feature columns and the training
+data into two arrays of per-column bounds. A whole batch becomes one float matrix
+and is type-, missing- and range-checked with a handful of array comparisons;
+Python only runs for the failing cells, to describe them. Rows that fail are
+rejected before any feature engineering or model work.
+"""
+
+import datetime
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+# Accepted values extend this many training spans beyond the training min and max
+INPUT_RANGE_MARGIN = 1.0
+
+# Columns with a natural bound that the training span must not widen
+PERCENT_SUFFIX = '_percent'
+PERCENT_MAX = 100.0
+YEAR_COLUMN = 'year'
+# Requests may score up to this many years past the current one
+MAX_YEARS_AHEAD = 10
+
+class InvalidInputError(ValueError):
+    """Rows rejected by an InputSchema; errors maps each row's key to its problems"""
+
+    def __init__(self, errors):
+        super().__init__('Invalid input')
+        self.errors = errors
+
+class InputSchema:
+    def __init__(self, columns, training_matrix, margin=INPUT_RANGE_MARGIN, current_year=None):
+        self.columns = list(columns)
+        self.margin = margin
+        self.minimum = np.nanmin(training_matrix, axis=0)
+        self.maximum = np.nanmax(training_matrix, axis=0)
+        span = self.maximum - self.minimum
+        self.lower = self.minimum - margin * span
+        self.upper = self.maximum + margin * span
+        # Counts, rates and percentages are never negative in training, so keep them that way
+        self.lower = np.where(self.minimum >= 0, np.maximum(self.lower, 0), self.lower)
+
+        # Percentages stop at 100, or at the training maximum where the data itself goes beyond it
+        for j, name in enumerate(self.columns):
+            if name.endswith(PERCENT_SUFFIX):
+                self.upper[j] = max(PERCENT_MAX, self.maximum[j])
+        # Future years are valid requests however narrow the training years are
+        if YEAR_COLUMN in self.columns:
+            current_year = current_year if current_year is not None else datetime.date.today().year
+            j = self.columns.index(YEAR_COLUMN)
+            self.upper[j] = max(self.maximum[j], current_year + MAX_YEARS_AHEAD)
+
+    def to_matrix(self, frame):
+        """(rows, columns) float matrix of the schema columns and a mask of cells that are not numbers"""
+        frame = frame.reindex(columns=self.columns)
+        # Column-major, so each column is written contiguously
+        values = np.empty(frame.shape, order='F')
+        not_numeric = np.zeros(frame.shape, dtype=bool)
+        for j, name in enumerate(self.columns):
+            column = frame[name]
+            if is_numeric_dtype(column) and not is_bool_dtype(column):
+                values[:, j] = column.to_numpy(dtype=np.float64, na_value=np.nan)
+                continue
+            # Strings, booleans and other JSON types only show up here, in mixed or bad columns
+            is_number = np.fromiter((isinstance(v, (int, float)) and not isinstance(v, bool) for v in column),
+                                    dtype=bool, count=len(column))
+            not_numeric[:, j] = ~is_number & column.notna().to_numpy()
+            values[:, j] = np.where(is_number, pd.to_numeric(column.where(is_number), errors='coerce'), np.nan)
+        return values, not_numeric
+
+    def validate(self, inputs):
+        """Check a batch (list of dicts or DataFrame) in one pass.
+
+        Returns the inputs as a DataFrame, their (rows, columns) float matrix, a boolean
+        mask of valid rows and {row index: [{'field', 'error', ...}, ...]} for the invalid ones.
+        """
+        errors = {}
+        if isinstance(inputs, pd.DataFrame):
+            frame = inputs
+        else:
+            for i, row in enumerate(inputs):
+                if not isinstance(row, dict):
+                    errors[i] = [{'field': None, 'error': 'input must be a JSON object'}]
+            frame = pd.DataFrame([{} if i in errors else row for i, row in enumerate(inputs)])
+
+        values, not_numeric = self.to_matrix(frame)
+        return frame, values, *self._check(values, not_numeric, errors, frame)
+
+    def validate_matrix(self, values):
+        """Check an already numeric (rows, columns) matrix, e.g. a binary payload"""
+        values = np.asarray(values, dtype=np.float64)
+        return self._check(values, np.zeros(values.shape, dtype=bool), {})
+
+    def _check(self, values, not_numeric, errors, frame=None):
+        # NaN and +-inf fail both comparisons, so this one pass finds every bad cell
+        in_range = (values >= self.lower) & (values <= self.upper)
+        invalid_rows = np.flatnonzero(~in_range.all(axis=1) | not_numeric.any(axis=1))
+
+        # Describe the failing rows only
+        bad_values = values[invalid_rows]
+        bad_not_numeric = not_numeric[invalid_rows]
+        missing = np.isnan(bad_values) & ~bad_not_numeric
+        not_finite = np.isinf(bad_values)
+        below = bad_values < self.lower
+
+        for k, j in zip(*np.nonzero(~in_range[invalid_rows] | bad_not_numeric)):
+            i = int(invalid_rows[k])
+            if i in errors and errors[i][0]['field'] is None:
+                continue
+            field = self.columns[j]
+            if bad_not_numeric[k, j]:
+                value = frame.iat[i, frame.columns.get_loc(field)] if frame is not None else None
+                error = {'field': field, 'error': 'not a number', 'value': repr(value)}
+            elif missing[k, j]:
+                error = {'field': field, 'error': 'missing'}
+            elif not_finite[k, j]:
+                error = {'field': field, 'error': 'not finite'}
+            else:
+                error = {
+                    'field': field,
+                    'error': 'below minimum' if below[k, j] else 'above maximum',
+                    'value': float(bad_values[k, j]),
+                    'allowed': [float(self.lower[j]), float(self.upper[j])]
+                }
+            errors.setdefault(i, []).append(error)
+
+        valid = np.ones(len(values), dtype=bool)
+        valid[invalid_rows] = False
+        if errors:
+            valid[list(errors)] = False
+        return valid, errors
+
+    def describe(self):
+        """Accepted range and training range of every column"""
+        return {
+            name: {
+                'allowed': [float(low), float(high)],
+                'training': [float(minimum), float(maximum)]
+            }
+            for name, low, high, minimum, maximum in zip(self.columns, self.lower, self.upper, self.minimum, self.maximum)
+        }
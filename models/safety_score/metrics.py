@@ -0,0 +1,206 @@
+"""
+Lightweight Prometheus-style metrics for the Tourist Safety Score API.
+Counters and fixed-bucket histograms cost one bisect and a few additions per
+observation, so they can stay enabled in production.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Rows per request
+BATCH_SIZE_BUCKETS = (1, 10, 100, 1000, 10000, 100000)
+
+# Absolute score differences between two models, in score points
+SCORE_DIFF_BUCKETS = (0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 50.0)
+
+def _format_labels(label_names, label_values, extra=None):
+    pairs = list(zip(label_names, label_values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.append(f'{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}')
+        return lines
+
+class Gauge(Counter):
+    def set(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.label_names)
+        with self._lock:
+            self._values[key] = value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        lines = super().render()
+        lines[1] = f'# TYPE {self.name} gauge'
+        return lines
+
+class Histogram:
+    def __init__(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (last is +Inf), sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.label_names)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def observe_many(self, values, **labels):
+        """Observe every value of a sequence under one lock acquisition"""
+        key = tuple(labels.get(name, '') for name in self.label_names)
+        indexes = [bisect.bisect_left(self.buckets, value) for value in values]
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            for index in indexes:
+                series[0][index] += 1
+            series[1] += sum(values)
+            series[2] += len(indexes)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = [(key, (list(series[0]), series[1], series[2])) for key, series in self._series.items()]
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else _format_value(float(bound))
+                lines.append(f'{self.name}_bucket{_format_labels(self.label_names, key, ("le", le))} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(self.label_names, key)} {count}')
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, label_names=()):
+        return self.register(Counter(name, help_text, label_names))
+
+    def gauge(self, name, help_text, label_names=()):
+        return self.register(Gauge(name, help_text, label_names))
+
+    def histogram(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help_text, label_names, buckets))
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+class StageTimer:
+    """Times named pipeline stages into a histogram labelled by stage"""
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histogram.observe(time.perf_counter() - start, stage=name)
+
+# Metrics exported by the API
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.histogram(
+    'safety_api_request_duration_seconds', 'Request latency by endpoint',
+    ('endpoint', 'method')
+)
+REQUESTS = registry.counter(
+    'safety_api_requests_total', 'Requests by endpoint and status code',
+    ('endpoint', 'method', 'status')
+)
+ERRORS = registry.counter(
+    'safety_api_errors_total', 'Requests that returned a 4xx or 5xx status',
+    ('endpoint', 'status')
+)
+BATCH_SIZE = registry.histogram(
+    'safety_api_batch_rows', 'Rows scored per request', ('endpoint',), buckets=BATCH_SIZE_BUCKETS
+)
+ROWS_SCORED = registry.counter(
+    'safety_api_rows_scored_total', 'Rows scored by the model', ('endpoint', 'model_version')
+)
+STAGE_LATENCY = registry.histogram(
+    'safety_model_stage_duration_seconds', 'Time spent in each prediction pipeline stage', ('stage',)
+)
+MODEL_INFO = registry.gauge(
+    'safety_model_info', 'Currently loaded model', ('model_version', 'model_type')
+)
+SHADOW_REQUESTS = registry.counter(
+    'safety_shadow_requests_total', 'Requests sampled for the candidate model, by outcome',
+    ('outcome', 'candidate_version')
+)
+SHADOW_SCORE_DIFF = registry.histogram(
+    'safety_shadow_score_difference', 'Absolute candidate minus primary score per row',
+    ('candidate_version',), buckets=SCORE_DIFF_BUCKETS
+)
+SHADOW_LATENCY = registry.histogram(
+    'safety_shadow_model_duration_seconds', 'Scoring time of shadowed requests by model', ('model',)
+)
+DRIFT_ROWS = registry.gauge(
+    'safety_drift_live_rows', 'Decayed count of live input rows in the drift sketches'
+)
+DRIFT_PSI = registry.gauge(
+    'safety_feature_drift_psi', 'Population stability index of live inputs against training, per feature', ('feature',)
+)
+DRIFT_KS = registry.gauge(
+    'safety_feature_drift_ks', 'Largest CDF gap between live inputs and training over the drift bins', ('feature',)
+)
+DRIFT_MEAN_SHIFT = registry.gauge(
+    'safety_feature_mean_shift', 'Live mean minus training mean, in training standard deviations', ('feature',)
+)
+
+pipeline_timer = StageTimer(STAGE_LATENCY)
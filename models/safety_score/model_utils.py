@@ -1,48 +1,263 @@
 import pickle
+import hashlib
+import json
 import os
+import threading
+import logging
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
 from train import TouristSafetyPredictor
 
+logger = logging.getLogger(__name__)
+
+# Number of model artifacts kept resident by get_cached_model (e.g. A/B versions)
+MODEL_CACHE_SIZE = 4
+
+# Named model artifacts and the state/area_type routes to them (see ModelRegistry)
+REGISTRY_PATH = 'model_registry.json'
+DEFAULT_MODEL_NAME = 'default'
+REGIONAL_MODEL_DIR = 'regional_models'
+
+# Process-wide cache: absolute path -> (mtime, predictor), kept in LRU order
+_model_cache = OrderedDict()
+_model_cache_lock = threading.Lock()
+# One lock per path, so a cold load only blocks callers waiting for that same file
+_model_load_locks = {}
+
 def save_model(predictor, model_path='tourist_safety_model.pkl'):
     """Save the trained model to disk"""
     try:
         with open(model_path, 'wb') as f:
             pickle.dump(predictor, f)
-        print(f"Model saved successfully to {model_path}")
-    except Exception as e:
-        print(f"Error saving model: {e}")
+        logger.info("Model saved", extra={'model_path': model_path})
+    except Exception:
+        logger.exception("Error saving model", extra={'model_path': model_path})
 
 def load_model(model_path='tourist_safety_model.pkl'):
     """Load a trained model from disk"""
     try:
         if not os.path.exists(model_path):
-            print(f"Model file {model_path} not found!")
+            logger.error("Model file not found", extra={'model_path': model_path})
             return None
         
         with open(model_path, 'rb') as f:
             predictor = pickle.load(f)
-        print(f"Model loaded successfully from {model_path}")
+        logger.info("Model loaded", extra={'model_path': model_path})
         return predictor
-    except Exception as e:
-        print(f"Error loading model: {e}")
+    except Exception:
+        logger.exception("Error loading model", extra={'model_path': model_path})
         return None
 
-def train_and_save_model(data_path='./data.csv', model_path='tourist_safety_model.pkl'):
+def get_cached_model(model_path='tourist_safety_model.pkl'):
+    """Return a loaded model, reading from disk only when the file is new or changed"""
+    key = os.path.abspath(model_path)
+    try:
+        mtime = os.path.getmtime(key)
+    except OSError:
+        logger.error("Model file not found", extra={'model_path': model_path})
+        return None
+    
+    with _model_cache_lock:
+        cached = _model_cache.get(key)
+        if cached is not None and cached[0] == mtime:
+            _model_cache.move_to_end(key)
+            return cached[1]
+        load_lock = _model_load_locks.setdefault(key, threading.Lock())
+    
+    # Concurrent callers for the same file wait here and then find it cached; other models stay served
+    with load_lock:
+        with _model_cache_lock:
+            cached = _model_cache.get(key)
+            if cached is not None and cached[0] == mtime:
+                _model_cache.move_to_end(key)
+                return cached[1]
+        
+        predictor = load_model(key)
+        if predictor is None:
+            return None
+        
+        with _model_cache_lock:
+            _model_cache[key] = (mtime, predictor)
+            _model_cache.move_to_end(key)
+            while len(_model_cache) > MODEL_CACHE_SIZE:
+                _model_cache.popitem(last=False)
+        
+        return predictor
+
+def clear_model_cache(model_path=None):
+    """Drop one cached model, or all of them if no path is given"""
+    with _model_cache_lock:
+        if model_path is None:
+            _model_cache.clear()
+        else:
+            _model_cache.pop(os.path.abspath(model_path), None)
+
+def get_model_version(model_path='tourist_safety_model.pkl'):
+    """Short content hash identifying a saved model artifact"""
+    digest = hashlib.sha256()
+    with open(model_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+def train_and_save_model(data_path='./data.csv', model_path='tourist_safety_model.pkl', ensemble=False):
     """Train a new model and save it"""
     print("Training new model...")
     predictor = TouristSafetyPredictor()
     
-    # Load and train
+    # Load and train; per-model test predictions are kept next to the model file
     predictor.load_and_prepare_data(data_path=data_path)
-    results = predictor.train_model()
+    results = predictor.train_model(results_dir=f'{model_path}.results', ensemble=ensemble)
     
     # Save the model
     save_model(predictor, model_path)
+    predictor.release_training_data()
+    
+    return predictor
+
+def train_regional_model(name, data_path='./data.csv', states=(), area_types=(),
+                         registry_path=REGISTRY_PATH, model_dir=REGIONAL_MODEL_DIR, ensemble=False):
+    """Train a model on the rows of some states and/or area types and register it under name"""
+    df = pd.read_csv(data_path)
+    rows = df['state'].isin(states) | df['area_type'].isin(area_types)
+    if not rows.any():
+        raise ValueError(f"No rows in {data_path} for states {list(states)} or area types {list(area_types)}")
+    
+    print(f"Training regional model '{name}' on {int(rows.sum())} rows...")
+    predictor = TouristSafetyPredictor()
+    predictor.load_and_prepare_data(df=df[rows].reset_index(drop=True))
+    os.makedirs(model_dir, exist_ok=True)
+    model_path = os.path.join(model_dir, f'{name}.pkl')
+    predictor.train_model(results_dir=f'{model_path}.results', ensemble=ensemble)
+    save_model(predictor, model_path)
+    predictor.release_training_data()
     
+    registry = ModelRegistry(registry_path)
+    registry.register(name, model_path, version=get_model_version(model_path), states=states, area_types=area_types)
+    registry.save()
     return predictor
 
+class ModelRegistry:
+    """Named, versioned model artifacts, loaded on first use and routed by state or area_type.
+
+    The manifest (JSON) looks like:
+        {"models": {"northeast-hills": {"path": "regional_models/northeast-hills.pkl", "version": "3f2a..."}},
+         "routes": {"state": {"Sikkim": "northeast-hills"}, "area_type": {"Hill Station": "northeast-hills"}}}
+    Rows matching no route go to the default model. A state route wins over an area_type route.
+    Loaded models share get_cached_model's LRU cache, so rarely used regions are evicted.
+    """
+    
+    ROUTE_COLUMNS = ('state', 'area_type')
+    
+    def __init__(self, manifest_path=REGISTRY_PATH, default_path='tourist_safety_model.pkl', default_model=None,
+                 default_version=None):
+        self.manifest_path = manifest_path
+        self.models = {DEFAULT_MODEL_NAME: {'path': default_path}}
+        if default_version is not None:
+            self.models[DEFAULT_MODEL_NAME]['version'] = default_version
+        self.routes = {column: {} for column in self.ROUTE_COLUMNS}
+        # Predictors already held by the caller (e.g. the API's main model) are used as is, never reloaded
+        self._pinned = {DEFAULT_MODEL_NAME: default_model} if default_model is not None else {}
+        self._versions = {}
+        
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            self.models.update(manifest.get('models', {}))
+            for column in self.ROUTE_COLUMNS:
+                self.routes[column].update(manifest.get('routes', {}).get(column, {}))
+    
+    def register(self, name, model_path, version=None, states=(), area_types=()):
+        """Add or replace a named model and route the given states and area types to it"""
+        entry = {'path': model_path}
+        if version is not None:
+            entry['version'] = version
+        self.models[name] = entry
+        self._pinned.pop(name, None)
+        for state in states:
+            self.routes['state'][state] = name
+        for area_type in area_types:
+            self.routes['area_type'][area_type] = name
+    
+    def save(self):
+        """Write the manifest atomically, so a running API never reads half of it; the default model stays implicit"""
+        manifest = {
+            'models': {name: entry for name, entry in self.models.items() if name != DEFAULT_MODEL_NAME},
+            'routes': self.routes
+        }
+        temporary_path = f'{self.manifest_path}.{os.getpid()}.tmp'
+        with open(temporary_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temporary_path, self.manifest_path)
+    
+    def get(self, name):
+        """Loaded predictor for a registered name, or None if its artifact cannot be loaded"""
+        if name in self._pinned:
+            return self._pinned[name]
+        if name not in self.models:
+            raise KeyError(f"Unknown model: {name}")
+        return get_cached_model(self.models[name]['path'])
+    
+    def version(self, name):
+        """Version recorded in the manifest, or the artifact's content hash"""
+        entry = self.models[name]
+        if 'version' in entry:
+            return entry['version']
+        path = entry['path']
+        mtime = os.path.getmtime(path)
+        cached = self._versions.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = self._versions[path] = (mtime, get_model_version(path))
+        return cached[1]
+    
+    def route(self, states=None, area_types=None, n=None):
+        """Model name for every row, from per-row state and area_type values (None where unknown)"""
+        n = n if n is not None else len(states if states is not None else area_types)
+        names = np.full(n, DEFAULT_MODEL_NAME, dtype=object)
+        # area_type first so state routes override it
+        for column, values in (('area_type', area_types), ('state', states)):
+            if values is None or not self.routes[column]:
+                continue
+            routed = pd.Series(np.asarray(values, dtype=object)).map(self.routes[column]).to_numpy()
+            matched = pd.notna(routed)
+            names[matched] = routed[matched]
+        return names
+    
+    def predict(self, frame, names=None, timer=None):
+        """Scores for a DataFrame, with one vectorized call per routed model.
+
+        Rows are routed by their state and area_type columns unless names is given.
+        Returns the scores and the model name used for each row.
+        """
+        if names is None:
+            names = self.route(frame.get('state'), frame.get('area_type'), len(frame))
+        
+        scores = np.empty(len(frame))
+        for name in pd.unique(names):
+            rows = np.flatnonzero(names == name)
+            predictor = self.get(name)
+            if predictor is None:
+                raise ValueError(f"Model '{name}' could not be loaded")
+            group = frame if len(rows) == len(frame) else frame.iloc[rows]
+            scores[rows] = predictor.predict_safety_score(group, timer=timer)
+        return scores, names
+    
+    def describe(self):
+        """Registered models with their versions and whether they are in memory"""
+        models = {}
+        for name, entry in self.models.items():
+            try:
+                version = self.version(name)
+            except OSError:
+                version = None
+            loaded = name in self._pinned or (os.path.abspath(entry['path']) in _model_cache)
+            models[name] = {'path': entry['path'], 'version': version, 'loaded': loaded}
+        return {'models': models, 'routes': self.routes, 'default': DEFAULT_MODEL_NAME}
+
 def predict_with_saved_model(input_data, model_path='tourist_safety_model.pkl'):
     """Make predictions using a saved model"""
-    predictor = load_model(model_path)
+    predictor = get_cached_model(model_path)
     if predictor is None:
         return None
     
@@ -0,0 +1,120 @@
+"""
+Optional float32 inference for TouristSafetyPredictor.
+
+Selects the k model features before scaling them, hands the model float32 input,
+and converts the model to float32 weights, or to flat trees with float32
+thresholds and leaf values and small integer feature ids. Halves the bytes moved
+per prediction. Always checked against float64 on data.csv before use.
+
+Standardization itself stays in float64: sklearn trees split on float32(scaled x),
+so rounding the scaled value any other way flips near-threshold splits.
+"""
+
+import copy
+import numpy as np
+import pandas as pd
+from contextlib import nullcontext
+from sklearn.linear_model import LinearRegression
+from flat_trees import CompiledTreeModel, is_tree_ensemble
+
+# Largest allowed difference from float64 scores, in score points (0-100 scale)
+FLOAT32_TOLERANCE = 0.05
+
+def compact_flat_trees(flat):
+    """Copy of a FlatTreeEnsemble with float32 thresholds and values and the smallest feature dtype"""
+    compact = copy.copy(flat)
+    threshold = flat.threshold
+    threshold32 = threshold.astype(np.float32)
+    # x <= threshold must hold for exactly the same float32 x, so round down, never up
+    rounded_up = threshold32.astype(np.float64) > threshold
+    threshold32[rounded_up] = np.nextafter(threshold32[rounded_up], np.float32(-np.inf))
+    compact.threshold = threshold32
+    compact.value = flat.value.astype(np.float32)
+    compact.feature = flat.feature.astype(np.min_scalar_type(max(flat.n_features - 1, 0)))
+    return compact
+
+class Float32Linear:
+    def __init__(self, model):
+        self.coef = np.ravel(model.coef_).astype(np.float32)
+        self.intercept = np.float32(model.intercept_)
+
+    def predict(self, X):
+        return X @ self.coef + self.intercept
+
+def to_float32(model):
+    """float32 serving version of a fitted linear, tree or stacking model"""
+    if isinstance(model, LinearRegression):
+        return Float32Linear(model)
+    if is_tree_ensemble(model):
+        model = CompiledTreeModel(model)
+    if isinstance(model, CompiledTreeModel):
+        compiled = copy.copy(model)
+        compiled.flat = compact_flat_trees(model.flat)
+        return compiled
+    if hasattr(model, 'members'):
+        converted = copy.copy(model)
+        converted.members = {name: to_float32(member) for name, member in model.members.items()}
+        converted.meta = to_float32(model.meta)
+        return converted
+    raise ValueError(f"float32 inference is not supported for {type(model).__name__}")
+
+class Float32Pipeline:
+    def __init__(self, predictor):
+        self.columns = predictor.feature_selector.get_support(indices=True)
+        # Scaling only the selected columns gives the same values as scale-then-select
+        self.mean = predictor.scaler.mean_[self.columns]
+        self.scale = predictor.scaler.scale_[self.columns]
+        self.model = to_float32(predictor.model)
+
+    def transform(self, X, timer=None):
+        """Selected, standardized features as a float32 matrix"""
+        with timer.stage('transform') if timer is not None else nullcontext():
+            selected = np.asarray(X, dtype=np.float64)[:, self.columns]
+            return ((selected - self.mean) / self.scale).astype(np.float32)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the float32 model's arrays"""
+        models = list(getattr(self.model, 'members', {}).values()) or [self.model]
+        models.append(getattr(self.model, 'meta', None))
+        total = self.mean.nbytes + self.scale.nbytes
+        for model in models:
+            if isinstance(model, CompiledTreeModel):
+                total += model.flat.nbytes
+            elif isinstance(model, Float32Linear):
+                total += model.coef.nbytes
+        return total
+
+def flat_batch_rows(model):
+    """Largest batch every compiled tree ensemble in model scores on its flat trees, or None"""
+    if isinstance(model, CompiledTreeModel):
+        return model.max_rows
+    limits = [flat_batch_rows(member) for member in getattr(model, 'members', {}).values()]
+    limits = [limit for limit in limits if limit is not None]
+    return min(limits) if limits else None
+
+def check_float32(predictor, pipeline, data_path='./data.csv', tolerance=FLOAT32_TOLERANCE):
+    """Compare float32 and float64 scores on every row of data_path; raise ValueError beyond tolerance
+
+    Compiled trees only use their float32 flat arrays on small batches, so the rows
+    are scored in batches that small; one big batch would go to sklearn instead.
+    """
+    df = pd.read_csv(data_path)
+    X = predictor.build_feature_matrix(df)
+    expected = np.clip((getattr(predictor, 'compiled_model', None) or predictor.model).predict(predictor.transform_features(X)), 0, 100)
+    X32 = pipeline.transform(X)
+    batch_rows = flat_batch_rows(pipeline.model) or len(X32)
+    actual = np.clip(np.concatenate([pipeline.model.predict(X32[start:start + batch_rows])
+                                     for start in range(0, len(X32), batch_rows)]), 0, 100)
+
+    difference = np.abs(actual.astype(np.float64) - expected)
+    report = {
+        'rows': int(len(df)),
+        'max_abs_diff': float(difference.max()),
+        'mean_abs_diff': float(difference.mean()),
+        'tolerance': tolerance
+    }
+    if report['max_abs_diff'] > tolerance:
+        raise ValueError(f"float32 scores differ from float64 by up to {report['max_abs_diff']:.4f} "
+                         f"(tolerance {tolerance})")
+    return report
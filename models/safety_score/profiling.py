@@ -0,0 +1,121 @@
+"""
+Opt-in stage profiler for TouristSafetyPredictor.
+Records wall time, CPU time and peak memory per stage and writes them as a
+Chrome trace (open in chrome://tracing or https://ui.perfetto.dev).
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+def _max_rss_mb():
+    """Peak resident set size of this process so far, in MB"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+class StageProfiler:
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.events = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        # Peak memory seen by stages still running, so nested stages don't hide their parent's peak
+        self._open_peaks = []
+
+        # Only stop tracing in stop() if this profiler turned it on
+        self._started_tracing = trace_memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name, **args):
+        """Profile the enclosed block as one named stage"""
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._open_peaks:
+                self._open_peaks[-1] = max(self._open_peaks[-1], peak)
+            tracemalloc.reset_peak()
+            self._open_peaks.append(current)
+            start_memory = current
+
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start_wall
+            cpu = time.process_time() - start_cpu
+            details = dict(args)
+            details['wall_ms'] = round(wall * 1000, 3)
+            details['cpu_ms'] = round(cpu * 1000, 3)
+
+            if self.trace_memory:
+                _, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, self._open_peaks.pop())
+                details['peak_traced_mb'] = round(peak / (1024 * 1024), 3)
+                details['traced_delta_mb'] = round((tracemalloc.get_traced_memory()[0] - start_memory) / (1024 * 1024), 3)
+                if self._open_peaks:
+                    self._open_peaks[-1] = max(self._open_peaks[-1], peak)
+
+            max_rss = _max_rss_mb()
+            if max_rss is not None:
+                details['max_rss_mb'] = round(max_rss, 1)
+
+            with self._lock:
+                self.events.append({
+                    'name': name,
+                    'ph': 'X',
+                    'ts': round((start_wall - self._origin) * 1e6, 1),
+                    'dur': round(wall * 1e6, 1),
+                    'pid': os.getpid(),
+                    'tid': threading.get_ident(),
+                    'args': details
+                })
+
+    def summary(self):
+        """Per-stage totals, slowest first"""
+        totals = {}
+        for event in self.events:
+            total = totals.setdefault(event['name'], {'calls': 0, 'wall_ms': 0.0, 'cpu_ms': 0.0, 'peak_traced_mb': 0.0})
+            total['calls'] += 1
+            total['wall_ms'] += event['args']['wall_ms']
+            total['cpu_ms'] += event['args']['cpu_ms']
+            total['peak_traced_mb'] = max(total['peak_traced_mb'], event['args'].get('peak_traced_mb', 0.0))
+        return dict(sorted(totals.items(), key=lambda item: item[1]['wall_ms'], reverse=True))
+
+    def print_summary(self):
+        """Print where training time went"""
+        print("\n" + "=" * 90)
+        print("⏱️  PROFILE SUMMARY")
+        print("=" * 90)
+        print(f"{'Stage':<45} {'Calls':>6} {'Wall ms':>12} {'CPU ms':>12} {'Peak MB':>10}")
+        print("-" * 90)
+        for name, total in self.summary().items():
+            print(f"{name:<45} {total['calls']:>6} {total['wall_ms']:>12.1f} {total['cpu_ms']:>12.1f} "
+                  f"{total['peak_traced_mb']:>10.1f}")
+        print("=" * 90)
+
+    def save_trace(self, path='training_profile.json'):
+        """Write the recorded stages as a Chrome trace file"""
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f, indent=1)
+        return path
+
+    def stop(self):
+        """Stop memory tracing started by this profiler; later stages record time only"""
+        if self._started_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._started_tracing = False
+        self.trace_memory = False
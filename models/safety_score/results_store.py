@@ -0,0 +1,109 @@
+"""
+Memory-efficient storage for the per-model results of TouristSafetyPredictor.train_model.
+
+Metric summaries stay in memory. Test-set predictions and y_test are spilled to
+memory-mapped .npy files, and candidate models that lose are either dropped or
+pickled to disk. The store still behaves like the old dict:
+`results[name]['predictions']`, `results.items()` and so on.
+"""
+
+import atexit
+import os
+import pickle
+import shutil
+import tempfile
+from collections.abc import Mapping
+import numpy as np
+import pandas as pd
+
+# What to do with candidate models that are not (or no longer) the best
+KEEP_CANDIDATE_OPTIONS = ('drop', 'disk', 'memory')
+
+class ResultsStore(Mapping):
+    def __init__(self, y_test, directory=None, keep_candidates='drop'):
+        if keep_candidates not in KEEP_CANDIDATE_OPTIONS:
+            raise ValueError(f"keep_candidates must be one of {KEEP_CANDIDATE_OPTIONS}")
+
+        if directory is None:
+            directory = tempfile.mkdtemp(prefix='safety_results_')
+            atexit.register(shutil.rmtree, directory, True)
+        os.makedirs(directory, exist_ok=True)
+
+        self.directory = directory
+        self.keep_candidates = keep_candidates
+        self._metrics = {}
+        self._files = {}
+        self._models = {}
+        self._model_files = {}
+
+        self._y_test_path = os.path.join(directory, 'y_test.npy')
+        np.save(self._y_test_path, np.asarray(y_test, dtype=np.float64))
+        self._y_test = None
+
+    def add(self, name, model, metrics, predictions):
+        """Record one candidate: metrics in memory, predictions on disk"""
+        path = os.path.join(self.directory, f'predictions_{len(self._files)}.npy')
+        np.save(path, np.asarray(predictions, dtype=np.float64))
+        self._metrics[name] = dict(metrics)
+        self._files[name] = path
+        self._models[name] = model
+
+    def release(self, name):
+        """Free a candidate model, persisting it first if keep_candidates is 'disk'"""
+        if self.keep_candidates == 'memory' or name not in self._models:
+            return
+        model = self._models.pop(name)
+        if self.keep_candidates == 'disk':
+            path = os.path.join(self.directory, f'model_{list(self._files).index(name)}.pkl')
+            with open(path, 'wb') as f:
+                pickle.dump(model, f)
+            self._model_files[name] = path
+
+    def model(self, name):
+        """The fitted model for a candidate, loading it from disk if it was persisted"""
+        if name in self._models:
+            return self._models[name]
+        path = self._model_files.get(name)
+        if path is not None and os.path.exists(path):
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        return None
+
+    @property
+    def y_test(self):
+        """Test targets as a Series backed by the memory-mapped file"""
+        if self._y_test is None and os.path.exists(self._y_test_path):
+            self._y_test = pd.Series(np.load(self._y_test_path, mmap_mode='r'), name='y_test')
+        return self._y_test
+
+    def predictions(self, name):
+        """Memory-mapped test predictions for a candidate"""
+        path = self._files[name]
+        if not os.path.exists(path):
+            return None
+        return np.load(path, mmap_mode='r')
+
+    def metrics(self, name):
+        """Compact metric summary for a candidate"""
+        return dict(self._metrics[name])
+
+    def __getitem__(self, name):
+        result = self.metrics(name)
+        # Persisted candidates are only read back through model(name)
+        result['model'] = self._models.get(name)
+        result['predictions'] = self.predictions(name)
+        result['y_test'] = self.y_test
+        return result
+
+    def __iter__(self):
+        return iter(self._metrics)
+
+    def __len__(self):
+        return len(self._metrics)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Fitted models and open memory maps are not part of a saved predictor
+        state['_models'] = {}
+        state['_y_test'] = None
+        return state
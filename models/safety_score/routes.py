@@ -0,0 +1,113 @@
+"""
+Route safety scoring for the Tourist Safety Score service.
+Samples a polyline at a fixed spacing, snaps every sample to its nearest pincode
+with one KD-tree query, and aggregates per segment and over the whole route.
+"""
+
+import math
+import numpy as np
+from geo import check_coordinates, haversine_km
+from train import risk_band_labels
+
+DEFAULT_SPACING_KM = 0.5
+DEFAULT_MAX_SNAP_KM = 10.0
+MAX_SAMPLES = 100000
+
+def sample_polyline(latitudes, longitudes, spacing_km):
+    """Points every spacing_km along a polyline, plus both ends.
+
+    Returns sample latitudes, longitudes, distance along the route and cumulative vertex distances.
+    """
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    cumulative = np.concatenate([[0.0], np.cumsum(haversine_km(latitudes[:-1], longitudes[:-1],
+                                                               latitudes[1:], longitudes[1:]))])
+    total = cumulative[-1]
+
+    if total / spacing_km > MAX_SAMPLES:
+        raise ValueError(f"Route would need more than {MAX_SAMPLES} samples; increase spacing_km")
+
+    # Vertices are always sampled so short segments are never skipped
+    distances = np.union1d(np.arange(0.0, total, spacing_km), cumulative)
+    # Linear interpolation in degrees is accurate at sampling spacings of a few km
+    return (np.interp(distances, cumulative, latitudes), np.interp(distances, cumulative, longitudes),
+            distances, cumulative)
+
+def score_route(index, latitudes, longitudes, spacing_km=DEFAULT_SPACING_KM, max_snap_km=DEFAULT_MAX_SNAP_KM):
+    """Score a polyline against a PincodeIndex in one batched pass"""
+    if len(latitudes) < 2 or len(latitudes) != len(longitudes):
+        raise ValueError("A route needs at least two points with both latitude and longitude")
+    check_coordinates(latitudes, longitudes)
+    if not (math.isfinite(spacing_km) and spacing_km > 0):
+        raise ValueError("spacing_km must be a positive number")
+    if math.isnan(max_snap_km) or max_snap_km <= 0:
+        raise ValueError("max_snap_km must be a positive number")
+
+    sample_lats, sample_lons, distances, cumulative = sample_polyline(latitudes, longitudes, spacing_km)
+
+    # Each sample stands for the stretch of road halfway to its neighbours
+    midpoints = np.concatenate([[distances[0]], (distances[1:] + distances[:-1]) / 2, [distances[-1]]])
+    lengths = np.diff(midpoints)
+
+    snap_km, positions = index.nearest(sample_lats, sample_lons, max_distance_km=max_snap_km)
+    snapped = np.isfinite(snap_km)
+    scores = np.append(index.scores, np.nan)[positions]
+
+    # Segment i runs from vertex i to vertex i + 1; the last vertex belongs to the last segment
+    n_segments = len(cumulative) - 1
+    segment_ids = np.clip(np.searchsorted(cumulative, distances, side='right') - 1, 0, n_segments - 1)
+
+    weights = np.where(snapped, lengths, 0.0)
+    weighted_sums = np.bincount(segment_ids, weights=weights * np.nan_to_num(scores), minlength=n_segments)
+    scored_km = np.bincount(segment_ids, weights=weights, minlength=n_segments)
+    sample_counts = np.bincount(segment_ids, weights=snapped, minlength=n_segments)
+    score_sums = np.bincount(segment_ids, weights=np.nan_to_num(scores), minlength=n_segments)
+
+    segment_min = np.full(n_segments, np.inf)
+    np.minimum.at(segment_min, segment_ids[snapped], scores[snapped])
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        segment_exposure = weighted_sums / scored_km
+        segment_average = score_sums / sample_counts
+
+    segments = []
+    for i in range(n_segments):
+        has_scores = sample_counts[i] > 0
+        segments.append({
+            'segment': i,
+            'start': [float(latitudes[i]), float(longitudes[i])],
+            'end': [float(latitudes[i + 1]), float(longitudes[i + 1])],
+            'distance_km': float(cumulative[i + 1] - cumulative[i]),
+            'samples': int(sample_counts[i]),
+            'min_score': float(segment_min[i]) if has_scores else None,
+            'average_score': float(segment_average[i]) if has_scores else None,
+            'exposure_score': float(segment_exposure[i]) if scored_km[i] > 0 else None
+        })
+
+    summary = {
+        'distance_km': float(cumulative[-1]),
+        'spacing_km': spacing_km,
+        'samples': int(len(distances)),
+        'snapped_samples': int(snapped.sum()),
+        'unscored_km': float(lengths[~snapped].sum())
+    }
+    if snapped.any():
+        worst = int(np.nanargmin(scores))
+        average = float(scores[snapped].mean())
+        # A zero-length route has no distance to weight by
+        exposure = float(np.average(scores[snapped], weights=lengths[snapped])) if weights.sum() > 0 else average
+        summary.update({
+            'min_score': float(scores[worst]),
+            'min_score_pincode': int(index.pincodes[positions[worst]]),
+            'average_score': average,
+            'exposure_score': exposure,
+            'pincodes': np.unique(index.pincodes[positions[snapped]]).tolist()
+        })
+        # Kilometres of the route spent in each risk band
+        bands = risk_band_labels(scores[snapped])
+        summary['km_by_risk_band'] = {
+            band: float(lengths[snapped][bands == band].sum()) for band in np.unique(bands)
+        }
+        summary['risk_level'] = str(risk_band_labels([exposure])[0])
+
+    return {'summary': summary, 'segments': segments}
@@ -0,0 +1,183 @@
+"""
+What-if scenario engine for the Tourist Safety Score model.
+Applies feature multipliers and deltas to every pincode in a region at once and
+re-scores the whole region in a single vectorized pass.
+"""
+
+import math
+import numpy as np
+from train import risk_band_labels
+from input_validation import InvalidInputError
+
+def _filter_names(kind, value):
+    """A state or area type filter as a list of strings; ValueError otherwise"""
+    names = [value] if isinstance(value, str) else value
+    if not isinstance(names, (list, tuple)) or not all(isinstance(name, str) for name in names):
+        raise ValueError(f"{kind} must be a string or a list of strings, got {value!r}")
+    return list(names)
+
+def _filter_pincodes(pincodes):
+    """A pincode filter as a list of ints; ValueError otherwise"""
+    if not isinstance(pincodes, (list, tuple)):
+        raise ValueError(f"pincodes must be a list, got {pincodes!r}")
+    values = []
+    for pincode in pincodes:
+        try:
+            if isinstance(pincode, bool):
+                raise TypeError
+            values.append(int(pincode))
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid pincode: {pincode!r}") from None
+    return values
+
+def select_region(store, state=None, area_type=None, pincodes=None):
+    """Return the latest stored row of every pincode matching the region filter"""
+    rows = store.latest_rows
+    mask = np.ones(len(rows), dtype=bool)
+
+    if state is not None:
+        mask &= np.isin(store.states[rows], _filter_names('state', state))
+
+    if area_type is not None:
+        mask &= np.isin(store.area_types[rows], _filter_names('area_type', area_type))
+
+    if pincodes is not None:
+        mask &= np.isin(store.pincodes[rows], _filter_pincodes(pincodes))
+
+    return rows[mask]
+
+def _change_value(kind, name, value):
+    """A multiplier or delta as a finite float; ValueError otherwise"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+        return float(value)
+    raise ValueError(f"{kind.capitalize()} for {name} must be a finite number, got {value!r}")
+
+def apply_changes(store, matrix, multipliers=None, deltas=None):
+    """Apply per-feature multipliers, then deltas, to every row of a raw feature matrix"""
+    n_features = len(store.feature_names)
+    scale = np.ones(n_features)
+    shift = np.zeros(n_features)
+
+    for kind, changes in (('multipliers', multipliers), ('deltas', deltas)):
+        if changes is not None and not isinstance(changes, dict):
+            raise ValueError(f"{kind} must be a JSON object of feature: number, got {changes!r}")
+
+    for name, value in (multipliers or {}).items():
+        if name not in store.column_index:
+            raise KeyError(f"Unknown feature in multipliers: {name}")
+        scale[store.column_index[name]] = _change_value('multiplier', name, value)
+
+    for name, value in (deltas or {}).items():
+        if name not in store.column_index:
+            raise KeyError(f"Unknown feature in deltas: {name}")
+        shift[store.column_index[name]] = _change_value('delta', name, value)
+
+    return matrix * scale + shift
+
+def score_matrix(predictor, store, matrix):
+    """Score a raw feature matrix, using the fused linear weights when the model allows it"""
+    fused = predictor.fused_linear_weights()
+    if fused is None:
+        return predictor.predict_safety_score(store.to_frame(matrix))
+
+    # Analytic fast path: one matrix-vector product instead of scale -> select -> predict
+    weights, intercept = fused
+    X = predictor.build_feature_matrix(store.to_frame(matrix)).to_numpy(dtype=np.float64)
+    return np.clip(X @ weights + intercept, 0, 100)
+
+def score_routed(predictor, store, matrix, names=None, registry=None):
+    """Score a raw feature matrix with one score_matrix call per routed model; also says if all took the fast path"""
+    if registry is None:
+        return score_matrix(predictor, store, matrix), predictor.fused_linear_weights() is not None
+
+    scores = np.empty(len(matrix))
+    fast_path = True
+    for name in np.unique(names):
+        rows = np.flatnonzero(names == name)
+        routed = registry.get(name)
+        if routed is None:
+            raise ValueError(f"Model '{name}' could not be loaded")
+        scores[rows] = score_matrix(routed, store, matrix[rows])
+        fast_path = fast_path and routed.fused_linear_weights() is not None
+    return scores, fast_path
+
+def check_scenario(schema, store, rows, *matrices):
+    """Raise InvalidInputError, keyed by pincode, if any row of the matrices fails the InputSchema"""
+    errors = {}
+    for matrix in matrices:
+        _, row_errors = schema.validate_matrix(matrix)
+        for k, row_error in row_errors.items():
+            errors.setdefault(int(store.pincodes[rows[k]]), row_error)
+    if errors:
+        raise InvalidInputError(errors)
+
+def run_scenario(predictor, store, state=None, area_type=None, pincodes=None,
+                 multipliers=None, deltas=None, year=None, registry=None, schema=None):
+    """Re-score a region under hypothetical feature changes.
+
+    With a ModelRegistry, each pincode is scored by the model its state/area_type
+    routes to; otherwise by predictor. With an InputSchema, changes that push a
+    feature out of range raise InvalidInputError before anything is scored.
+    Returns per-pincode baseline and scenario scores with their risk bands, and a
+    summary of score deltas and band transitions.
+    """
+    rows = select_region(store, state=state, area_type=area_type, pincodes=pincodes)
+    if len(rows) == 0:
+        return None
+
+    baseline = store.matrix[rows].copy()
+    if year is not None:
+        baseline[:, store.column_index['year']] = float(year)
+    scenario = apply_changes(store, baseline, multipliers=multipliers, deltas=deltas)
+    if schema is not None:
+        check_scenario(schema, store, rows, scenario, baseline)
+
+    names = registry.route(store.states[rows], store.area_types[rows]) if registry is not None else None
+    # Score baseline and scenario together so both go through one pass per model
+    scores, fast_path = score_routed(predictor, store, np.vstack([baseline, scenario]),
+                                     None if names is None else np.concatenate([names, names]), registry)
+    baseline_scores, scenario_scores = scores[:len(rows)], scores[len(rows):]
+    score_deltas = scenario_scores - baseline_scores
+
+    baseline_bands = risk_band_labels(baseline_scores)
+    scenario_bands = risk_band_labels(scenario_scores)
+    changed = baseline_bands != scenario_bands
+
+    transitions = {}
+    for before, after in zip(baseline_bands[changed].tolist(), scenario_bands[changed].tolist()):
+        key = f"{before} -> {after}"
+        transitions[key] = transitions.get(key, 0) + 1
+
+    results = [{
+        'pincode': int(pincode),
+        'state': state_name,
+        'area_type': area,
+        'baseline_score': base,
+        'scenario_score': new,
+        'score_delta': delta,
+        'baseline_interpretation': before,
+        'scenario_interpretation': after,
+        'model': model_name
+    } for pincode, state_name, area, base, new, delta, before, after, model_name in zip(
+        store.pincodes[rows].tolist(), store.states[rows].tolist(), store.area_types[rows].tolist(),
+        baseline_scores.tolist(), scenario_scores.tolist(), score_deltas.tolist(),
+        baseline_bands.tolist(), scenario_bands.tolist(),
+        names.tolist() if names is not None else [None] * len(rows)
+    )]
+
+    summary = {
+        'pincodes': len(rows),
+        'mean_baseline_score': float(baseline_scores.mean()),
+        'mean_scenario_score': float(scenario_scores.mean()),
+        'mean_score_delta': float(score_deltas.mean()),
+        'min_score_delta': float(score_deltas.min()),
+        'max_score_delta': float(score_deltas.max()),
+        'band_changes': int(changed.sum()),
+        'band_transitions': transitions,
+        'fast_path': fast_path
+    }
+
+    return {
+        'summary': summary,
+        'results': results
+    }
@@ -0,0 +1,127 @@
+"""
+Shadow scoring of a candidate model under live traffic.
+
+A sampled fraction of requests is re-scored by the candidate in a background
+thread pool after the primary model has answered, so requests never wait for it.
+When too many samples are already queued, new ones are dropped (and counted)
+instead of queued. Score differences and both models' latencies go to the API
+metrics and to a rolling summary.
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import metrics
+from train import risk_band_labels
+
+logger = logging.getLogger(__name__)
+
+SHADOW_FRACTION = 0.1
+SHADOW_WORKERS = 2
+# Sampled requests waiting for a worker; more than this and new samples are dropped
+SHADOW_MAX_PENDING = 256
+# Recent rows/requests kept for the difference and latency quantiles
+SHADOW_WINDOW = 10000
+
+class ShadowScorer:
+    def __init__(self, candidate, version='candidate', fraction=SHADOW_FRACTION, workers=SHADOW_WORKERS,
+                 max_pending=SHADOW_MAX_PENDING, window=SHADOW_WINDOW):
+        self.candidate = candidate
+        self.version = version
+        self.fraction = fraction
+        self.max_pending = max_pending
+
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='shadow')
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._random = random.Random()
+        self._differences = deque(maxlen=window)
+        self._latency = {'primary': deque(maxlen=window), 'candidate': deque(maxlen=window)}
+        self.counts = {'requests': 0, 'rows': 0, 'dropped': 0, 'errors': 0, 'band_changes': 0}
+
+    def sample(self):
+        """Whether to shadow the current request"""
+        return self.fraction > 0 and self._random.random() < self.fraction
+
+    def submit(self, input_data, primary_scores, primary_seconds=None):
+        """Queue a candidate re-score of input_data without blocking; False if the sample was dropped.
+
+        primary_seconds is the primary model's time on the same input, or None if it is not comparable.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.counts['dropped'] += 1
+                metrics.SHADOW_REQUESTS.inc(outcome='dropped', candidate_version=self.version)
+                return False
+            self._pending += 1
+        self._executor.submit(self._score, input_data, np.asarray(primary_scores, dtype=np.float64), primary_seconds)
+        return True
+
+    def _score(self, input_data, primary_scores, primary_seconds):
+        try:
+            start = time.perf_counter()
+            scores = np.clip(np.asarray(self.candidate.predict_safety_score(input_data), dtype=np.float64), 0, 100)
+            seconds = time.perf_counter() - start
+            if len(scores) != len(primary_scores):
+                raise ValueError(f"Candidate returned {len(scores)} scores for {len(primary_scores)} rows")
+
+            differences = np.abs(scores - primary_scores)
+            band_changes = int(np.count_nonzero(risk_band_labels(scores) != risk_band_labels(primary_scores)))
+            with self._lock:
+                self.counts['requests'] += 1
+                self.counts['rows'] += len(differences)
+                self.counts['band_changes'] += band_changes
+                self._differences.extend(differences.tolist())
+                self._latency['candidate'].append(seconds)
+                if primary_seconds is not None:
+                    self._latency['primary'].append(primary_seconds)
+
+            metrics.SHADOW_REQUESTS.inc(outcome='scored', candidate_version=self.version)
+            metrics.SHADOW_SCORE_DIFF.observe_many(differences.tolist(), candidate_version=self.version)
+            metrics.SHADOW_LATENCY.observe(seconds, model='candidate')
+            if primary_seconds is not None:
+                metrics.SHADOW_LATENCY.observe(primary_seconds, model='primary')
+        except Exception:
+            logger.warning("Shadow scoring failed", exc_info=True, extra={'candidate_version': self.version})
+            with self._lock:
+                self.counts['errors'] += 1
+            metrics.SHADOW_REQUESTS.inc(outcome='error', candidate_version=self.version)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def summary(self):
+        """Counts, score-difference quantiles and latency quantiles over the recent window"""
+        with self._lock:
+            differences = np.array(self._differences)
+            latency = {name: np.array(values) for name, values in self._latency.items()}
+            summary = {
+                'candidate_version': self.version,
+                'fraction': self.fraction,
+                'pending': self._pending,
+                **self.counts
+            }
+
+        if len(differences):
+            p50, p95, p99 = np.percentile(differences, [50, 95, 99])
+            summary['score_difference'] = {
+                'mean': float(differences.mean()),
+                'p50': float(p50),
+                'p95': float(p95),
+                'p99': float(p99),
+                'max': float(differences.max())
+            }
+        summary['latency_ms'] = {}
+        for name, values in latency.items():
+            if len(values):
+                p50, p95 = np.percentile(values * 1000, [50, 95])
+                summary['latency_ms'][name] = {'p50': float(p50), 'p95': float(p95), 'samples': int(len(values))}
+        return summary
+
+    def shutdown(self):
+        """Stop the workers; samples still queued are abandoned"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
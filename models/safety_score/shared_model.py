@@ -0,0 +1,150 @@
+"""
+Memory-mapped model artifacts shared by every API worker on a host.
+
+export_shared writes a predictor as a small pickle skeleton plus one flat .bin
+file holding its arrays (scaler statistics, selector scores, coefficients, flat
+tree node arrays), each 64-byte aligned. load_shared maps the .bin file read-only
+and rebuilds the predictor with those arrays as views into the mapping. Workers
+attached to the same file share one copy of the pages through the OS page cache,
+and start-up unpickles only the skeleton.
+
+sklearn trees copy their nodes into private memory when unpickled, so the shared
+predictor serves tree models from their flat arrays (SharedTreeModel) instead.
+"""
+
+import argparse
+import copy
+import glob
+import hashlib
+import io
+import os
+import pickle
+import numpy as np
+from flat_trees import FlatTreeEnsemble, CompiledTreeModel, is_tree_ensemble
+
+SHARED_MODEL_PREFIX = './shared_model/tourist_safety_model'
+
+# Smaller arrays stay inside the skeleton pickle
+SHARED_MIN_BYTES = 512
+ALIGNMENT = 64
+
+class SharedTreeModel(CompiledTreeModel):
+    """Tree ensemble served only from flat arrays, with no sklearn estimator behind it"""
+
+    def __init__(self, model):
+        flat = model.flat if isinstance(model, CompiledTreeModel) else FlatTreeEnsemble(model)
+        source = model.model if isinstance(model, CompiledTreeModel) else model
+        self.model = None
+        self.flat = flat
+        # Every batch takes the flat path
+        self.max_rows = np.inf
+        self.model_type = type(source).__name__
+        self.n_features_in_ = source.n_features_in_
+        self.feature_importances_ = np.asarray(source.feature_importances_, dtype=np.float64)
+
+    def apply(self, X):
+        """Leaf index within each tree, like sklearn's apply"""
+        return self.flat.apply(X) - self.flat.roots
+
+def serving_model(model):
+    """Copy of a fitted model with every tree ensemble replaced by a SharedTreeModel"""
+    if isinstance(model, CompiledTreeModel) or is_tree_ensemble(model):
+        return SharedTreeModel(model)
+    if hasattr(model, 'members'):
+        converted = copy.copy(model)
+        converted.members = {name: serving_model(member) for name, member in model.members.items()}
+        return converted
+    return model
+
+class _ArrayWriter(pickle.Pickler):
+    def __init__(self, file, blob):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.blob = blob
+        self.size = 0
+
+    def persistent_id(self, obj):
+        if type(obj) is not np.ndarray or obj.dtype.hasobject or obj.nbytes < SHARED_MIN_BYTES:
+            return None
+        offset = -self.size % ALIGNMENT + self.size
+        data = np.ascontiguousarray(obj)
+        self.blob.write(b'\0' * (offset - self.size))
+        self.blob.write(data.tobytes())
+        self.size = offset + data.nbytes
+        return ('shared_array', offset, data.dtype.str, data.shape)
+
+class _ArrayReader(pickle.Unpickler):
+    def __init__(self, file, buffer):
+        super().__init__(file)
+        self.buffer = buffer
+
+    def persistent_load(self, pid):
+        _, offset, dtype, shape = pid
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape, dtype=np.int64))
+        return np.frombuffer(self.buffer, dtype=dtype, count=count, offset=offset).reshape(shape)
+
+def export_shared(predictor, path_prefix):
+    """Write predictor as <path_prefix>.pkl and <path_prefix>-<hash>.bin; returns the skeleton path.
+
+    Both files are written under temporary names and renamed into place, so workers
+    loading at the same time always see a complete pair. Older .bin files are unlinked;
+    workers still mapping them keep their pages until they reload.
+    """
+    serving = copy.copy(predictor)
+    serving.model = serving_model(predictor.model)
+    # The flat trees are the model now; training leftovers and per-process state are not served
+    for name in ('compiled_model', 'float32_pipeline', 'profiler', 'y_test', 'results', 'df', 'X_test'):
+        if name in serving.__dict__:
+            setattr(serving, name, None)
+
+    directory = os.path.dirname(os.path.abspath(path_prefix))
+    os.makedirs(directory, exist_ok=True)
+    temporary_blob = f'{path_prefix}.{os.getpid()}.bin.tmp'
+    temporary_skeleton = f'{path_prefix}.{os.getpid()}.pkl.tmp'
+
+    body = io.BytesIO()
+    with open(temporary_blob, 'wb') as blob:
+        _ArrayWriter(body, blob).dump(serving)
+    digest = hashlib.sha256()
+    with open(temporary_blob, 'rb') as blob:
+        for chunk in iter(lambda: blob.read(1 << 20), b''):
+            digest.update(chunk)
+    blob_name = f'{os.path.basename(path_prefix)}-{digest.hexdigest()[:12]}.bin'
+    os.replace(temporary_blob, os.path.join(directory, blob_name))
+
+    with open(temporary_skeleton, 'wb') as skeleton:
+        pickle.dump({'arrays': blob_name}, skeleton, protocol=pickle.HIGHEST_PROTOCOL)
+        skeleton.write(body.getvalue())
+    os.replace(temporary_skeleton, f'{path_prefix}.pkl')
+
+    for stale in glob.glob(os.path.join(directory, f'{glob.escape(os.path.basename(path_prefix))}-*.bin')):
+        if os.path.basename(stale) != blob_name:
+            os.remove(stale)
+    return f'{path_prefix}.pkl'
+
+def load_shared(path_prefix):
+    """Predictor whose large arrays are read-only views into the shared .bin mapping"""
+    with open(f'{path_prefix}.pkl', 'rb') as skeleton:
+        header = pickle.load(skeleton)
+        blob_path = os.path.join(os.path.dirname(os.path.abspath(path_prefix)), header['arrays'])
+        # mmap refuses empty files, which a model made only of small arrays produces
+        buffer = np.memmap(blob_path, dtype=np.uint8, mode='r') if os.path.getsize(blob_path) else None
+        return _ArrayReader(skeleton, buffer).load()
+
+def attach_shared(model_path, path_prefix=SHARED_MODEL_PREFIX):
+    """Load the shared copy of model_path, exporting it first if it is missing or older than model_path"""
+    skeleton = f'{path_prefix}.pkl'
+    if not os.path.exists(skeleton) or os.path.getmtime(skeleton) < os.path.getmtime(model_path):
+        with open(model_path, 'rb') as f:
+            export_shared(pickle.load(f), path_prefix)
+    return load_shared(path_prefix)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export a saved model for memory-mapped sharing across API workers')
+    parser.add_argument('--model', default='tourist_safety_model.pkl', help='Pickled TouristSafetyPredictor')
+    parser.add_argument('--output', default=SHARED_MODEL_PREFIX, help='Path prefix of the shared .pkl/.bin pair')
+    args = parser.parse_args()
+
+    with open(args.model, 'rb') as f:
+        skeleton = export_shared(pickle.load(f), args.output)
+    print(f"Shared model written to {skeleton} ({os.path.getsize(skeleton)} byte skeleton)")
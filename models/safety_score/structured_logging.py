@@ -0,0 +1,109 @@
+"""
+Structured, non-blocking logging for the Tourist Safety Score API.
+
+configure_logging routes every record through a QueueHandler: the serving thread
+only renders the record to JSON and appends it to an in-memory queue, and a
+background QueueListener thread writes the lines to stderr. Repeated warnings
+(e.g. the same missing features on every request) are sampled so a bad client
+cannot flood the log.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+
+# Every distinct warning is logged this many times per window, then suppressed until the window ends
+SAMPLE_BURST = 5
+SAMPLE_WINDOW_SECONDS = 60.0
+
+# Attributes every LogRecord has; anything else came from extra={...}
+_RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+_configure_lock = threading.Lock()
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, extra fields and any exception"""
+
+    def format(self, record):
+        entry = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class SampledFilter(logging.Filter):
+    """Let each distinct message template through SAMPLE_BURST times per window at WARNING level and below.
+
+    The first record after a suppressed stretch carries the number of records dropped.
+    Errors are never sampled.
+    """
+
+    def __init__(self, burst=SAMPLE_BURST, window=SAMPLE_WINDOW_SECONDS):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            started, seen, suppressed = self._counts.get(key, (now, 0, 0))
+            if now - started >= self.window:
+                started, seen = now, 0
+            if seen >= self.burst:
+                self._counts[key] = (started, seen, suppressed + 1)
+                return False
+            self._counts[key] = (started, seen + 1, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+def configure_logging(level=LOG_LEVEL, stream=None):
+    """Install the queue handler on the root logger once per process and start its writer thread"""
+    global _listener
+
+    with _configure_lock:
+        root = logging.getLogger()
+        root.setLevel(level)
+        if _listener is not None:
+            return _listener
+
+        # Records are rendered to JSON before they are queued (the queue drops exception info),
+        # so the writer thread only writes lines
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(logging.Formatter('%(message)s'))
+
+        # Unbounded, so logging never waits on the writer
+        records = queue.SimpleQueue()
+        handler = logging.handlers.QueueHandler(records)
+        handler.setFormatter(JsonFormatter())
+        handler.addFilter(SampledFilter())
+        root.handlers = [handler]
+
+        _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+        return _listener
+
+def get_logger(name):
+    return logging.getLogger(name)
@@ -0,0 +1,202 @@
+"""
+Synthetic dataset generator for load-testing the Tourist Safety Score model.
+
+Learns a Gaussian copula per (state, area_type) group from data.csv: the empirical
+marginal of every numeric column plus the rank correlation between columns. It then
+streams arbitrarily many realistic rows, including the derived score columns, in
+fixed-size chunks. Chunk i is always drawn from the same seed, so output is
+deterministic for a given (seed, chunk_size) no matter how many worker processes run:
+
+    python synth.py --rows 10000000 --output synthetic.csv --jobs 8 --seed 42
+"""
+
+import argparse
+import multiprocessing
+import time
+import numpy as np
+import pandas as pd
+from scipy import stats
+from scipy.special import ndtr
+
+# Columns copied from a real row of the group rather than modelled
+IDENTITY_COLUMNS = ['pincode', 'locality_name', 'year']
+GROUP_COLUMNS = ['state', 'area_type']
+
+# Lower bounds of risk_category, matching the labels in data.csv
+RISK_CATEGORIES = [
+    (80, 'Very Safe'),
+    (65, 'Safe'),
+    (50, 'Moderate Risk'),
+    (35, 'High Risk')
+]
+
+def risk_category(scores):
+    """Vectorized risk_category label for composite safety scores"""
+    conditions = [scores > lower for lower, _ in RISK_CATEGORIES]
+    return np.select(conditions, [label for _, label in RISK_CATEGORIES], default='Very High Risk')
+
+def _normal_scores(values):
+    """Map each column to standard normal scores through its ranks"""
+    ranks = stats.rankdata(values, axis=0)
+    return stats.norm.ppf((ranks - 0.5) / len(values))
+
+def _correlation(z):
+    """Correlation matrix of normal scores, with constant columns left uncorrelated"""
+    std = z.std(axis=0)
+    safe = np.where(std > 0, std, 1.0)
+    centered = (z - z.mean(axis=0)) / safe
+    corr = centered.T @ centered / len(z)
+    corr[std == 0, :] = 0
+    corr[:, std == 0] = 0
+    np.fill_diagonal(corr, 1.0)
+    return corr
+
+class SyntheticDataGenerator:
+    def __init__(self, min_group_rows=10):
+        self.min_group_rows = min_group_rows
+        self.groups = []
+
+    def fit(self, df):
+        """Learn per-group marginals and correlations from a dataset shaped like data.csv"""
+        self.columns = list(df.columns)
+        self.numeric_columns = [c for c in df.select_dtypes(include=[np.number]).columns
+                                if c not in IDENTITY_COLUMNS]
+        self.integer_columns = [c for c in self.numeric_columns if pd.api.types.is_integer_dtype(df[c])]
+        self._integer_mask = np.isin(self.numeric_columns, self.integer_columns)
+
+        values = df[self.numeric_columns].fillna(df[self.numeric_columns].median()).to_numpy(dtype=np.float64)
+        global_corr = _correlation(_normal_scores(values))
+        n_columns = len(self.numeric_columns)
+
+        self.groups = []
+        for keys, index in df.groupby(GROUP_COLUMNS, sort=True).indices.items():
+            if len(index) < self.min_group_rows:
+                continue
+            group_values = values[index]
+
+            # Small groups borrow strength from the global correlation structure
+            weight = len(index) / (len(index) + n_columns)
+            corr = weight * _correlation(_normal_scores(group_values)) + (1 - weight) * global_corr
+            corr += np.eye(n_columns) * 1e-6
+
+            self.groups.append({
+                'keys': dict(zip(GROUP_COLUMNS, keys)),
+                'rows': len(index),
+                'cholesky': np.linalg.cholesky(corr),
+                'sorted_values': np.sort(group_values, axis=0),
+                'identity': df.iloc[index][IDENTITY_COLUMNS].reset_index(drop=True)
+            })
+
+        counts = np.array([group['rows'] for group in self.groups], dtype=np.float64)
+        self.group_probabilities = counts / counts.sum()
+        return self
+
+    def sample_chunk(self, n_rows, chunk_index=0, seed=42):
+        """Draw one chunk of synthetic rows; the same (seed, chunk_index) always gives the same rows"""
+        rng = np.random.default_rng([seed, chunk_index])
+        group_counts = rng.multinomial(n_rows, self.group_probabilities)
+        frames = []
+
+        for group, count in zip(self.groups, group_counts):
+            if count == 0:
+                continue
+
+            # Correlated normals -> uniforms -> empirical quantiles of the group
+            z = rng.standard_normal((count, len(self.numeric_columns))) @ group['cholesky'].T
+            positions = ndtr(z) * (group['rows'] - 1)
+            lower = np.floor(positions).astype(np.int64)
+            upper = np.minimum(lower + 1, group['rows'] - 1)
+            fraction = positions - lower
+            sorted_values = group['sorted_values']
+            columns = np.arange(len(self.numeric_columns))
+            values = sorted_values[lower, columns] * (1 - fraction) + sorted_values[upper, columns] * fraction
+            values[:, self._integer_mask] = np.round(values[:, self._integer_mask])
+
+            frame = pd.DataFrame(values, columns=self.numeric_columns)
+            identity = group['identity'].iloc[rng.integers(0, group['rows'], count)].reset_index(drop=True)
+            for column in IDENTITY_COLUMNS:
+                frame[column] = identity[column].to_numpy()
+            for column, value in group['keys'].items():
+                frame[column] = value
+            frames.append(frame)
+
+        chunk = pd.concat(frames, ignore_index=True)
+        chunk = chunk.iloc[rng.permutation(len(chunk))].reset_index(drop=True)
+
+        for column in self.integer_columns:
+            chunk[column] = chunk[column].astype(np.int64)
+        if 'composite_safety_score' in chunk.columns:
+            chunk['composite_safety_score'] = chunk['composite_safety_score'].round(2)
+            chunk['risk_category'] = risk_category(chunk['composite_safety_score'].to_numpy())
+
+        return chunk[[c for c in self.columns if c in chunk.columns]]
+
+    def _chunk_sizes(self, n_rows, chunk_size):
+        full, remainder = divmod(n_rows, chunk_size)
+        return [chunk_size] * full + ([remainder] if remainder else [])
+
+    def iter_chunks(self, n_rows, chunk_size=100000, seed=42, n_jobs=1):
+        """Stream n_rows synthetic rows as DataFrames of at most chunk_size rows, in order"""
+        tasks = [(size, i, seed) for i, size in enumerate(self._chunk_sizes(n_rows, chunk_size))]
+        if n_jobs == 1:
+            for task in tasks:
+                yield self.sample_chunk(*task)
+            return
+
+        with multiprocessing.Pool(n_jobs, initializer=_init_worker, initargs=(self,)) as pool:
+            yield from pool.imap(_sample_chunk_worker, tasks)
+
+    def write_csv(self, path, n_rows, chunk_size=100000, seed=42, n_jobs=1):
+        """Stream n_rows synthetic rows to a CSV file; workers also do the CSV formatting"""
+        tasks = [(size, i, seed, i == 0) for i, size in enumerate(self._chunk_sizes(n_rows, chunk_size))]
+        with open(path, 'w', newline='') as f:
+            if n_jobs == 1:
+                for task in tasks:
+                    f.write(self.sample_chunk(*task[:3]).to_csv(index=False, header=task[3]))
+                return
+            with multiprocessing.Pool(n_jobs, initializer=_init_worker, initargs=(self,)) as pool:
+                for text in pool.imap(_format_chunk_worker, tasks):
+                    f.write(text)
+
+# Worker-process state for parallel generation
+_worker_generator = None
+
+def _init_worker(generator):
+    global _worker_generator
+    _worker_generator = generator
+
+def _sample_chunk_worker(task):
+    return _worker_generator.sample_chunk(*task)
+
+def _format_chunk_worker(task):
+    size, chunk_index, seed, header = task
+    return _worker_generator.sample_chunk(size, chunk_index, seed).to_csv(index=False, header=header)
+
+def make_synthetic_data(n_rows, data_path='./data.csv', seed=42, chunk_size=100000, n_jobs=1):
+    """Return n_rows synthetic rows learned from data_path as a single DataFrame"""
+    generator = SyntheticDataGenerator().fit(pd.read_csv(data_path))
+    return pd.concat(generator.iter_chunks(n_rows, chunk_size=chunk_size, seed=seed, n_jobs=n_jobs),
+                     ignore_index=True)
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic dataset scaled from data.csv')
+    parser.add_argument('--rows', type=int, default=1000000, help='Number of rows to generate')
+    parser.add_argument('--output', default='synthetic_data.csv', help='Output CSV path')
+    parser.add_argument('--data', default='./data.csv', help='Source dataset to learn from')
+    parser.add_argument('--chunk-size', type=int, default=100000, help='Rows per streamed chunk')
+    parser.add_argument('--jobs', type=int, default=multiprocessing.cpu_count(), help='Worker processes')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    start = time.time()
+    generator = SyntheticDataGenerator().fit(pd.read_csv(args.data))
+    print(f"Learned {len(generator.groups)} (state, area_type) groups over "
+          f"{len(generator.numeric_columns)} numeric columns in {time.time() - start:.2f}s")
+
+    start = time.time()
+    generator.write_csv(args.output, args.rows, chunk_size=args.chunk_size, seed=args.seed, n_jobs=args.jobs)
+    elapsed = time.time() - start
+    print(f"Wrote {args.rows:,} rows to {args.output} in {elapsed:.1f}s ({args.rows / elapsed:,.0f} rows/s)")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
+from sklearn.model_selection import cross_val_score, GridSearchCV
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.linear_model import LinearRegression
@@ -12,40 +12,139 @@ import seaborn as sns
 import warnings
 from scipy import stats
 from collections import Counter
+from contextlib import nullcontext
+from profiling import StageProfiler
+from results_store import ResultsStore
+from validation import ValidationPlan
+from ensemble import StackingEnsemble, out_of_fold_predictions
+from flat_trees import compile_model
+from precision import Float32Pipeline, check_float32, FLOAT32_TOLERANCE
 import os
+import logging
 warnings.filterwarnings('ignore')
 
+logger = logging.getLogger(__name__)
+
 # Set matplotlib style for better plots
 plt.style.use('seaborn-v0_8')
 sns.set_palette("husl")
 
+# Risk bands served by the API, as (lower bound, label) from safest to riskiest
+RISK_BANDS = [
+    (80, 'Very Safe'),
+    (65, 'Safe'),
+    (50, 'Moderate Risk'),
+    (35, 'High Risk'),
+    (0, 'Very High Risk')
+]
+
+# One colour per trained model in the comparison plots; --ensemble adds a fourth model
+MODEL_COLORS = ['#3498db', '#e74c3c', '#2ecc71', '#9b59b6']
+
+def model_color(idx):
+    return MODEL_COLORS[idx % len(MODEL_COLORS)]
+
+def risk_band_labels(scores):
+    """Vectorized RISK_BANDS lookup for an array of scores"""
+    scores = np.clip(np.asarray(scores, dtype=np.float64), 0, 100)
+    conditions = [scores >= lower for lower, _ in RISK_BANDS]
+    return np.select(conditions, [label for _, label in RISK_BANDS], default=RISK_BANDS[-1][1])
+
+# Raw input columns a caller supplies; derived features are computed from these.
+# This order is also the fixed column order of the binary API payloads.
+RAW_FEATURE_COLUMNS = [
+    'year', 'population', 'total_crimes', 'crime_rate_per_100k',
+    'murder_cases', 'rape_cases', 'kidnapping_cases', 'robbery_cases',
+    'theft_cases', 'burglary_cases', 'fraud_cases', 'domestic_violence_cases',
+    'crimes_against_women', 'crimes_against_tourists', 'insurgency_incidents',
+    'flood_events', 'flood_affected_population', 'landslide_events',
+    'landslide_affected_population', 'earthquake_events', 'max_earthquake_magnitude',
+    'lightning_strikes', 'forest_fires', 'cyclone_events',
+    'road_accidents', 'road_fatalities', 'road_injuries',
+    'railway_accidents', 'aviation_incidents', 'emergency_response_time_minutes',
+    'annual_rainfall_mm', 'rainfall_variability_coefficient',
+    'max_temperature_celsius', 'min_temperature_celsius',
+    'extreme_weather_days', 'monsoon_onset_deviation_days',
+    'hospitals_per_100k', 'police_stations_per_100k', 'fire_stations_per_100k',
+    'mobile_network_coverage_percent', 'internet_connectivity_percent',
+    'road_connectivity_index', 'power_supply_reliability_percent'
+]
+
+def _stage(timer, name, **args):
+    """Context manager timing a named stage with `timer`, or doing nothing without one"""
+    return timer.stage(name, **args) if timer is not None else nullcontext()
+
 class TouristSafetyPredictor:
-    def __init__(self):
+    def __init__(self, profile=False):
         self.model = None
         self.scaler = StandardScaler()
         self.label_encoder = LabelEncoder()
         self.feature_selector = None
         self.feature_names = None
         self.target_column = 'composite_safety_score'
+        # Summary of the validation plan used by the last train_model call
+        self.validation = None
+        # Flat-array version of a tree model used for serving (see flat_trees.py)
+        self.compiled_model = None
+        # Optional float32 serving pipeline (see precision.py); never saved with the model
+        self.float32_pipeline = None
+        # Opt-in per-stage timing/memory profiler (see profiling.py)
+        self.profiler = StageProfiler() if profile else None
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Profiling data and training data belong to the training run, not the saved model
+        state['profiler'] = None
+        state['float32_pipeline'] = None
+        state.pop('df', None)
+        state.pop('X_test', None)
+        return state
+    
+    def release_training_data(self):
+        """Free the training DataFrame and test matrix once they are no longer needed"""
+        self.df = None
+        self.X_test = None
+    
+    def _profile(self, name, **args):
+        """Profile a training stage when profiling is enabled"""
+        return _stage(getattr(self, 'profiler', None), name, **args)
+    
+    def save_profile(self, path='training_profile.json'):
+        """Write the recorded stages as a Chrome trace file and print a summary"""
+        if getattr(self, 'profiler', None) is None:
+            print("Profiling is not enabled. Create the predictor with profile=True.")
+            return None
+        self.profiler.print_summary()
+        self.profiler.save_trace(path)
+        # tracemalloc slows every allocation, so stop it once the trace is written
+        self.profiler.stop()
+        print(f"📁 Profile trace saved to: {path} (open in chrome://tracing or ui.perfetto.dev)")
+        return path
         
     def load_and_prepare_data(self, data_path=None, df=None):
         """Load and prepare the dataset"""
-        if df is not None:
-            self.df = df.copy()
-        else:
-            self.df = pd.read_csv(data_path)
+        with self._profile('load_data'):
+            if df is not None:
+                self.df = df.copy()
+            else:
+                self.df = pd.read_csv(data_path)
         
         print(f"Dataset shape: {self.df.shape}")
         print(f"Missing values:\n{self.df.isnull().sum().sum()}")
         
         # Handle missing values
-        numeric_columns = self.df.select_dtypes(include=[np.number]).columns
-        self.df[numeric_columns] = self.df[numeric_columns].fillna(self.df[numeric_columns].median())
+        with self._profile('median_fill'):
+            numeric_columns = self.df.select_dtypes(include=[np.number]).columns
+            self.df[numeric_columns] = self.df[numeric_columns].fillna(self.df[numeric_columns].median())
         
         return self.df
     
     def feature_engineering(self):
         """Create additional features for better prediction"""
+        with self._profile('feature_engineering'):
+            return self._feature_engineering()
+    
+    def _feature_engineering(self):
         df = self.df.copy()
         
         # Create derived features
@@ -115,8 +214,38 @@ class TouristSafetyPredictor:
         
         return selected_features
     
-    def train_model(self, df=None, target_col=None, test_size=0.2):
-        """Train multiple models and select the best one"""
+    def get_candidate_models(self):
+        """Fresh, unfitted instances of the models compared by train_model"""
+        return {
+            'Random Forest': RandomForestRegressor(n_estimators=100, random_state=42),
+            'Gradient Boosting': GradientBoostingRegressor(random_state=42),
+            'Linear Regression': LinearRegression()
+        }
+    
+    def train_model(self, df=None, target_col=None, test_size=0.2, results_dir=None, keep_candidates='drop',
+                    validation='group', n_jobs=None, ensemble=False):
+        """Train multiple models and select the best one.
+        
+        The holdout split and CV folds come from one ValidationPlan shared by all
+        candidates: 'group' keeps every pincode on one side (default), 'time'
+        holds out the last year and validates forward in time, 'random' is the
+        old row-level split. `n_jobs` runs the CV folds in parallel.
+        
+        With ensemble=True the candidates' out-of-fold predictions also train a
+        stacking meta-learner (ensemble.py), which competes as one more candidate.
+        
+        Per-model results go to a ResultsStore: metrics stay in memory, test
+        predictions are memory-mapped from `results_dir` (a temporary directory
+        by default). Candidates that lose are dropped, pickled into `results_dir`
+        (keep_candidates='disk') or kept in memory (keep_candidates='memory').
+        """
+        with self._profile('train_model'):
+            return self._train_model(df=df, target_col=target_col, test_size=test_size,
+                                     results_dir=results_dir, keep_candidates=keep_candidates,
+                                     validation=validation, n_jobs=n_jobs, ensemble=ensemble)
+    
+    def _train_model(self, df=None, target_col=None, test_size=0.2, results_dir=None, keep_candidates='drop',
+                     validation='group', n_jobs=None, ensemble=False):
         if df is None:
             df = self.feature_engineering()
         
@@ -135,84 +264,158 @@ class TouristSafetyPredictor:
         y = np.clip(y, 0, 100)
         print(f"Target variable range after clipping: {y.min():.2f} to {y.max():.2f}")
         
-        # Split the data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=test_size, random_state=42, stratify=None
-        )
+        # Split the data; fold indices are computed once and reused by every candidate
+        with self._profile('train_test_split'):
+            plan = ValidationPlan(
+                groups=df['pincode'] if 'pincode' in df.columns else None,
+                years=df['year'] if 'year' in df.columns else None,
+                n_rows=len(df), strategy=validation, test_size=test_size
+            )
+            X_train, X_test, y_train, y_test = plan.split(X, y)
+        self.validation = plan.summary()
+        print(f"Validation: {self.validation}")
         
         # Scale features
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
+        with self._profile('scaling'):
+            X_train_scaled = self.scaler.fit_transform(X_train)
+            X_test_scaled = self.scaler.transform(X_test)
         
         # Feature selection
-        self.feature_selector = SelectKBest(score_func=f_regression, k=min(15, len(feature_columns)))
-        X_train_selected = self.feature_selector.fit_transform(X_train_scaled, y_train)
-        X_test_selected = self.feature_selector.transform(X_test_scaled)
+        with self._profile('select_k_best'):
+            self.feature_selector = SelectKBest(score_func=f_regression, k=min(15, len(feature_columns)))
+            X_train_selected = self.feature_selector.fit_transform(X_train_scaled, y_train)
+            X_test_selected = self.feature_selector.transform(X_test_scaled)
         
         # Train multiple models
-        models = {
-            'Random Forest': RandomForestRegressor(n_estimators=100, random_state=42),
-            'Gradient Boosting': GradientBoostingRegressor(random_state=42),
-            'Linear Regression': LinearRegression()
-        }
+        models = self.get_candidate_models()
         
         best_score = -np.inf
         best_model_name = None
-        results = {}
+        results = ResultsStore(y_test, directory=results_dir, keep_candidates=keep_candidates)
         
-        for name, model in models.items():
-            # Cross-validation
-            cv_scores = cross_val_score(model, X_train_selected, y_train, cv=5, scoring='r2')
+        # Fitted candidates and their out-of-fold predictions, kept only to build the ensemble
+        members = {}
+        oof_columns = []
+        
+        # Pop candidates as they are trained so losing models can be freed right away
+        for name in list(models):
+            model = models.pop(name)
+
+            # Cross-validation; the stacking ensemble also needs the out-of-fold predictions
+            with self._profile(f'cv[{name}]'):
+                if ensemble:
+                    oof, cv_scores = out_of_fold_predictions(model, X_train_selected, y_train, plan.folds,
+                                                             n_jobs=n_jobs)
+                    oof_columns.append(oof)
+                else:
+                    cv_scores = cross_val_score(model, X_train_selected, y_train, cv=plan.folds, scoring='r2',
+                                                n_jobs=n_jobs)
             
             # Fit and evaluate
-            model.fit(X_train_selected, y_train)
-            y_pred = model.predict(X_test_selected)
+            with self._profile(f'fit[{name}]'):
+                model.fit(X_train_selected, y_train)
             
-            mse = mean_squared_error(y_test, y_pred)
-            r2 = r2_score(y_test, y_pred)
-            mae = mean_absolute_error(y_test, y_pred)
+            with self._profile(f'evaluate[{name}]'):
+                y_pred = model.predict(X_test_selected)
+                metrics = self._evaluate(y_test, y_pred)
             
-            # Additional evaluation metrics
-            rmse = np.sqrt(mse)
-            try:
-                mape = mean_absolute_percentage_error(y_test, y_pred)
-            except:
-                mape = np.mean(np.abs((y_test - y_pred) / np.maximum(y_test, 1e-8))) * 100
+            metrics.update({'cv_mean': cv_scores.mean(), 'cv_std': cv_scores.std()})
+            results.add(name, model, metrics, y_pred)
+            if ensemble:
+                members[name] = model
             
-            max_err = max_error(y_test, y_pred)
-            explained_var = explained_variance_score(y_test, y_pred)
+            if cv_scores.mean() > best_score:
+                if best_model_name is not None:
+                    results.release(best_model_name)
+                best_score = cv_scores.mean()
+                best_model_name = name
+                self.model = model
+            else:
+                results.release(name)
+            model = y_pred = None
+        
+        if ensemble:
+            name = 'Stacking Ensemble'
+            with self._profile('stacking'):
+                oof_matrix = np.column_stack(oof_columns)
+                stack = StackingEnsemble(members).fit_meta(oof_matrix, y_train)
+                cv_scores = stack.cross_validate_meta(oof_matrix, y_train, plan.folds)
+                y_pred = stack.predict(X_test_selected)
+                metrics = self._evaluate(y_test, y_pred)
             
-            results[name] = {
-                'model': model,
-                'cv_mean': cv_scores.mean(),
-                'cv_std': cv_scores.std(),
-                'test_r2': r2,
-                'test_mse': mse,
-                'test_rmse': rmse,
-                'test_mae': mae,
-                'test_mape': mape,
-                'test_max_error': max_err,
-                'explained_variance': explained_var,
-                'predictions': y_pred,
-                'y_test': y_test
-            }
+            metrics.update({'cv_mean': cv_scores.mean(), 'cv_std': cv_scores.std()})
+            results.add(name, stack, metrics, y_pred)
+            print(f"Stacking weights: { {k: round(v, 4) for k, v in stack.weights.items()} }")
             
             if cv_scores.mean() > best_score:
+                results.release(best_model_name)
                 best_score = cv_scores.mean()
                 best_model_name = name
-                self.model = model
+                self.model = stack
+            else:
+                results.release(name)
+            members = stack = y_pred = None
+        
+        # Export tree models to flat arrays, checked against sklearn on the test set
+        with self._profile('compile_model'):
+            self.compile_model(X_test_selected)
         
         # Store test data for evaluation
         self.X_test = X_test_selected
-        self.y_test = y_test
+        self.y_test = results.y_test
         self.results = results
         
         # Print comprehensive model performance statistics
-        self.print_detailed_stats()
+        with self._profile('print_detailed_stats'):
+            self.print_detailed_stats()
         
         print(f"\n🏆 Best Model: {best_model_name}")
         return results
     
+    def compile_model(self, X_check=None):
+        """Build the flat-array serving model for tree ensembles (None for linear models)"""
+        self.compiled_model = compile_model(self.model, X_check)
+        return self.compiled_model
+    
+    def enable_float32(self, data_path='./data.csv', tolerance=FLOAT32_TOLERANCE):
+        """Serve predictions through a float32 pipeline, after checking it against float64 on data_path"""
+        pipeline = Float32Pipeline(self)
+        report = check_float32(self, pipeline, data_path=data_path, tolerance=tolerance)
+        report['model_bytes'] = pipeline.nbytes
+        self.float32_pipeline = pipeline
+        print(f"float32 inference enabled: max difference {report['max_abs_diff']:.5f} over {report['rows']} rows")
+        return report
+    
+    def disable_float32(self):
+        """Go back to float64 inference"""
+        self.float32_pipeline = None
+    
+    def _evaluate(self, y_test, y_pred):
+        """Test-set metrics for one candidate"""
+        mse = mean_squared_error(y_test, y_pred)
+        r2 = r2_score(y_test, y_pred)
+        mae = mean_absolute_error(y_test, y_pred)
+        
+        # Additional evaluation metrics
+        rmse = np.sqrt(mse)
+        try:
+            mape = mean_absolute_percentage_error(y_test, y_pred)
+        except:
+            mape = np.mean(np.abs((y_test - y_pred) / np.maximum(y_test, 1e-8))) * 100
+        
+        max_err = max_error(y_test, y_pred)
+        explained_var = explained_variance_score(y_test, y_pred)
+        
+        return {
+            'test_r2': r2,
+            'test_mse': mse,
+            'test_rmse': rmse,
+            'test_mae': mae,
+            'test_mape': mape,
+            'test_max_error': max_err,
+            'explained_variance': explained_var
+        }
+    
     def print_detailed_stats(self):
         """Print comprehensive model evaluation statistics"""
         print("\n" + "="*80)
@@ -361,8 +564,7 @@ class TouristSafetyPredictor:
         
         if hasattr(self.model, 'feature_importances_'):
             # Get selected feature names
-            selected_features = self.feature_selector.get_support()
-            selected_feature_names = [self.feature_names[i] for i, selected in enumerate(selected_features) if selected]
+            selected_feature_names = self.get_selected_feature_names()
             
             importances = self.model.feature_importances_
             feature_imp = pd.DataFrame({
@@ -373,8 +575,7 @@ class TouristSafetyPredictor:
             return feature_imp
         elif hasattr(self.model, 'coef_'):
             # For linear models, use absolute coefficients as importance
-            selected_features = self.feature_selector.get_support()
-            selected_feature_names = [self.feature_names[i] for i, selected in enumerate(selected_features) if selected]
+            selected_feature_names = self.get_selected_feature_names()
             
             importances = np.abs(self.model.coef_)
             feature_imp = pd.DataFrame({
@@ -507,6 +708,10 @@ class TouristSafetyPredictor:
     
     def create_comprehensive_visualizations(self, save_dir='model_visualizations'):
         """Create and save comprehensive model visualizations as images"""
+        with self._profile('plotting'):
+            return self._create_comprehensive_visualizations(save_dir)
+    
+    def _create_comprehensive_visualizations(self, save_dir):
         if not hasattr(self, 'results') or not self.results:
             print("No model results available for visualization.")
             return
@@ -522,28 +727,36 @@ class TouristSafetyPredictor:
         print(f"📁 Saving plots to: {save_dir}/")
         
         # 1. Model Performance Comparison
-        self._create_model_comparison_plot(save_dir)
+        with self._profile('plot[model_comparison]'):
+            self._create_model_comparison_plot(save_dir)
         
         # 2. Prediction vs Actual plots for all models
-        self._create_prediction_plots(save_dir)
+        with self._profile('plot[prediction]'):
+            self._create_prediction_plots(save_dir)
         
         # 3. Residual analysis plots
-        self._create_residual_plots(save_dir)
+        with self._profile('plot[residual]'):
+            self._create_residual_plots(save_dir)
         
         # 4. Feature importance visualization
-        self._create_feature_importance_plot(save_dir)
+        with self._profile('plot[feature_importance]'):
+            self._create_feature_importance_plot(save_dir)
         
         # 5. Confusion matrix heatmap
-        self._create_confusion_matrix_plot(save_dir)
+        with self._profile('plot[confusion_matrix]'):
+            self._create_confusion_matrix_plot(save_dir)
         
         # 6. Error distribution plots
-        self._create_error_distribution_plots(save_dir)
+        with self._profile('plot[error_distribution]'):
+            self._create_error_distribution_plots(save_dir)
         
         # 7. Model statistics summary table as image
-        self._create_statistics_table_image(save_dir)
+        with self._profile('plot[statistics_table_image]'):
+            self._create_statistics_table_image(save_dir)
         
         # 8. Risk category distribution
-        self._create_risk_distribution_plot(save_dir)
+        with self._profile('plot[risk_distribution]'):
+            self._create_risk_distribution_plot(save_dir)
         
         print(f"✅ All visualizations saved to {save_dir}/ directory")
     
@@ -556,7 +769,7 @@ class TouristSafetyPredictor:
         
         # R² Scores
         r2_scores = [self.results[model]['test_r2'] for model in models]
-        colors = ['#3498db', '#e74c3c', '#2ecc71']
+        colors = [model_color(idx) for idx in range(len(models))]
         bars1 = ax1.bar(models, r2_scores, color=colors, alpha=0.8)
         ax1.set_title('R² Score Comparison', fontsize=14, fontweight='bold')
         ax1.set_ylabel('R² Score')
@@ -601,16 +814,17 @@ class TouristSafetyPredictor:
     
     def _create_prediction_plots(self, save_dir):
         """Create prediction vs actual plots for all models"""
-        fig, axes = plt.subplots(1, 3, figsize=(18, 6))
+        n_models = len(self.results)
+        fig, axes = plt.subplots(1, n_models, figsize=(6 * n_models, 6), squeeze=False)
         fig.suptitle('Predictions vs Actual Values', fontsize=20, fontweight='bold')
         
         for idx, (name, result) in enumerate(self.results.items()):
-            ax = axes[idx]
+            ax = axes[0, idx]
             y_test = result['y_test']
             y_pred = result['predictions']
             
             # Scatter plot
-            ax.scatter(y_test, y_pred, alpha=0.6, s=30, color=['#3498db', '#e74c3c', '#2ecc71'][idx])
+            ax.scatter(y_test, y_pred, alpha=0.6, s=30, color=model_color(idx))
             
             # Perfect prediction line
             min_val = min(y_test.min(), y_pred.min())
@@ -636,7 +850,8 @@ class TouristSafetyPredictor:
     
     def _create_residual_plots(self, save_dir):
         """Create residual analysis plots"""
-        fig, axes = plt.subplots(2, 3, figsize=(18, 12))
+        n_models = len(self.results)
+        fig, axes = plt.subplots(2, n_models, figsize=(6 * n_models, 12), squeeze=False)
         fig.suptitle('Residual Analysis', fontsize=20, fontweight='bold')
         
         for idx, (name, result) in enumerate(self.results.items()):
@@ -646,7 +861,7 @@ class TouristSafetyPredictor:
             
             # Residuals vs Predicted
             ax1 = axes[0, idx]
-            ax1.scatter(y_pred, residuals, alpha=0.6, s=30, color=['#3498db', '#e74c3c', '#2ecc71'][idx])
+            ax1.scatter(y_pred, residuals, alpha=0.6, s=30, color=model_color(idx))
             ax1.axhline(y=0, color='red', linestyle='--', linewidth=2)
             ax1.set_xlabel('Predicted Values')
             ax1.set_ylabel('Residuals')
@@ -655,7 +870,7 @@ class TouristSafetyPredictor:
             
             # Residual distribution
             ax2 = axes[1, idx]
-            ax2.hist(residuals, bins=30, alpha=0.7, color=['#3498db', '#e74c3c', '#2ecc71'][idx], edgecolor='black')
+            ax2.hist(residuals, bins=30, alpha=0.7, color=model_color(idx), edgecolor='black')
             ax2.axvline(x=0, color='red', linestyle='--', linewidth=2)
             ax2.set_xlabel('Residuals')
             ax2.set_ylabel('Frequency')
@@ -686,7 +901,7 @@ class TouristSafetyPredictor:
         
         # Top 15 features bar plot
         top_15 = feature_imp.head(15)
-        colors = plt.cm.get_cmap('viridis')(np.linspace(0, 1, len(top_15)))
+        colors = plt.get_cmap('viridis')(np.linspace(0, 1, len(top_15)))
         bars = ax1.barh(range(len(top_15)), top_15['importance'], color=colors)
         ax1.set_yticks(range(len(top_15)))
         ax1.set_yticklabels(top_15['feature'])
@@ -856,7 +1071,8 @@ class TouristSafetyPredictor:
             else:
                 errors_by_range.append([])
         
-        box_plot = ax4.boxplot(errors_by_range, labels=score_ranges, patch_artist=True)
+        box_plot = ax4.boxplot(errors_by_range, patch_artist=True)
+        ax4.set_xticklabels(score_ranges)
         for patch in box_plot['boxes']:
             patch.set_facecolor('lightblue')
         ax4.set_xlabel('Actual Score Range')
@@ -1007,46 +1223,94 @@ class TouristSafetyPredictor:
         plt.close()
         print("   ✓ Risk distribution plots saved")
     
-    def predict_safety_score(self, input_data):
-        """Predict safety score for new data"""
+    def predict_safety_score(self, input_data, timer=None):
+        """Predict safety score for new data.
+        
+        `timer` is an optional object whose `stage(name)` context manager times
+        each pipeline stage (see metrics.StageTimer).
+        """
         if self.model is None:
-            print("Model not trained yet!")
+            logger.error("Model not trained yet")
             return None
         
         if self.feature_selector is None or self.feature_names is None:
-            print("Feature selector or feature names not available!")
+            logger.error("Feature selector or feature names not available")
             return None
         
-        # Prepare input data
-        if isinstance(input_data, dict):
-            input_df = pd.DataFrame([input_data])
-        else:
-            input_df = input_data.copy()
+        X_input = self.build_feature_matrix(input_data, timer=timer)
         
-        # Feature engineering on input
-        input_df = self.feature_engineering_single(input_df)
-        
-        # Select and scale features - handle missing features
-        missing_features = []
-        for feature in self.feature_names:
-            if feature not in input_df.columns:
-                missing_features.append(feature)
-                input_df[feature] = 0  # Fill with default value
+        # Older pickles have no compiled model or float32 pipeline
+        float32_pipeline = getattr(self, 'float32_pipeline', None)
+        if float32_pipeline is not None:
+            X_input_selected = float32_pipeline.transform(X_input, timer=timer)
+            model = float32_pipeline.model
+        else:
+            X_input_selected = self.transform_features(X_input, timer=timer)
+            model = getattr(self, 'compiled_model', None) or self.model
         
-        if missing_features:
-            print(f"Warning: Missing features filled with 0: {missing_features}")
+        # Predict
+        with _stage(timer, 'predict'):
+            prediction = model.predict(X_input_selected)
+            
+            # Constrain predictions to 0-100 range
+            prediction = np.clip(prediction, 0, 100)
         
-        X_input = input_df[self.feature_names]
-        X_input_scaled = self.scaler.transform(X_input)
-        X_input_selected = self.feature_selector.transform(X_input_scaled)
+        return prediction
+    
+    def build_feature_matrix(self, input_data, timer=None):
+        """Turn raw input (dict or DataFrame) into the engineered feature matrix, ordered as feature_names"""
+        # Prepare input data
+        with _stage(timer, 'parse'):
+            if isinstance(input_data, dict):
+                input_df = pd.DataFrame([input_data])
+            else:
+                input_df = input_data.copy()
         
-        # Predict
-        prediction = self.model.predict(X_input_selected)
+        # Feature engineering on input
+        with _stage(timer, 'feature_engineering'):
+            input_df = self.feature_engineering_single(input_df)
+            
+            # Select features - handle missing features
+            missing_features = []
+            for feature in self.feature_names:
+                if feature not in input_df.columns:
+                    missing_features.append(feature)
+                    input_df[feature] = 0  # Fill with default value
+            
+            if missing_features:
+                # Sampled per message template, so a client omitting features on every request logs a few times a minute
+                logger.warning("Missing features filled with 0", extra={'missing_features': missing_features})
+            
+            return input_df[self.feature_names]
+    
+    def transform_features(self, X, timer=None):
+        """Scale an engineered feature matrix and keep the selected columns"""
+        with _stage(timer, 'scale'):
+            X_scaled = self.scaler.transform(X)
+        with _stage(timer, 'select'):
+            return self.feature_selector.transform(X_scaled)
+    
+    def get_selected_feature_names(self):
+        """Names of the features kept by the feature selector"""
+        selected_features = self.feature_selector.get_support()
+        return [self.feature_names[i] for i, selected in enumerate(selected_features) if selected]
+    
+    def fused_linear_weights(self):
+        """Fold scaler and selector into one weight vector over feature_names for linear models.
+
+        Returns (weights, intercept) such that prediction = X @ weights + intercept
+        before clipping, or None if the model is not linear.
+        """
+        if not isinstance(self.model, LinearRegression):
+            return None
         
-        # Constrain predictions to 0-100 range
-        prediction = np.clip(prediction, 0, 100)
+        support = self.feature_selector.get_support()
+        coef = np.ravel(self.model.coef_)
+        weights = np.zeros(len(self.feature_names))
+        weights[support] = coef / self.scaler.scale_[support]
+        intercept = float(self.model.intercept_) - float(np.dot(weights[support], self.scaler.mean_[support]))
         
-        return prediction
+        return weights, intercept
     
     def feature_engineering_single(self, df):
         """Apply feature engineering to single prediction input"""
@@ -1073,6 +1337,10 @@ class TouristSafetyPredictor:
     
     def plot_results(self):
         """Plot model performance and feature importance"""
+        with self._profile('plot_results'):
+            return self._plot_results()
+    
+    def _plot_results(self):
         if not hasattr(self, 'results'):
             print("No results to plot. Train the model first.")
             return
@@ -1121,9 +1389,9 @@ class TouristSafetyPredictor:
         plt.show()
 
 # Example usage and demonstration
-def main():
-    # Initialize the predictor
-    predictor = TouristSafetyPredictor()
+def main(profile_path=None, validation='group', ensemble=False):
+    # Initialize the predictor (profiling is opt-in: python train.py --profile [trace.json])
+    predictor = TouristSafetyPredictor(profile=profile_path is not None)
     
     print("Tourist Safety Score ML Model")
     print("=" * 50)
@@ -1206,7 +1474,7 @@ def main():
     
     # Train the model
     print("\nTraining the model...")
-    results = predictor.train_model()
+    results = predictor.train_model(validation=validation, ensemble=ensemble)
     
     # Print model comparison summary
     predictor.print_model_comparison_summary()
@@ -1296,7 +1564,23 @@ def main():
     except Exception as e:
         print(f"Error in prediction: {e}")
     
+    if profile_path is not None:
+        predictor.save_profile(profile_path)
+    
     return predictor
 
 if __name__ == "__main__":
-    predictor = main()
\ No newline at end of file
+    import sys
+    
+    profile_path = None
+    if '--profile' in sys.argv:
+        position = sys.argv.index('--profile')
+        has_path = position + 1 < len(sys.argv) and not sys.argv[position + 1].startswith('-')
+        profile_path = sys.argv[position + 1] if has_path else 'training_profile.json'
+    
+    # --validation group|time|random chooses how the holdout and CV folds are split
+    validation = 'group'
+    if '--validation' in sys.argv:
+        validation = sys.argv[sys.argv.index('--validation') + 1]
+    
+    predictor = main(profile_path=profile_path, validation=validation, ensemble='--ensemble' in sys.argv)
\ No newline at end of file
@@ -0,0 +1,90 @@
+"""
+Leakage-free validation splits for TouristSafetyPredictor.train_model.
+
+Every pincode appears once per year, so random row splits put the same place on
+both sides of a split and inflate R². A ValidationPlan computes the holdout split
+and the cross-validation folds once, as index arrays, and every candidate model
+(and every parallel CV worker) reuses them.
+"""
+
+import numpy as np
+from sklearn.model_selection import train_test_split, KFold, GroupKFold, GroupShuffleSplit
+
+# 'random' is the old behaviour; 'group' keeps each pincode on one side; 'time' trains on the past only
+VALIDATION_STRATEGIES = ('random', 'group', 'time')
+
+class ValidationPlan:
+    def __init__(self, groups=None, years=None, n_rows=None, strategy='group', n_splits=5,
+                 test_size=0.2, random_state=42):
+        if strategy not in VALIDATION_STRATEGIES:
+            raise ValueError(f"strategy must be one of {VALIDATION_STRATEGIES}")
+        if strategy == 'group' and groups is None:
+            raise ValueError("Group validation needs a pincode for every row")
+        if strategy == 'time' and years is None:
+            raise ValueError("Time validation needs a year for every row")
+
+        self.strategy = strategy
+        self.groups = None if groups is None else np.asarray(groups)
+        self.years = None if years is None else np.asarray(years)
+        self.n_rows = n_rows if n_rows is not None else len(self.groups if groups is not None else self.years)
+
+        positions = np.arange(self.n_rows)
+        if strategy == 'random':
+            self.train_index, self.test_index = train_test_split(positions, test_size=test_size,
+                                                                 random_state=random_state)
+            self.folds = list(KFold(n_splits).split(self.train_index))
+        elif strategy == 'group':
+            splitter = GroupShuffleSplit(n_splits=1, test_size=test_size, random_state=random_state)
+            self.train_index, self.test_index = next(splitter.split(positions, groups=self.groups))
+            self.folds = list(GroupKFold(n_splits).split(self.train_index, groups=self.groups[self.train_index]))
+        else:
+            self.train_index, self.test_index, self.folds = self._time_splits(n_splits)
+
+        # Compact, read-only index arrays that are cheap to ship to CV workers
+        self.train_index = self._freeze(self.train_index)
+        self.test_index = self._freeze(self.test_index)
+        self.folds = [(self._freeze(train), self._freeze(val)) for train, val in self.folds]
+
+    def _time_splits(self, n_splits):
+        """Hold out the last year; forward-chaining folds validate each earlier year on the years before it"""
+        unique_years = np.unique(self.years)
+        if len(unique_years) < 3:
+            raise ValueError("Time validation needs at least three distinct years")
+
+        train_index = np.flatnonzero(self.years < unique_years[-1])
+        test_index = np.flatnonzero(self.years == unique_years[-1])
+
+        train_years = self.years[train_index]
+        folds = []
+        for year in unique_years[1:-1][-n_splits:]:
+            folds.append((np.flatnonzero(train_years < year), np.flatnonzero(train_years == year)))
+        return train_index, test_index, folds
+
+    @staticmethod
+    def _freeze(index):
+        index = np.asarray(index, dtype=np.int32)
+        index.setflags(write=False)
+        return index
+
+    def split(self, *arrays):
+        """Apply the holdout split to DataFrames, Series or arrays with one entry per row"""
+        result = []
+        for array in arrays:
+            take = array.iloc if hasattr(array, 'iloc') else array
+            result.extend([take[self.train_index], take[self.test_index]])
+        return result
+
+    def summary(self):
+        """What was validated how, and a check that no pincode leaks across the holdout"""
+        summary = {
+            'strategy': self.strategy,
+            'train_rows': int(len(self.train_index)),
+            'test_rows': int(len(self.test_index)),
+            'cv_folds': len(self.folds)
+        }
+        if self.groups is not None:
+            shared = np.intersect1d(self.groups[self.train_index], self.groups[self.test_index])
+            summary['groups_in_both'] = int(len(shared))
+        if self.years is not None:
+            summary['test_years'] = sorted(int(y) for y in np.unique(self.years[self.test_index]))
+        return summary